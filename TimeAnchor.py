@@ -3,6 +3,7 @@ import sys
 from PyQt5.QtWidgets import QApplication
 from time_anchor import TimeOverlay
 from utils import create_demo_data, get_data_folder_path, get_db_path
+from migrations import migrate_database
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
@@ -11,6 +12,8 @@ if __name__ == "__main__":
     # Создание папок и демо-данных
     data_folder_path = get_data_folder_path()
     db_path = get_db_path()
+    # Схема базы обновляется до текущей версии один раз до открытия окон
+    migrate_database(db_path)
     create_demo_data(db_path)
 
     # Создаем папку Task если её нет
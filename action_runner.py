@@ -0,0 +1,209 @@
+# action_runner.py
+import itertools
+import os
+import subprocess
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+
+class ActionType:
+    """Тип действия из файла задач: префиксы строки и обработчик.
+
+    Обработчик получает строку без префикса и таймаут, возвращает текст
+    для окна задач или выбрасывает исключение. Обработчики с ui=True
+    выполняются в потоке интерфейса через ui_handlers окна, остальные —
+    в пуле потоков. Обработчик из пула обязан сам укладываться в таймаут
+    (внешние программы — через subprocess с timeout): сторожевой таймер
+    только сообщает об ошибке и не может остановить поток пула.
+    """
+
+    def __init__(self, name, prefixes, handler, timeout=10, ui=False, keep_prefix=False):
+        self.name = name
+        self.prefixes = prefixes
+        self.handler = handler
+        self.timeout = timeout
+        self.ui = ui
+        self.keep_prefix = keep_prefix
+
+
+ACTION_TYPES = OrderedDict()
+
+
+def register_action_type(name, prefixes, timeout=10, ui=False, keep_prefix=False):
+    """Декоратор: регистрирует новый тип действия"""
+    def decorator(handler):
+        ACTION_TYPES[name] = ActionType(name, prefixes, handler, timeout, ui, keep_prefix)
+        return handler
+    return decorator
+
+
+def strip_action_line(line):
+    """Убирает обрамление "действие"; из строки файла задач"""
+    line = line.strip()
+    if line.startswith('"') and line.endswith('";'):
+        return line[1:-2]
+    return line
+
+
+def parse_action(line):
+    """(тип действия, аргумент) для строки; без префикса — обычный текст"""
+    action = strip_action_line(line)
+    lowered = action.lower()
+    for action_type in ACTION_TYPES.values():
+        for prefix in action_type.prefixes:
+            if lowered.startswith(prefix):
+                payload = action if action_type.keep_prefix else action[len(prefix):].strip()
+                return action_type, payload
+    return ACTION_TYPES["text"], action
+
+
+# webbrowser.open может ждать запущенный браузер сколько угодно, поэтому
+# вызывается в отдельном процессе, который subprocess убивает по таймауту
+OPEN_URL_SCRIPT = "import sys, webbrowser; sys.exit(0 if webbrowser.open(sys.argv[1]) else 1)"
+
+
+@register_action_type("url", ("http://", "https://", "url:"), timeout=15, keep_prefix=True)
+def open_url(payload, timeout):
+    url = payload[4:].strip() if payload.lower().startswith("url:") else payload
+    result = subprocess.run([sys.executable, "-c", OPEN_URL_SCRIPT, url],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=timeout)
+    if result.returncode != 0:
+        raise RuntimeError(f"Не удалось открыть ссылку: {url}")
+    return f"Открыто: {url}"
+
+
+@register_action_type("shell", ("shell:", "cmd:"), timeout=30)
+def run_shell(payload, timeout):
+    result = subprocess.run(payload, shell=True, capture_output=True, text=True, timeout=timeout)
+    if result.returncode != 0:
+        details = (result.stderr or result.stdout).strip()
+        raise RuntimeError(f"Команда завершилась с кодом {result.returncode}: {details[:200]}")
+    output = result.stdout.strip()
+    return f"Выполнено: {payload}" + (f"\n{output[:200]}" if output else "")
+
+
+@register_action_type("file", ("file:",), timeout=10)
+def open_file(payload, timeout):
+    path = os.path.expandvars(os.path.expanduser(payload))
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Файл не найден: {path}")
+    if sys.platform == "win32":
+        os.startfile(path)
+    else:
+        opener = "open" if sys.platform == "darwin" else "xdg-open"
+        # Не ждем завершения: программа просмотра живет дольше таймаута
+        subprocess.Popen([opener, path], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                         start_new_session=True)
+    return f"Открыт файл: {path}"
+
+
+def parse_duration(text):
+    """"ММ:СС" или минуты -> секунды"""
+    if ":" in text:
+        minutes, seconds = map(int, text.split(":"))
+    else:
+        minutes, seconds = int(text), 0
+    total = minutes * 60 + seconds
+    if total <= 0:
+        raise ValueError(f"Неверная длительность: {text}")
+    return total
+
+
+@register_action_type("timer", ("timer:", "таймер:"), ui=True)
+def timer_preset(payload, timeout):
+    return parse_duration(payload)
+
+
+@register_action_type("text", ())
+def show_text(payload, timeout):
+    return payload
+
+
+class ActionRunner(QObject):
+    """Выполняет действия из файлов задач вне потока интерфейса.
+
+    run() сразу возвращает номер задания; результат приходит сигналами
+    finished(номер, текст) или failed(номер, ошибка). Если обработчик не
+    уложился в таймаут своего типа, приходит failed, а поздний результат
+    отбрасывается.
+    """
+
+    started = pyqtSignal(int, str)
+    finished = pyqtSignal(int, str)
+    failed = pyqtSignal(int, str)
+
+    def __init__(self, parent=None, ui_handlers=None, max_workers=4):
+        super().__init__(parent)
+        self.ui_handlers = ui_handlers or {}
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="action")
+        self.job_ids = itertools.count(1)
+        self.pending = {}
+        self.lock = threading.Lock()
+
+    def run(self, line, title=None):
+        action_type, payload = parse_action(line)
+        job_id = next(self.job_ids)
+        self.started.emit(job_id, f"{action_type.name}: {payload}")
+
+        if action_type.ui or action_type.name == "text":
+            # Быстрые действия выполняются сразу в потоке интерфейса
+            try:
+                value = action_type.handler(payload, action_type.timeout)
+                ui_handler = self.ui_handlers.get(action_type.name)
+                if action_type.ui:
+                    if ui_handler is None:
+                        raise RuntimeError(f"Действие '{action_type.name}' здесь недоступно")
+                    value = ui_handler(value)
+                self.finished.emit(job_id, self.with_title(title, value))
+            except Exception as e:
+                self.failed.emit(job_id, f"Ошибка: {e}")
+            return job_id
+
+        watchdog = threading.Timer(action_type.timeout + 1, self.on_timeout, (job_id, action_type))
+        watchdog.daemon = True
+        with self.lock:
+            self.pending[job_id] = watchdog
+        watchdog.start()
+        self.executor.submit(self.execute, job_id, action_type, payload, title)
+        return job_id
+
+    def execute(self, job_id, action_type, payload, title):
+        """Выполняется в пуле потоков; сигналы доставляются в поток интерфейса"""
+        try:
+            message = self.with_title(title, action_type.handler(payload, action_type.timeout))
+            error = None
+        except subprocess.TimeoutExpired:
+            message, error = None, f"Превышено время ожидания ({action_type.timeout} с)"
+        except Exception as e:
+            message, error = None, f"Ошибка: {e}"
+
+        with self.lock:
+            watchdog = self.pending.pop(job_id, None)
+        if watchdog is None:
+            return  # уже отчитались по таймауту
+        watchdog.cancel()
+        if error:
+            self.failed.emit(job_id, error)
+        else:
+            self.finished.emit(job_id, message)
+
+    def on_timeout(self, job_id, action_type):
+        with self.lock:
+            if self.pending.pop(job_id, None) is None:
+                return
+        self.failed.emit(job_id, f"Превышено время ожидания ({action_type.timeout} с)")
+
+    @staticmethod
+    def with_title(title, value):
+        return f"{title}: {value}" if title else str(value)
+
+    def shutdown(self):
+        with self.lock:
+            for watchdog in self.pending.values():
+                watchdog.cancel()
+            self.pending.clear()
+        self.executor.shutdown(wait=False)
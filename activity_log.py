@@ -0,0 +1,123 @@
+# activity_log.py
+import sqlite3
+import threading
+import time
+from datetime import datetime, date, timedelta
+
+
+class ActivityLog:
+    """Журнал активности: смены задач и суточные сводки.
+
+    Сырые переходы (время, расписание, слот, задача) только дописываются в
+    таблицу events. При каждом переходе длительность предыдущего
+    интервала сразу раскладывается по дням в daily_rollup, поэтому
+    отчеты читают готовые суммы и не сканируют события.
+    """
+
+    def __init__(self, db_path):
+        self.conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self.lock = threading.Lock()
+        self.current = None  # (ts, timetable, slot, task) открытого интервала
+        self.create_tables()
+
+    def create_tables(self):
+        with self.lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute('''CREATE TABLE IF NOT EXISTS events (
+                                    ts INTEGER NOT NULL,
+                                    timetable TEXT,
+                                    slot TEXT,
+                                    task TEXT)''')
+            self.conn.execute("CREATE INDEX IF NOT EXISTS events_ts ON events (ts)")
+            self.conn.execute('''CREATE TABLE IF NOT EXISTS daily_rollup (
+                                    day TEXT NOT NULL,
+                                    timetable TEXT NOT NULL,
+                                    task TEXT NOT NULL,
+                                    seconds INTEGER NOT NULL DEFAULT 0,
+                                    PRIMARY KEY (day, timetable, task)) WITHOUT ROWID''')
+            self.conn.commit()
+
+    def record_transition(self, timetable, slot, task, ts=None):
+        """Записывает смену слота; task=None закрывает текущий интервал"""
+        if self.current and self.current[1:] == (timetable, slot, task):
+            return
+        if self.current is None and task is None:
+            return
+        ts = int(ts if ts is not None else time.time())
+
+        with self.lock:
+            if self.current:
+                self._add_interval(*self.current, end_ts=ts)
+            self.conn.execute("INSERT INTO events (ts, timetable, slot, task) VALUES (?, ?, ?, ?)",
+                              (ts, timetable, slot, task))
+            self.conn.commit()
+
+        self.current = (ts, timetable, slot, task) if task is not None else None
+
+    def close_session(self, ts=None):
+        """Закрывает открытый интервал (при выходе из приложения)"""
+        if self.current:
+            self.record_transition(self.current[1], None, None, ts)
+
+    def _add_interval(self, start_ts, timetable, slot, task, end_ts):
+        """Раскладывает интервал по суткам и добавляет к сводкам"""
+        if task is None or end_ts <= start_ts:
+            return
+        start = datetime.fromtimestamp(start_ts)
+        end = datetime.fromtimestamp(end_ts)
+        while start < end:
+            next_midnight = datetime.combine(start.date() + timedelta(days=1), datetime.min.time())
+            chunk_end = min(end, next_midnight)
+            seconds = int((chunk_end - start).total_seconds())
+            if seconds > 0:
+                self.conn.execute(
+                    '''INSERT INTO daily_rollup (day, timetable, task, seconds) VALUES (?, ?, ?, ?)
+                       ON CONFLICT (day, timetable, task) DO UPDATE SET seconds = seconds + excluded.seconds''',
+                    (start.date().isoformat(), timetable, task, seconds))
+            start = chunk_end
+
+    def hours_per_task(self, start_day, end_day, timetable=None, include_current=True):
+        """Часы по задачам за дни [start_day, end_day] из суточных сводок"""
+        query = "SELECT task, SUM(seconds) FROM daily_rollup WHERE day BETWEEN ? AND ?"
+        params = [start_day.isoformat(), end_day.isoformat()]
+        if timetable is not None:
+            query += " AND timetable = ?"
+            params.append(timetable)
+        query += " GROUP BY task"
+
+        with self.lock:
+            totals = {task: seconds for task, seconds in self.conn.execute(query, params)}
+
+        # Открытый интервал еще не попал в сводки
+        if include_current and self.current:
+            start_ts, current_timetable, _, task = self.current
+            if timetable is None or timetable == current_timetable:
+                range_start = datetime.combine(start_day, datetime.min.time()).timestamp()
+                range_end = datetime.combine(end_day + timedelta(days=1), datetime.min.time()).timestamp()
+                seconds = min(time.time(), range_end) - max(start_ts, range_start)
+                if seconds > 0:
+                    totals[task] = totals.get(task, 0) + int(seconds)
+
+        return {task: seconds / 3600 for task, seconds in sorted(totals.items(), key=lambda x: -x[1])}
+
+    def hours_per_task_month(self, year=None, month=None, timetable=None):
+        """Часы по задачам за месяц (по умолчанию текущий)"""
+        today = date.today()
+        year = year or today.year
+        month = month or today.month
+        first_day = date(year, month, 1)
+        next_month = date(year + month // 12, month % 12 + 1, 1)
+        return self.hours_per_task(first_day, next_month - timedelta(days=1), timetable)
+
+    def events_between(self, start_ts, end_ts):
+        """Сырые переходы за период (для выгрузки и проверки сводок)"""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT ts, timetable, slot, task FROM events WHERE ts >= ? AND ts < ? ORDER BY ts",
+                (int(start_ts), int(end_ts))).fetchall()
+
+    def close(self):
+        self.close_session()
+        with self.lock:
+            self.conn.close()
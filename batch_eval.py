@@ -0,0 +1,226 @@
+# batch_eval.py
+import sqlite3
+
+from compact_timetable import (CompactTimetable, StringTable, FREE_TIME, MINUTES_PER_DAY, current_slot,
+                               minutes_to_time)
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Заполнитель пустых ячеек матрицы: больше любой минуты суток, но меньше
+# шага между строками при построчном searchsorted
+PAD_MINUTE = 2 * MINUTES_PER_DAY
+ROW_STRIDE = PAD_MINUTE + 1
+# Номер "слота" свободного времени: длительность текущего слота истекла
+FREE_POSITION = -2
+
+
+def load_all(db_path):
+    """Все расписания из таблицы timetable одним запросом: {имя: CompactTimetable}
+    с общей таблицей строк"""
+    conn = sqlite3.connect(str(db_path))
+    try:
+        rows = conn.execute("SELECT timetable_name, time, task, color, duration FROM timetable "
+                            "ORDER BY timetable_name, time").fetchall()
+    finally:
+        conn.close()
+    grouped = {}
+    durations = {}
+    for name, time_str, task, color, duration in rows:
+        grouped.setdefault(name, []).append((time_str, (task, color)))
+        if duration:
+            durations.setdefault(name, {})[time_str] = duration
+    strings = StringTable()
+    return {name: CompactTimetable(slots, strings, durations.get(name)) for name, slots in grouped.items()}
+
+
+class BatchSchedule:
+    """Текущий и следующий слот сразу для многих расписаний.
+
+    С NumPy начала слотов лежат в матрице (расписания x слоты), дополненной
+    PAD_MINUTE; к строке i прибавлено i * ROW_STRIDE, поэтому вся матрица
+    отсортирована как один массив и один searchsorted находит позицию
+    в каждой строке сразу для всех расписаний и всех запрошенных минут.
+    Без NumPy тот же ответ считается циклом по CompactTimetable.slot_at.
+    Длительности слотов лежат во второй матрице той же формы: как и в
+    current_slot, слот с истекшей длительностью дает свободное время.
+
+    Номер слота -1 означает пустое расписание, FREE_POSITION — свободное
+    время (следующий слот при этом известен, у единственного слота это
+    он сам).
+    """
+
+    def __init__(self, timetables, use_numpy=True):
+        self.names = list(timetables)
+        self.tables = [timetables[name] for name in self.names]
+        self.vectorized = use_numpy and np is not None
+        if self.vectorized:
+            self.build_matrix()
+
+    def build_matrix(self):
+        width = max((len(table) for table in self.tables), default=0) or 1
+        starts = np.full((len(self.tables), width), PAD_MINUTE, dtype=np.int32)
+        durations = np.zeros((len(self.tables), width), dtype=np.int32)
+        for row, table in enumerate(self.tables):
+            starts[row, :len(table)] = np.frombuffer(table.minutes, dtype=np.uint16)
+            durations[row, :len(table)] = np.frombuffer(table.durations, dtype=np.uint16)
+        self.width = width
+        self.starts = starts
+        self.durations = durations
+        self.counts = np.array([len(table) for table in self.tables], dtype=np.int64)
+        self.row_base = np.arange(len(self.tables), dtype=np.int64) * ROW_STRIDE
+        self.flat = (starts + self.row_base[:, None]).ravel()
+
+    def positions(self, minutes):
+        """(текущие, следующие) номера слотов; форма (расписания,) для одной
+        минуты или (расписания, минуты) для последовательности минут"""
+        if not self.vectorized:
+            return self.positions_loop(minutes)
+
+        single = np.ndim(minutes) == 0
+        minutes = np.atleast_1d(np.asarray(minutes, dtype=np.int64)) % MINUTES_PER_DAY
+        queries = self.row_base[:, None] + minutes[None, :]
+        found = np.searchsorted(self.flat, queries.ravel(), side="right").reshape(queries.shape)
+        current = found - (np.arange(len(self.tables), dtype=np.int64) * self.width)[:, None] - 1
+
+        counts = self.counts[:, None]
+        safe_counts = np.maximum(counts, 1)
+        # До первого слота дня идет последний слот предыдущего дня
+        current = np.where(current < 0, counts - 1, current)
+        following = np.where(counts > 1, (current + 1) % safe_counts, -1)
+        current = np.where(counts > 0, current, -1)
+        following = np.where(counts > 0, following, -1)
+
+        rows = np.arange(len(self.tables))[:, None]
+        index = np.maximum(current, 0)
+        duration = self.durations[rows, index]
+        elapsed = (minutes[None, :] - self.starts[rows, index]) % MINUTES_PER_DAY
+        expired = (current >= 0) & (duration > 0) & (elapsed >= duration)
+        following = np.where(expired & (counts == 1), current, following)
+        current = np.where(expired, FREE_POSITION, current)
+        if single:
+            return current[:, 0], following[:, 0]
+        return current, following
+
+    def positions_loop(self, minutes):
+        single = isinstance(minutes, int)
+        minutes = [minutes] if single else list(minutes)
+        current = []
+        following = []
+        for table in self.tables:
+            row_current = []
+            row_next = []
+            for minute in minutes:
+                position = table.slot_at(minute)
+                if position is None:
+                    row_current.append(-1)
+                    row_next.append(-1)
+                    continue
+                next_position = (position + 1) % len(table) if len(table) > 1 else -1
+                duration = table.duration(position)
+                if duration and (minute - table.minutes[position]) % MINUTES_PER_DAY >= duration:
+                    if next_position < 0:
+                        next_position = position
+                    position = FREE_POSITION
+                row_current.append(position)
+                row_next.append(next_position)
+            current.append(row_current[0] if single else row_current)
+            following.append(row_next[0] if single else row_next)
+        return current, following
+
+    def at(self, minute):
+        """[(имя, (время, (задача, цвет)) или None, следующий слот или None)] на минуту дня.
+        Свободное время — (время окончания слота, FREE_TIME), как в current_slot"""
+        current, following = self.positions(int(minute))
+        result = []
+        for name, table, position, next_position in zip(self.names, self.tables, current, following):
+            position, next_position = int(position), int(next_position)
+            if position == FREE_POSITION:
+                ended = (next_position - 1) % len(table)
+                end = (table.minutes[ended] + table.duration(ended)) % MINUTES_PER_DAY
+                slot = (minutes_to_time(end), FREE_TIME)
+            else:
+                slot = table.slot(position) if position >= 0 else None
+            result.append((name, slot, table.slot(next_position) if next_position >= 0 else None))
+        return result
+
+    def day(self):
+        """Номера текущих слотов (или FREE_POSITION) каждого расписания
+        на каждую минуту суток"""
+        current, _ = self.positions(range(MINUTES_PER_DAY))
+        return current
+
+
+def benchmark(timetables=2000, slots=48):
+    """Один запрос "кто чем занят" для тысяч расписаний: цикл против матрицы"""
+    import random
+    import time
+
+    step = MINUTES_PER_DAY // slots
+    strings = StringTable()
+    tables = {}
+    for i in range(timetables):
+        count = random.randint(1, slots)
+        starts = sorted(random.sample(range(0, MINUTES_PER_DAY, step), count))
+        durations = {minutes_to_time(m): random.randint(1, step) for m in starts if random.random() < 0.3}
+        tables[f"Комната {i}"] = CompactTimetable(
+            ((minutes_to_time(m), (f"Задача {m % 17}", "#3498db")) for m in starts), strings, durations)
+
+    loop = BatchSchedule(tables, use_numpy=False)
+    start = time.perf_counter()
+    loop_now = loop.positions(600)
+    loop_time = time.perf_counter() - start
+    print(f"Расписаний: {timetables}, до {slots} слотов")
+    print(f"Цикл slot_at, одна минута: {loop_time * 1000:.2f} мс")
+
+    if np is None:
+        print("NumPy не установлен: векторный вариант пропущен")
+        return
+
+    batch = BatchSchedule(tables)
+    start = time.perf_counter()
+    batch_now = batch.positions(600)
+    batch_time = time.perf_counter() - start
+    assert list(batch_now[0]) == loop_now[0] and list(batch_now[1]) == loop_now[1]
+    print(f"NumPy searchsorted, одна минута: {batch_time * 1000:.2f} мс")
+
+    start = time.perf_counter()
+    batch.day()
+    print(f"NumPy, все {MINUTES_PER_DAY} минут суток: {(time.perf_counter() - start) * 1000:.1f} мс")
+
+
+def selftest():
+    """Цикл, NumPy и current_slot дают один ответ на каждую минуту суток,
+    в том числе когда длительность слота истекла до следующего"""
+    tables = {
+        "Два слота": CompactTimetable([("09:00", ("Work", "#e74c3c")), ("18:00", ("Home", "#2ecc71"))],
+                                      durations={"09:00": 60}),
+        "Один слот": CompactTimetable([("22:30", ("Сон", "#34495e"))], durations={"22:30": 480}),
+        "Без длительностей": CompactTimetable([("07:00", ("Подъем", None)), ("12:00", ("Обед", None))]),
+        "Пустое": CompactTimetable(),
+    }
+    variants = [BatchSchedule(tables, use_numpy=False)]
+    if np is not None:
+        variants.append(BatchSchedule(tables))
+    for minute in range(MINUTES_PER_DAY):
+        answers = [batch.at(minute) for batch in variants]
+        assert all(answer == answers[0] for answer in answers[1:]), minute
+        for (name, slot, next_slot), table in zip(answers[0], tables.values()):
+            expected = current_slot(table, minute)
+            if expected is None:
+                assert slot is None and next_slot is None, (name, minute)
+                continue
+            task_data, start_time, next_time, next_task_data = expected
+            assert slot == (start_time, task_data), (name, minute)
+            assert next_slot == ((next_time, next_task_data) if next_time else None), (name, minute)
+    assert variants[-1].at(720)[0][1] == ("10:00", FREE_TIME)
+    print(f"Длительности: {' и '.join('NumPy' if b.vectorized else 'цикл' for b in variants)} "
+          f"совпадают с current_slot на всех минутах — ок")
+
+
+if __name__ == "__main__":
+    selftest()
+    benchmark()
@@ -0,0 +1,107 @@
+# catchup.py
+import time
+from datetime import timedelta
+
+from notification_plan import PlannedNotification
+
+
+# Политики догоняющих уведомлений после сна или скачка часов
+CATCHUP_POLICIES = ("skip", "latest", "all")
+
+# Опоздание, которое еще считается обычным (тик раз в 2 секунды)
+LATE_GRACE = timedelta(seconds=60)
+
+
+class ClockJump:
+    """Разрыв между двумя тиками: сон, пауза процесса или перевод часов"""
+
+    __slots__ = ("kind", "since", "until", "wall_elapsed", "mono_elapsed")
+
+    def __init__(self, kind, since, until, wall_elapsed, mono_elapsed):
+        self.kind = kind                # "sleep", "forward" или "backward"
+        self.since = since              # настенное время предыдущего тика (epoch)
+        self.until = until              # настенное время текущего тика (epoch)
+        self.wall_elapsed = wall_elapsed
+        self.mono_elapsed = mono_elapsed
+
+    def __repr__(self):
+        return (f"ClockJump({self.kind}, wall={self.wall_elapsed:.1f}s, "
+                f"mono={self.mono_elapsed:.1f}s)")
+
+
+class ClockWatch:
+    """Сравнивает ход настенных и монотонных часов между тиками.
+
+    Монотонные часы не переводятся, поэтому расхождение с настенными
+    означает перевод часов или синхронизацию времени. Большой промежуток
+    по обоим часам означает сон машины или зависание цикла событий (на
+    части систем монотонные часы во сне стоят, тогда остается только
+    расхождение).
+    """
+
+    def __init__(self, interval, wall=time.time, mono=time.monotonic, threshold=30):
+        self.interval = interval
+        self.threshold = threshold
+        self.wall = wall
+        self.mono = mono
+        self.last_wall = None
+        self.last_mono = None
+
+    def check(self):
+        """Возвращает ClockJump, если с прошлого вызова был разрыв, иначе None"""
+        wall_now = self.wall()
+        mono_now = self.mono()
+        last_wall, last_mono = self.last_wall, self.last_mono
+        self.last_wall, self.last_mono = wall_now, mono_now
+        if last_wall is None:
+            return None
+
+        wall_elapsed = wall_now - last_wall
+        mono_elapsed = mono_now - last_mono
+        drift = wall_elapsed - mono_elapsed
+
+        if drift < -self.threshold:
+            kind = "backward"
+        elif drift > self.threshold:
+            # Монотонные часы стояли (сон) или настенные переведены вперед
+            kind = "forward" if mono_elapsed < self.interval + self.threshold else "sleep"
+        elif mono_elapsed > self.interval + self.threshold:
+            kind = "sleep"
+        else:
+            return None
+        return ClockJump(kind, last_wall, wall_now, wall_elapsed, mono_elapsed)
+
+
+def split_missed(due, now):
+    """Делит снятые с плана уведомления на вовремя и пропущенные"""
+    on_time = [entry for entry in due if now - entry.fire_at <= LATE_GRACE]
+    missed = [entry for entry in due if now - entry.fire_at > LATE_GRACE]
+    return on_time, missed
+
+
+def coalesce_missed(missed):
+    """Одно сводное уведомление вместо пачки пропущенных (с данными последнего)"""
+    last = missed[-1]
+    lines = [f"{entry.slot.strftime('%H:%M')}  {entry.task}"
+             for entry in missed if entry.notif_type == "now"]
+    if not lines:
+        lines = [f"{entry.slot.strftime('%H:%M')}  {entry.task}" for entry in missed]
+    text = "Пропущено:\n" + "\n".join(dict.fromkeys(lines))
+    return PlannedNotification(last.fire_at, last.notif_type, last.task, last.slot, text, last.sound_file)
+
+
+def resolve_missed(due, now, policy):
+    """Что показать из снятых с плана уведомлений после разрыва.
+
+    skip   — пропущенные не показываются;
+    latest — показывается только последнее пропущенное, если нет свежего;
+    all    — пропущенные и свежие сводятся в одно уведомление с одним звуком.
+    Уведомления, опоздавшие не больше LATE_GRACE, показываются как обычно.
+    """
+    on_time, missed = split_missed(due, now)
+    if not missed or policy == "skip":
+        return on_time
+    if policy == "all":
+        batch = missed + on_time
+        return [coalesce_missed(batch)] if len(batch) > 1 else batch
+    return on_time or [missed[-1]]
@@ -0,0 +1,275 @@
+# compact_timetable.py
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Mapping
+
+
+MINUTES_PER_DAY = 1440
+
+# Показывается, когда длительность текущего слота истекла, а следующий не начался
+FREE_TIME = ("Свободное время", "#FFFFFF")
+
+
+def time_to_minutes(time_str):
+    """Переводит "HH:MM" в минуты от начала суток"""
+    hours, minutes = time_str.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def minutes_to_time(minutes):
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def current_slot(timetable, minute):
+    """Текущая задача: последний начавшийся слот (до первого слота дня —
+    последний слот предыдущего дня) и следующий за ним по кругу.
+    Если у слота есть длительность и она истекла — свободное время.
+
+    Подходит любое расписание со slot_at/slot/duration. Возвращает
+    ((задача, цвет), начало, время следующего, (задача, цвет) следующего)
+    или None для пустого расписания.
+    """
+    if not timetable:
+        return None
+    position = timetable.slot_at(minute)
+    start_time, task_data = timetable.slot(position)
+    next_time, next_task_data = None, None
+    if len(timetable) > 1:
+        next_time, next_task_data = timetable.slot((position + 1) % len(timetable))
+
+    duration = timetable.duration(position)
+    if duration and (minute - time_to_minutes(start_time)) % MINUTES_PER_DAY >= duration:
+        end_time = minutes_to_time((time_to_minutes(start_time) + duration) % MINUTES_PER_DAY)
+        if len(timetable) == 1:
+            next_time, next_task_data = start_time, task_data
+        return FREE_TIME, end_time, next_time, next_task_data
+
+    return task_data, start_time, next_time, next_task_data
+
+
+class StringTable:
+    """Интернированные строки: каждая задача и цвет хранятся один раз,
+    слоты ссылаются на них номером. Номер 0 — None.
+
+    Таблица только растет, поэтому живет столько же, сколько расписания,
+    построенные на ней: своя у каждого прочитанного из БД расписания
+    (копии для правок делят ее с исходным), общая — у пакета расписаний
+    (batch_eval.load_all). Правки одного снимка могут идти из разных
+    потоков, поэтому новые строки добавляются под блокировкой.
+    """
+
+    __slots__ = ("strings", "indexes", "lock")
+
+    def __init__(self):
+        self.strings = [None]
+        self.indexes = {}
+        self.lock = threading.Lock()
+
+    def intern(self, value):
+        if value is None:
+            return 0
+        index = self.indexes.get(value)
+        if index is None:
+            with self.lock:
+                index = self.indexes.get(value)
+                if index is None:
+                    # Сначала строка, потом номер: читатель без блокировки,
+                    # нашедший номер, всегда найдет и строку
+                    self.strings.append(value)
+                    index = self.indexes[value] = len(self.strings) - 1
+        return index
+
+    def __getitem__(self, index):
+        return self.strings[index]
+
+    def __len__(self):
+        return len(self.strings) - 1
+
+
+class SlotView:
+    """Слот расписания без отдельного объекта на строку: таблица + номер"""
+
+    __slots__ = ("table", "position")
+
+    def __init__(self, table, position):
+        self.table = table
+        self.position = position
+
+    @property
+    def minute(self):
+        return self.table.minutes[self.position]
+
+    @property
+    def time(self):
+        return minutes_to_time(self.minute)
+
+    @property
+    def task(self):
+        return self.table.strings[self.table.tasks[self.position]]
+
+    @property
+    def color(self):
+        return self.table.strings[self.table.colors[self.position]]
+
+    @property
+    def duration(self):
+        return self.table.duration(self.position)
+
+    def __repr__(self):
+        return f"SlotView({self.time}, {self.task!r}, {self.color!r})"
+
+
+class CompactTimetable(Mapping):
+    """Расписание в параллельных массивах: минуты и длительности
+    (array('H'), 0 — до следующего слота) и номера строк задачи и цвета
+    (array('I')), отсортированные по времени.
+
+    Снаружи это отображение {"HH:MM": (задача, цвет)}: ключи и кортежи
+    создаются при обращении. Поиск по времени и текущего слота по минуте
+    дня — бинарный поиск по массиву минут.
+    """
+
+    __slots__ = ("minutes", "durations", "tasks", "colors", "strings")
+
+    def __init__(self, slots=(), strings=None, durations=None):
+        self.strings = strings = strings if strings is not None else StringTable()
+        durations = durations or {}
+        rows = sorted((time_to_minutes(time_str), task, color, durations.get(time_str) or 0)
+                      for time_str, (task, color) in dict(slots).items())
+        self.minutes = array("H", [row[0] for row in rows])
+        self.tasks = array("I", [strings.intern(row[1]) for row in rows])
+        self.colors = array("I", [strings.intern(row[2]) for row in rows])
+        self.durations = array("H", [row[3] for row in rows])
+
+    def copy(self):
+        table = CompactTimetable(strings=self.strings)
+        table.minutes = array("H", self.minutes)
+        table.durations = array("H", self.durations)
+        table.tasks = array("I", self.tasks)
+        table.colors = array("I", self.colors)
+        return table
+
+    # --- Чтение ---
+
+    def insertion_point(self, time_str):
+        """Номер, под которым слот с этим временем стоит или встанет"""
+        return bisect_left(self.minutes, time_to_minutes(time_str))
+
+    def position(self, time_str):
+        """Номер слота по времени или -1"""
+        position = self.insertion_point(time_str)
+        if position < len(self.minutes) and self.minutes[position] == time_to_minutes(time_str):
+            return position
+        return -1
+
+    def slot(self, position):
+        """(время, (задача, цвет)) слота по номеру"""
+        return (minutes_to_time(self.minutes[position]),
+                (self.strings[self.tasks[position]], self.strings[self.colors[position]]))
+
+    def duration(self, position):
+        """Длительность слота в минутах или None (до следующего слота)"""
+        return self.durations[position] or None
+
+    def duration_of(self, time_str):
+        position = self.position(time_str)
+        return self.duration(position) if position >= 0 else None
+
+    def view(self, position):
+        return SlotView(self, position)
+
+    def slot_at(self, minute):
+        """Номер слота, идущего в минуту дня (до первого слота — последний
+        слот предыдущего дня), или None для пустого расписания"""
+        if not self.minutes:
+            return None
+        return (bisect_right(self.minutes, minute % MINUTES_PER_DAY) - 1) % len(self.minutes)
+
+    def __getitem__(self, time_str):
+        try:
+            position = self.position(time_str)
+        except ValueError:
+            raise KeyError(time_str)
+        if position < 0:
+            raise KeyError(time_str)
+        return self.slot(position)[1]
+
+    def __iter__(self):
+        for minute in self.minutes:
+            yield minutes_to_time(minute)
+
+    def __len__(self):
+        return len(self.minutes)
+
+    def __repr__(self):
+        return f"CompactTimetable({len(self)} слотов)"
+
+    # --- Изменение ---
+
+    def insert(self, time_str, task, color, duration=None):
+        """Вставляет слот на его место (существующий с тем же временем заменяется)"""
+        minute = time_to_minutes(time_str)
+        position = self.insertion_point(time_str)
+        task_index = self.strings.intern(task)
+        color_index = self.strings.intern(color)
+        if position < len(self.minutes) and self.minutes[position] == minute:
+            self.tasks[position] = task_index
+            self.colors[position] = color_index
+            self.durations[position] = duration or 0
+        else:
+            self.minutes.insert(position, minute)
+            self.durations.insert(position, duration or 0)
+            self.tasks.insert(position, task_index)
+            self.colors.insert(position, color_index)
+        return position
+
+    def remove(self, time_str):
+        """Удаляет слот; возвращает (задача, цвет) или None"""
+        position = self.position(time_str)
+        if position < 0:
+            return None
+        _, data = self.slot(position)
+        del self.minutes[position]
+        del self.durations[position]
+        del self.tasks[position]
+        del self.colors[position]
+        return data
+
+
+def benchmark(timetables=200, slots=96):
+    """Память на слот: словарь кортежей против массивов"""
+    import random
+    import tracemalloc
+    from collections import OrderedDict
+
+    names = [f"Задача {i}" for i in range(40)]
+    colors = ["#3498db", "#e74c3c", "#2ecc71", "#f1c40f"]
+    step = MINUTES_PER_DAY // slots
+    rows = [[(minutes_to_time(m), (random.choice(names), random.choice(colors)))
+             for m in range(0, MINUTES_PER_DAY, step)] for _ in range(timetables)]
+
+    def fresh(value):
+        # Как при чтении из БД: у каждой строки свои объекты строк
+        return value.encode().decode()
+
+    strings = StringTable()
+    results = {}
+    for label, build in (
+            ("OrderedDict", lambda r: OrderedDict((fresh(t), (fresh(task), fresh(color)))
+                                                 for t, (task, color) in r)),
+            ("CompactTimetable", lambda r: CompactTimetable(r, strings))):
+        tracemalloc.start()
+        kept = [build(r) for r in rows]
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[label] = size / (timetables * len(rows[0]))
+        del kept
+
+    for label, per_slot in results.items():
+        print(f"{label:>18}: {per_slot:7.1f} байт на слот")
+    return results
+
+
+if __name__ == "__main__":
+    benchmark()
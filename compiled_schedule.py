@@ -0,0 +1,316 @@
+# compiled_schedule.py
+import mmap
+import os
+import struct
+import time
+from bisect import bisect_right
+from collections.abc import Mapping
+
+
+# Формат файла (little-endian):
+#   заголовок  HEADER
+#   слоты      slot_count * SLOT (минута, длительность, время, задача, цвет —
+#              последние три — индексы строк)
+#   минуты     1440 * uint16 — номер слота, идущего в эту минуту
+#   строки     (string_count + 1) * uint32 смещений + UTF-8 данные
+MAGIC = b"TASCHED\0"
+FORMAT_VERSION = 4
+# magic, версия формата, слотов, строк, имя расписания, версия содержимого
+# (timetable_version в БД на момент чтения снимка), отметка БД (STAMP)
+HEADER = struct.Struct("<8sHHIIQ4Q")
+# Размер и mtime БД и ее журнала WAL, при которых версия содержимого
+# последний раз сверялась с БД; нули — еще не сверялась
+STAMP = struct.Struct("<4Q")
+STAMP_OFFSET = HEADER.size - STAMP.size
+NO_STAMP = (0, 0, 0, 0)
+SLOT = struct.Struct("<HHHHH")
+MINUTE = struct.Struct("<H")
+OFFSET = struct.Struct("<I")
+MINUTES_PER_DAY = 1440
+NO_INDEX = 0xFFFF
+# Попытки os.replace: на Windows файл, отображенный в память другим
+# процессом (timeanchor_cli), заменить нельзя, пока тот его не закроет
+REPLACE_ATTEMPTS = 4
+REPLACE_DELAY = 0.05
+
+
+def time_to_minute(time_str):
+    hours, minutes = time_str.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def compile_schedule(snapshot, stamp=NO_STAMP):
+    """Байты скомпилированного расписания для снимка, прочитанного из БД"""
+    if snapshot.content_version is None:
+        raise ValueError("Снимок без версии содержимого БД нельзя скомпилировать")
+    strings = {}
+
+    def intern(value):
+        if value is None:
+            return NO_INDEX
+        return strings.setdefault(value, len(strings))
+
+    name_index = intern(snapshot.timetable_name)
+    slots = sorted((time_to_minute(time_str), time_str, task, color)
+                   for time_str, (task, color) in snapshot.items())
+    slot_records = [SLOT.pack(minute, snapshot.duration(position) or 0,
+                              intern(time_str), intern(task), intern(color))
+                    for position, (minute, time_str, task, color) in enumerate(slots)]
+    if len(strings) >= NO_INDEX:
+        raise ValueError("Слишком много строк для скомпилированного расписания")
+
+    # Текущий слот — последний начавшийся; до первого слота дня идет
+    # последний слот предыдущего дня
+    starts = [slot[0] for slot in slots]
+    minutes = []
+    for minute in range(MINUTES_PER_DAY):
+        position = bisect_right(starts, minute) - 1
+        minutes.append(MINUTE.pack(position % len(slots)) if slots else MINUTE.pack(NO_INDEX))
+
+    encoded = [value.encode("utf-8") for value in strings]
+    offsets = [0]
+    for data in encoded:
+        offsets.append(offsets[-1] + len(data))
+
+    return b"".join([
+        HEADER.pack(MAGIC, FORMAT_VERSION, len(slots), len(strings), name_index, snapshot.content_version,
+                    *stamp),
+        *slot_records,
+        *minutes,
+        *(OFFSET.pack(offset) for offset in offsets),
+        *encoded,
+    ])
+
+
+def source_stamp(db_path):
+    """Размеры и mtime БД и журнала WAL: пока они те же, в БД ничего не
+    записано. None, если базы нет"""
+    stamp = []
+    for source in (str(db_path), f"{db_path}-wal"):
+        try:
+            stat = os.stat(source)
+        except FileNotFoundError:
+            if not stamp:
+                return None
+            stamp += [0, 0]
+        else:
+            stamp += [stat.st_size, stat.st_mtime_ns]
+    return tuple(stamp)
+
+
+def write_compiled(path, snapshot, db_path):
+    """Атомарно записывает скомпилированное расписание.
+
+    Вызывается и из потока интерфейса, и из фоновой загрузки, поэтому у
+    каждой записи свой временный файл; последний os.replace побеждает.
+    Свое отображение старого файла вызывающий закрывает заранее
+    (CompiledSchedule.release); если файл все равно занят — PermissionError.
+    """
+    import tempfile
+
+    # Отметка снимается до сверки версии: запись в БД после сверки ее меняет
+    stamp = source_stamp(db_path)
+    if stamp is None or content_version(db_path, snapshot.timetable_name) != snapshot.content_version:
+        stamp = NO_STAMP
+    data = compile_schedule(snapshot, stamp)
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.fspath(path)) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        for attempt in range(REPLACE_ATTEMPTS):
+            try:
+                os.replace(temp_path, path)
+                break
+            except PermissionError:
+                if attempt == REPLACE_ATTEMPTS - 1:
+                    raise
+                time.sleep(REPLACE_DELAY)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def content_version(db_path, timetable_name):
+    """Счетчик изменений расписания в БД (см. read_content_version)"""
+    # Импорт здесь: чтение файла не тянет sqlite3 (важно для timeanchor_cli)
+    import sqlite3
+    from schedule_snapshot import read_content_version
+
+    conn = sqlite3.connect(str(db_path))
+    try:
+        return read_content_version(conn, timetable_name)
+    finally:
+        conn.close()
+
+
+class CompiledSchedule(Mapping):
+    """Расписание, отображенное из файла в память без разбора.
+
+    Ведет себя как ScheduleSnapshot (только чтение): строки декодируются
+    при обращении, а текущий слот по минуте дня — одно чтение из массива
+    минут. Правка превращает его в обычный снимок (with_edit).
+    """
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        (magic, version, self.slot_count, self.string_count, name_index,
+         self.content_version, *stamp) = HEADER.unpack_from(buffer, 0)
+        self.stamp = tuple(stamp)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError("Неизвестный формат скомпилированного расписания")
+        self.slots_offset = HEADER.size
+        self.minutes_offset = self.slots_offset + self.slot_count * SLOT.size
+        self.offsets_offset = self.minutes_offset + MINUTES_PER_DAY * MINUTE.size
+        self.strings_offset = self.offsets_offset + (self.string_count + 1) * OFFSET.size
+        self.timetable_name = self.string(name_index)
+        self.version = 0
+        self.inode = None
+        self._index = None
+
+    @classmethod
+    def open(cls, path):
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            compiled = cls(buffer)
+            compiled.inode = os.fstat(f.fileno()).st_ino
+        return compiled
+
+    def release(self):
+        """Переносит файл в память и закрывает отображение: на Windows
+        отображенный файл нельзя заменить новой записью"""
+        if not isinstance(self.buffer, mmap.mmap):
+            return
+        mapped = self.buffer
+        self.buffer = mapped[:]
+        try:
+            mapped.close()
+        except BufferError:
+            pass  # читается из другого потока; закроется вместе с объектом
+
+    def restamp(self, path, stamp):
+        """Записывает новую отметку в заголовок, если path — все еще этот файл"""
+        try:
+            with open(path, "r+b") as f:
+                if os.fstat(f.fileno()).st_ino != self.inode:
+                    return  # файл уже заменен новой записью
+                f.seek(STAMP_OFFSET)
+                f.write(STAMP.pack(*stamp))
+        except OSError:
+            pass  # отметка только ускоряет следующую проверку
+
+    def string(self, index):
+        if index == NO_INDEX:
+            return None
+        start, end = struct.unpack_from("<II", self.buffer, self.offsets_offset + index * OFFSET.size)
+        return str(self.buffer[self.strings_offset + start:self.strings_offset + end], "utf-8")
+
+    def slot(self, position):
+        """(время, (задача, цвет)) слота по номеру"""
+        _, _, time_index, task_index, color_index = SLOT.unpack_from(
+            self.buffer, self.slots_offset + position * SLOT.size)
+        return self.string(time_index), (self.string(task_index), self.string(color_index))
+
+    def duration(self, position):
+        _, duration, _, _, _ = SLOT.unpack_from(self.buffer, self.slots_offset + position * SLOT.size)
+        return duration or None
+
+    def intervals(self):
+        return [SLOT.unpack_from(self.buffer, self.slots_offset + position * SLOT.size)[:2]
+                for position in range(self.slot_count)]
+
+    def slot_at(self, minute):
+        """Номер слота, идущего в минуту дня, или None"""
+        position, = MINUTE.unpack_from(self.buffer, self.minutes_offset + (minute % MINUTES_PER_DAY) * MINUTE.size)
+        return None if position == NO_INDEX else position
+
+    def index(self):
+        if self._index is None:
+            self._index = {self.slot(position)[0]: position for position in range(self.slot_count)}
+        return self._index
+
+    def __getitem__(self, time_str):
+        return self.slot(self.index()[time_str])[1]
+
+    def __iter__(self):
+        for position in range(self.slot_count):
+            yield self.slot(position)[0]
+
+    def __len__(self):
+        return self.slot_count
+
+    def __repr__(self):
+        return f"CompiledSchedule({self.timetable_name!r}, v{self.version}, {len(self)} слотов)"
+
+    def to_snapshot(self):
+        # Импорт здесь: чтение файла не тянет sqlite3 (важно для timeanchor_cli)
+        from schedule_snapshot import ScheduleSnapshot
+        slots = [self.slot(position) for position in range(self.slot_count)]
+        durations = {slots[position][0]: self.duration(position) for position in range(self.slot_count)}
+        return ScheduleSnapshot(self.timetable_name, slots, durations=durations,
+                                content_version=self.content_version)
+
+    def with_edit(self, edit):
+        return self.to_snapshot().with_edit(edit)
+
+
+def load_compiled(path, db_path, timetable_name):
+    """Скомпилированное расписание, если файл свежий и для нужного расписания, иначе None"""
+    try:
+        compiled = CompiledSchedule.open(path)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, struct.error) as e:
+        print(f"Ошибка чтения скомпилированного расписания: {e}")
+        return None
+    if compiled.timetable_name != timetable_name:
+        return None
+    stamp = source_stamp(db_path)
+    if stamp is not None and stamp == compiled.stamp:
+        return compiled
+    if stamp is None or content_version(db_path, timetable_name) != compiled.content_version:
+        return None
+    # Версия совпала: следующая проверка до записи в БД обойдется без SQLite
+    compiled.restamp(path, stamp)
+    return compiled
+
+
+def benchmark(slots=1440):
+    """Время до первого ответа "что сейчас": SQLite против файла"""
+    import sqlite3
+    import tempfile
+    import time
+
+    from migrations import migrate
+    from schedule_snapshot import read_snapshot
+
+    folder = tempfile.mkdtemp()
+    db_path = os.path.join(folder, "timetable.db")
+    compiled_path = os.path.join(folder, "schedule.bin")
+    conn = sqlite3.connect(db_path)
+    migrate(conn)
+    conn.executemany("INSERT INTO timetable (time, task, color, timetable_name) VALUES (?, ?, ?, ?)",
+                     [(f"{m // 60:02d}:{m % 60:02d}", f"Задача {m % 37}", "#3498db", "Основное")
+                      for m in range(0, MINUTES_PER_DAY, max(1, MINUTES_PER_DAY // slots))])
+    conn.commit()
+    conn.close()
+
+    start = time.perf_counter()
+    snapshot = read_snapshot(db_path, "Основное")
+    from_db = time.perf_counter() - start
+
+    write_compiled(compiled_path, snapshot, db_path)
+    start = time.perf_counter()
+    compiled = load_compiled(compiled_path, db_path, "Основное")
+    current = compiled.slot(compiled.slot_at(600))
+    from_file = time.perf_counter() - start
+
+    expected = max(time_str for time_str in snapshot if time_to_minute(time_str) <= 600)
+    assert current == (expected, snapshot[expected])
+    assert dict(compiled) == dict(snapshot)
+    print(f"Слотов: {len(snapshot)}, файл: {os.path.getsize(compiled_path)} байт")
+    print(f"SQLite: {from_db * 1000:.2f} мс, mmap: {from_file * 1000:.3f} мс")
+    return from_db, from_file
+
+
+if __name__ == "__main__":
+    benchmark()
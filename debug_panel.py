@@ -0,0 +1,145 @@
+# debug_panel.py
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QPlainTextEdit, QFileDialog, QMessageBox
+)
+from PyQt5.QtCore import QTimer
+from PyQt5.QtGui import QFont
+
+
+def format_ms(value):
+    return "—" if value is None else f"{value:.0f} мс"
+
+
+class LatencyPanel(QDialog):
+    """Отладочная панель задержек уведомлений"""
+
+    def __init__(self, recorder, default_dump_path, parent=None):
+        super().__init__(parent)
+        self.recorder = recorder
+        self.default_dump_path = default_dump_path
+        self.setWindowTitle("Задержки уведомлений")
+        self.resize(560, 480)
+
+        layout = QVBoxLayout(self)
+        self.text = QPlainTextEdit()
+        self.text.setReadOnly(True)
+        self.text.setFont(QFont("Consolas", 9))
+        layout.addWidget(self.text)
+
+        buttons = QHBoxLayout()
+        refresh_btn = QPushButton("Обновить")
+        refresh_btn.clicked.connect(self.refresh)
+        dump_btn = QPushButton("Сохранить JSON...")
+        dump_btn.clicked.connect(self.dump_json)
+        close_btn = QPushButton("Закрыть")
+        close_btn.clicked.connect(self.close)
+        buttons.addWidget(refresh_btn)
+        buttons.addWidget(dump_btn)
+        buttons.addStretch()
+        buttons.addWidget(close_btn)
+        layout.addLayout(buttons)
+
+        # Автообновление, пока панель открыта
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.refresh_timer.start(5000)
+
+        self.refresh()
+
+    def refresh(self):
+        summary = self.recorder.summary()
+        titles = {"all": "Все", "before": "Напоминание", "now": "Начало"}
+        metric_titles = {"shown": "показ окна", "sound_started": "начало звука"}
+        lines = []
+        for key, metrics in summary.items():
+            lines.append(f"== {titles[key]} ==")
+            for metric, stats in metrics.items():
+                lines.append(
+                    f"  {metric_titles[metric]:<14} n={stats['count']:<5} "
+                    f"p50={format_ms(stats['p50']):<10} p99={format_ms(stats['p99']):<10} "
+                    f"max={format_ms(stats['max'])}")
+                peak = max(stats["histogram"].values()) or 1
+                for label, count in stats["histogram"].items():
+                    if count:
+                        bar = "█" * max(1, count * 30 // peak)
+                        lines.append(f"    {label:>8} мс | {bar} {count}")
+            lines.append("")
+        self.text.setPlainText("\n".join(lines))
+
+    def dump_json(self):
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Сохранить задержки", str(self.default_dump_path), "JSON (*.json)")
+        if path:
+            try:
+                self.recorder.dump_json(path)
+            except Exception as e:
+                QMessageBox.warning(self, "Ошибка", f"Ошибка сохранения: {str(e)}")
+
+
+class AuditPanel(QDialog):
+    """Отладочная панель аудита памяти"""
+
+    def __init__(self, auditor, default_dump_path, parent=None):
+        super().__init__(parent)
+        self.auditor = auditor
+        self.default_dump_path = default_dump_path
+        self.setWindowTitle("Аудит памяти")
+        self.resize(640, 520)
+
+        layout = QVBoxLayout(self)
+        self.text = QPlainTextEdit()
+        self.text.setReadOnly(True)
+        self.text.setFont(QFont("Consolas", 9))
+        layout.addWidget(self.text)
+
+        buttons = QHBoxLayout()
+        sample_btn = QPushButton("Снимок сейчас")
+        sample_btn.clicked.connect(self.take_sample)
+        dump_btn = QPushButton("Сохранить JSON...")
+        dump_btn.clicked.connect(self.dump_json)
+        close_btn = QPushButton("Закрыть")
+        close_btn.clicked.connect(self.close)
+        buttons.addWidget(sample_btn)
+        buttons.addWidget(dump_btn)
+        buttons.addStretch()
+        buttons.addWidget(close_btn)
+        layout.addLayout(buttons)
+
+        self.refresh()
+
+    def take_sample(self):
+        self.auditor.sample("manual")
+        self.refresh()
+
+    def refresh(self):
+        report = self.auditor.report()
+        lines = [f"Снимков: {report['samples']}"]
+        latest = report["latest"]
+        if latest:
+            lines.append(f"RSS: {latest['rss'] / 1e6:.1f} MB, Python: {latest['python_heap'] / 1e6:.2f} MB")
+            lines.append("")
+            lines.append("Живые QObject:")
+            for name, count in sorted(latest["qobjects"].items(), key=lambda x: -x[1])[:25]:
+                lines.append(f"  {name:<30} {count}")
+
+        lines.append("")
+        if report["growing"]:
+            lines.append("Монотонный рост:")
+            for item in report["growing"]:
+                lines.append(f"  {item['series']}: {item['from']} -> {item['to']}")
+        else:
+            lines.append("Монотонного роста не обнаружено")
+
+        lines.append("")
+        lines.append("Прирост памяти по строкам кода:")
+        lines.extend(f"  {line}" for line in report["top_allocations"])
+        self.text.setPlainText("\n".join(lines))
+
+    def dump_json(self):
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Сохранить отчет", str(self.default_dump_path), "JSON (*.json)")
+        if path:
+            try:
+                self.auditor.dump_json(path)
+            except Exception as e:
+                QMessageBox.warning(self, "Ошибка", f"Ошибка сохранения: {str(e)}")
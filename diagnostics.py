@@ -0,0 +1,175 @@
+# diagnostics.py
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import Counter, deque
+
+
+AUDIT_ENV = "TIMEANCHOR_AUDIT"
+
+
+def rss_bytes():
+    """Текущий размер резидентной памяти процесса (0, если узнать нельзя)"""
+    try:
+        if sys.platform == "win32":
+            import ctypes
+            from ctypes import wintypes
+
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [
+                    ("cb", wintypes.DWORD),
+                    ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t),
+                    ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t),
+                    ("PeakPagefileUsage", ctypes.c_size_t),
+                ]
+
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(counters)
+            handle = ctypes.windll.kernel32.GetCurrentProcess()
+            if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+                return counters.WorkingSetSize
+            return 0
+
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        try:
+            import resource
+            # ru_maxrss — пик, а не текущее значение, но лучше, чем ничего
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return peak if sys.platform == "darwin" else peak * 1024
+        except Exception:
+            return 0
+
+
+def count_qobjects():
+    """Количество живых QObject по классам.
+
+    Виджеты берутся из QApplication.allWidgets() (включая созданные без
+    Python-ссылок), остальные QObject — по Python-обёрткам через gc.
+    """
+    from PyQt5.QtCore import QObject
+    from PyQt5.QtWidgets import QApplication, QWidget
+
+    counts = Counter()
+    for widget in QApplication.allWidgets():
+        counts[type(widget).__name__] += 1
+    for obj in gc.get_objects():
+        try:
+            if isinstance(obj, QObject) and not isinstance(obj, QWidget):
+                counts[type(obj).__name__] += 1
+        except ReferenceError:
+            continue
+    return counts
+
+
+def is_monotonic_growth(values, min_increase):
+    """Ряд ни разу не уменьшился и вырос не меньше чем на min_increase"""
+    if len(values) < 2:
+        return False
+    if any(b < a for a, b in zip(values, values[1:])):
+        return False
+    return values[-1] - values[0] >= min_increase
+
+
+class LeakAuditor:
+    """Периодические снимки памяти и числа QObject для долгих сессий.
+
+    Каждый sample() запоминает RSS, объем памяти Python (tracemalloc) и
+    число живых объектов по классам. report() помечает ряды, которые
+    монотонно растут на последних window снимках.
+    """
+
+    def __init__(self, window=10, max_samples=2000, object_threshold=20,
+                 memory_threshold=5 * 1024 * 1024, qobject_counter=count_qobjects):
+        self.window = window
+        self.object_threshold = object_threshold
+        self.memory_threshold = memory_threshold
+        self.qobject_counter = qobject_counter
+        self.samples = deque(maxlen=max_samples)
+        self.baseline_snapshot = None
+        self.timer = None
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+        self.baseline_snapshot = tracemalloc.take_snapshot()
+
+    def start(self, parent=None, interval_ms=60000):
+        """Запускает периодические снимки через QTimer"""
+        from PyQt5.QtCore import QTimer
+
+        self.timer = QTimer(parent)
+        self.timer.timeout.connect(self.sample)
+        self.timer.start(interval_ms)
+        self.sample()
+
+    def stop(self):
+        if self.timer:
+            self.timer.stop()
+
+    def sample(self, label=None):
+        gc.collect()
+        traced_current, _ = tracemalloc.get_traced_memory()
+        sample = {
+            "time": time.time(),
+            "label": label,
+            "rss": rss_bytes(),
+            "python_heap": traced_current,
+            "qobjects": dict(self.qobject_counter()),
+        }
+        self.samples.append(sample)
+        return sample
+
+    def growing_series(self):
+        """Список (имя, начало, конец) рядов с монотонным ростом"""
+        recent = list(self.samples)[-self.window:]
+        if len(recent) < self.window:
+            return []
+
+        flagged = []
+        for key in ("rss", "python_heap"):
+            values = [s[key] for s in recent]
+            if is_monotonic_growth(values, self.memory_threshold):
+                flagged.append((key, values[0], values[-1]))
+
+        class_names = set()
+        for s in recent:
+            class_names.update(s["qobjects"])
+        for name in sorted(class_names):
+            values = [s["qobjects"].get(name, 0) for s in recent]
+            if is_monotonic_growth(values, self.object_threshold):
+                flagged.append((f"QObject:{name}", values[0], values[-1]))
+        return flagged
+
+    def top_allocations(self, limit=10):
+        """Места с наибольшим приростом памяти с начала аудита"""
+        snapshot = tracemalloc.take_snapshot()
+        stats = snapshot.compare_to(self.baseline_snapshot, "lineno")
+        return [str(stat) for stat in stats[:limit]]
+
+    def report(self):
+        latest = self.samples[-1] if self.samples else None
+        return {
+            "samples": len(self.samples),
+            "latest": latest,
+            "growing": [
+                {"series": name, "from": start, "to": end}
+                for name, start, end in self.growing_series()
+            ],
+            "top_allocations": self.top_allocations(),
+        }
+
+    def dump_json(self, path):
+        data = self.report()
+        data["history"] = list(self.samples)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
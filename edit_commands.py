@@ -0,0 +1,150 @@
+# edit_commands.py
+
+# Наибольшая длительность слота в минутах (как у поля в редакторе)
+MAX_DURATION = 1440
+
+
+def check_duration(duration):
+    """Длительность слота: None или целое от 1 до MAX_DURATION минут.
+    Иначе ValueError — в БД не должно попасть то, что не читается в
+    CompactTimetable (array('H'))"""
+    if duration is None:
+        return None
+    if isinstance(duration, bool) or not isinstance(duration, int) or not 1 <= duration <= MAX_DURATION:
+        raise ValueError(f"Длительность должна быть от 1 до {MAX_DURATION} минут, а не {duration!r}")
+    return duration
+
+
+class SlotEdit:
+    """Изменение одной строки расписания.
+
+    old_* описывают строку до изменения, new_* — после. Добавление
+    задается пустыми old_*, удаление — пустыми new_*. Длительность в
+    минутах; None — слот длится до начала следующего. Новая длительность
+    проверяется (check_duration) при создании правки.
+    """
+
+    __slots__ = ("timetable_name", "old_time", "old_data", "new_time", "new_data",
+                 "old_duration", "new_duration")
+
+    def __init__(self, timetable_name, old_time=None, old_data=None, new_time=None, new_data=None,
+                 old_duration=None, new_duration=None):
+        self.timetable_name = timetable_name
+        self.old_time = old_time
+        self.old_data = old_data
+        self.new_time = new_time
+        self.new_data = new_data
+        self.old_duration = old_duration
+        self.new_duration = check_duration(new_duration)
+
+    @classmethod
+    def add(cls, timetable_name, time_str, task, color, duration=None):
+        return cls(timetable_name, new_time=time_str, new_data=(task, color), new_duration=duration)
+
+    @classmethod
+    def remove(cls, timetable_name, time_str, data, duration=None):
+        return cls(timetable_name, old_time=time_str, old_data=data, old_duration=duration)
+
+    @classmethod
+    def update(cls, timetable_name, old_time, old_data, new_time, new_data, old_duration=None, new_duration=None):
+        return cls(timetable_name, old_time, old_data, new_time, new_data, old_duration, new_duration)
+
+    def inverted(self):
+        """Обратная операция для отмены"""
+        return SlotEdit(self.timetable_name, self.new_time, self.new_data, self.old_time, self.old_data,
+                        self.new_duration, self.old_duration)
+
+    def is_noop(self):
+        return (self.old_time == self.new_time and self.old_data == self.new_data
+                and self.old_duration == self.new_duration)
+
+    def sql(self):
+        """Возвращает один SQL-запрос, сохраняющий изменение"""
+        if self.old_time is None:
+            task, color = self.new_data
+            return ("INSERT INTO timetable (time, task, color, duration, timetable_name) VALUES (?, ?, ?, ?, ?)",
+                    (self.new_time, task, color, self.new_duration, self.timetable_name))
+        if self.new_time is None:
+            return ("DELETE FROM timetable WHERE time = ? AND timetable_name = ?",
+                    (self.old_time, self.timetable_name))
+        task, color = self.new_data
+        return ("UPDATE timetable SET time = ?, task = ?, color = ?, duration = ? "
+                "WHERE time = ? AND timetable_name = ?",
+                (self.new_time, task, color, self.new_duration, self.old_time, self.timetable_name))
+
+    def __repr__(self):
+        return (f"SlotEdit({self.timetable_name!r}, {self.old_time!r}, {self.old_data!r}, "
+                f"{self.new_time!r}, {self.new_data!r})")
+
+
+class EditLog:
+    """Журнал изменений с отменой и повтором.
+
+    Каждое изменение передается в apply_edit ровно один раз; отмена
+    применяет обратное изменение той же функцией.
+    """
+
+    def __init__(self, apply_edit, limit=500):
+        self.apply_edit = apply_edit
+        self.limit = limit
+        self.undo_stack = []
+        self.redo_stack = []
+
+    def push(self, edit):
+        """Выполняет новое изменение и записывает его в журнал"""
+        if edit.is_noop():
+            return
+        self.apply_edit(edit)
+        self.undo_stack.append(edit)
+        if len(self.undo_stack) > self.limit:
+            del self.undo_stack[0]
+        self.redo_stack.clear()
+
+    def can_undo(self):
+        return bool(self.undo_stack)
+
+    def can_redo(self):
+        return bool(self.redo_stack)
+
+    def undo(self):
+        if not self.undo_stack:
+            return None
+        edit = self.undo_stack.pop()
+        self.apply_edit(edit.inverted())
+        self.redo_stack.append(edit)
+        return edit
+
+    def redo(self):
+        if not self.redo_stack:
+            return None
+        edit = self.redo_stack.pop()
+        self.apply_edit(edit)
+        self.undo_stack.append(edit)
+        return edit
+
+    def clear(self):
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+
+
+def selftest():
+    """Длительность вне 1..MAX_DURATION отвергается при создании правки —
+    и у add, и у update; None (до следующего слота) допустим"""
+    for duration in (None, 1, 90, MAX_DURATION):
+        assert SlotEdit.add("Основное", "10:00", "Почта", "#FFFFFF", duration).new_duration == duration
+    for duration in (-5, 0, MAX_DURATION + 1, 65536, 1.5, "30", True):
+        for make in (lambda d: SlotEdit.add("Основное", "10:00", "Почта", "#FFFFFF", d),
+                     lambda d: SlotEdit.update("Основное", "10:00", ("Почта", None), "10:00", ("Почта", None),
+                                               None, d)):
+            try:
+                make(duration)
+            except ValueError:
+                continue
+            raise AssertionError(f"длительность {duration!r} принята")
+    # Старая длительность не проверяется: слот, записанный до проверки, можно удалить
+    assert SlotEdit.remove("Основное", "10:00", ("Почта", None), 5000).old_duration == 5000
+    print("Проверка длительности слотов — ок")
+
+
+if __name__ == "__main__":
+    selftest()
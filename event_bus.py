@@ -0,0 +1,92 @@
+# event_bus.py
+import time
+
+
+class SlotChanged:
+    """Изменилась одна строка расписания (edit — SlotEdit)"""
+
+    __slots__ = ("edit",)
+
+    def __init__(self, edit):
+        self.edit = edit
+
+
+class TimetableSwitched:
+    """Сменилось активное расписание"""
+
+    __slots__ = ("name",)
+
+    def __init__(self, name):
+        self.name = name
+
+
+class SettingsChanged:
+    """Изменились настройки (changes — словарь только измененных ключей)"""
+
+    __slots__ = ("changes",)
+
+    def __init__(self, changes):
+        self.changes = changes
+
+
+class EventBus:
+    """Внутрипроцессная шина событий.
+
+    Подписчики регистрируются на тип события. Список подписчиков хранится
+    кортежем и заменяется целиком при подписке, поэтому publish перебирает
+    его без копирования и блокировок.
+    """
+
+    def __init__(self):
+        self._subscribers = {}
+
+    def subscribe(self, event_type, handler):
+        self._subscribers[event_type] = self._subscribers.get(event_type, ()) + (handler,)
+        return handler
+
+    def unsubscribe(self, event_type, handler):
+        handlers = self._subscribers.get(event_type, ())
+        self._subscribers[event_type] = tuple(h for h in handlers if h != handler)
+
+    def publish(self, event):
+        for handler in self._subscribers.get(type(event), ()):
+            try:
+                handler(event)
+            except Exception as e:
+                print(f"Ошибка обработчика {type(event).__name__}: {e}")
+
+    def subscriber_count(self, event_type):
+        return len(self._subscribers.get(event_type, ()))
+
+
+def benchmark(subscriber_counts=(1, 10, 100, 1000, 10000), publishes=2000):
+    """Замеряет стоимость рассылки одного события в зависимости от числа подписчиков"""
+    results = []
+    for count in subscriber_counts:
+        bus = EventBus()
+        received = [0]
+
+        def handler(event):
+            received[0] += 1
+
+        for _ in range(count):
+            bus.subscribe(SlotChanged, handler)
+        # Подписчики другого типа не должны влиять на стоимость
+        bus.subscribe(SettingsChanged, handler)
+
+        event = SlotChanged(None)
+        rounds = max(1, publishes // count)
+        start = time.perf_counter_ns()
+        for _ in range(rounds):
+            bus.publish(event)
+        elapsed = time.perf_counter_ns() - start
+
+        per_publish = elapsed / rounds
+        results.append((count, per_publish, per_publish / count))
+    return results
+
+
+if __name__ == "__main__":
+    print(f"{'подписчиков':>12} {'мкс/событие':>14} {'нс/подписчик':>14}")
+    for count, per_publish, per_handler in benchmark():
+        print(f"{count:>12} {per_publish / 1000:>14.2f} {per_handler:>14.1f}")
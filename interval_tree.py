@@ -0,0 +1,196 @@
+# interval_tree.py
+import random
+from bisect import bisect_left, bisect_right
+
+from compact_timetable import MINUTES_PER_DAY, minutes_to_time
+
+
+class _Node:
+    __slots__ = ("start", "end", "key", "priority", "left", "right", "max_end")
+
+    def __init__(self, start, end, key):
+        self.start = start
+        self.end = end
+        self.key = key
+        self.priority = random.random()
+        self.left = None
+        self.right = None
+        self.max_end = end
+
+
+def _update(node):
+    node.max_end = max(node.end,
+                       node.left.max_end if node.left else node.end,
+                       node.right.max_end if node.right else node.end)
+
+
+def _split(node, order):
+    """Делит дерево на (< order, >= order) по (start, key)"""
+    if node is None:
+        return None, None
+    if (node.start, node.key) < order:
+        left, right = _split(node.right, order)
+        node.right = left
+        _update(node)
+        return node, right
+    left, right = _split(node.left, order)
+    node.left = right
+    _update(node)
+    return left, node
+
+
+def _merge(left, right):
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        _update(left)
+        return left
+    right.left = _merge(left, right.left)
+    _update(right)
+    return right
+
+
+class IntervalTree:
+    """Полуоткрытые интервалы [start, end) с ключом.
+
+    Декартово дерево по (start, key), в каждом узле — максимум концов
+    поддерева. Вставка и удаление за O(log n), поиск интервалов,
+    содержащих точку или пересекающих отрезок, — O(log n + k): поддерево
+    пропускается, если его max_end не дотягивается до запроса.
+    """
+
+    def __init__(self, intervals=()):
+        self.root = None
+        self.size = 0
+        for start, end, key in intervals:
+            self.add(start, end, key)
+
+    def __len__(self):
+        return self.size
+
+    def add(self, start, end, key):
+        left, right = _split(self.root, (start, key))
+        self.root = _merge(_merge(left, _Node(start, end, key)), right)
+        self.size += 1
+
+    def remove(self, start, key):
+        """Удаляет интервал по началу и ключу; возвращает True, если он был"""
+        left, rest = _split(self.root, (start, key))
+        middle, right = _split(rest, (start, key, 1))  # (start, key) < (start, key, 1)
+        self.root = _merge(left, right)
+        if middle is None:
+            return False
+        self.size -= 1
+        return True
+
+    def overlapping(self, start, end):
+        """Интервалы (start, end, key), пересекающие [start, end)"""
+        found = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node is None or node.max_end <= start:
+                continue
+            stack.append(node.left)
+            if node.start < end:
+                if node.end > start:
+                    found.append((node.start, node.end, node.key))
+                stack.append(node.right)
+        return found
+
+    def at(self, point):
+        """Интервалы, содержащие точку"""
+        return self.overlapping(point, point + 1)
+
+    def __iter__(self):
+        stack = []
+        node = self.root
+        while stack or node:
+            while node:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.start, node.end, node.key
+            node = node.right
+
+
+class SlotIntervals:
+    """Интервалы слотов одного расписания и пересечения между ними.
+
+    Слот без длительности длится до начала следующего и поэтому ни с чем
+    не пересекается сам. Пересечение возникает, только если слот с явной
+    длительностью накрывает начало другого слота. В дереве лежат только
+    явные интервалы (переходящие через полночь — двумя частями), а начала
+    всех слотов — в отсортированном списке.
+    """
+
+    def __init__(self, slots=()):
+        self.starts = []
+        self.durations = {}
+        self.tree = IntervalTree()
+        for minute, duration in slots:
+            self.add(minute, duration)
+
+    @staticmethod
+    def pieces(minute, duration):
+        end = minute + duration
+        if end <= MINUTES_PER_DAY:
+            return [(minute, end)]
+        return [(minute, MINUTES_PER_DAY), (0, end - MINUTES_PER_DAY)]
+
+    def add(self, minute, duration=None):
+        self.starts.insert(bisect_left(self.starts, minute), minute)
+        if duration:
+            self.durations[minute] = duration
+            for start, end in self.pieces(minute, duration):
+                self.tree.add(start, end, minute)
+
+    def remove(self, minute):
+        position = bisect_left(self.starts, minute)
+        if position < len(self.starts) and self.starts[position] == minute:
+            del self.starts[position]
+        duration = self.durations.pop(minute, None)
+        if duration:
+            for start, _ in self.pieces(minute, duration):
+                self.tree.remove(start, minute)
+
+    def covered_starts(self, minute):
+        """Начала других слотов внутри явного интервала слота"""
+        duration = self.durations.get(minute)
+        if not duration:
+            return []
+        covered = []
+        for start, end in self.pieces(minute, duration):
+            low = bisect_right(self.starts, start) if start == minute else bisect_left(self.starts, start)
+            covered.extend(self.starts[low:bisect_left(self.starts, end)])
+        return [start for start in covered if start != minute]
+
+    def covering(self, minute):
+        """Слоты, чьи явные интервалы накрывают начало слота minute"""
+        return [key for _, _, key in self.tree.at(minute) if key != minute]
+
+    def conflicts_of(self, minute):
+        """Все слоты, пересекающиеся со слотом minute"""
+        return sorted(set(self.covered_starts(minute)) | set(self.covering(minute)))
+
+    def conflicts(self):
+        """Пары пересекающихся слотов (начало накрывающего, начало накрытого)"""
+        return [(minute, other) for minute in sorted(self.durations)
+                for other in self.covered_starts(minute)]
+
+    def active_at(self, minute):
+        """Начала слотов, идущих в минуту дня: последний начавшийся без
+        длительности и все явные интервалы, содержащие минуту"""
+        active = set(key for _, _, key in self.tree.at(minute % MINUTES_PER_DAY))
+        if self.starts:
+            last = self.starts[(bisect_right(self.starts, minute % MINUTES_PER_DAY) - 1) % len(self.starts)]
+            if not self.durations.get(last):
+                active.add(last)
+        return sorted(active)
+
+    def describe(self, minute):
+        """Текст для подсказки: с какими слотами пересекается"""
+        return ", ".join(minutes_to_time(other) for other in self.conflicts_of(minute))
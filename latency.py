@@ -0,0 +1,114 @@
+# latency.py
+import json
+import math
+import time
+from collections import deque
+
+
+# Границы корзин гистограммы, мс
+HISTOGRAM_BOUNDS = (50, 100, 250, 500, 1000, 2000, 5000, 10000, 30000, 60000)
+
+METRICS = ("shown", "sound_started")
+
+
+class AlertTiming:
+    """Временные метки одного уведомления (секунды epoch)"""
+
+    __slots__ = ("notif_type", "task", "scheduled", "fired", "shown", "sound_started")
+
+    def __init__(self, notif_type, task, scheduled, fired):
+        self.notif_type = notif_type
+        self.task = task
+        self.scheduled = scheduled
+        self.fired = fired
+        self.shown = None
+        self.sound_started = None
+
+    def latency_ms(self, metric):
+        """Задержка метки относительно планового времени, мс"""
+        value = getattr(self, metric)
+        if value is None or self.scheduled is None:
+            return None
+        return (value - self.scheduled) * 1000
+
+    def to_dict(self):
+        return {
+            "type": self.notif_type,
+            "task": self.task,
+            "scheduled": self.scheduled,
+            "fired": self.fired,
+            "shown": self.shown,
+            "sound_started": self.sound_started,
+            "shown_latency_ms": self.latency_ms("shown"),
+            "sound_latency_ms": self.latency_ms("sound_started"),
+        }
+
+
+def percentile(values, fraction):
+    """Перцентиль по отсортированному списку (ближайший ранг)"""
+    if not values:
+        return None
+    index = min(len(values) - 1, max(0, math.ceil(fraction * len(values)) - 1))
+    return values[index]
+
+
+class LatencyRecorder:
+    """Хранит задержки последних уведомлений и считает по ним статистику"""
+
+    def __init__(self, max_records=1000):
+        self.records = deque(maxlen=max_records)
+
+    def start(self, notif_type, task, scheduled):
+        """Создает запись в момент решения показать уведомление"""
+        record = AlertTiming(notif_type, task, scheduled, time.time())
+        self.records.append(record)
+        return record
+
+    def mark(self, record, metric):
+        if record is not None and getattr(record, metric) is None:
+            setattr(record, metric, time.time())
+
+    def latencies(self, metric, notif_type=None):
+        values = [
+            r.latency_ms(metric) for r in self.records
+            if notif_type is None or r.notif_type == notif_type
+        ]
+        return sorted(v for v in values if v is not None)
+
+    def summary(self):
+        """p50/p99/max и гистограмма по каждому типу и метрике"""
+        result = {}
+        for notif_type in (None, "before", "now"):
+            key = notif_type or "all"
+            result[key] = {}
+            for metric in METRICS:
+                values = self.latencies(metric, notif_type)
+                result[key][metric] = {
+                    "count": len(values),
+                    "p50": percentile(values, 0.50),
+                    "p99": percentile(values, 0.99),
+                    "max": values[-1] if values else None,
+                    "histogram": histogram(values),
+                }
+        return result
+
+    def dump_json(self, path):
+        data = {
+            "generated": time.time(),
+            "summary": self.summary(),
+            "records": [r.to_dict() for r in self.records],
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def histogram(values):
+    """Количество отсортированных значений в корзинах HISTOGRAM_BOUNDS"""
+    counts = [0] * (len(HISTOGRAM_BOUNDS) + 1)
+    bound_index = 0
+    for value in values:
+        while bound_index < len(HISTOGRAM_BOUNDS) and value > HISTOGRAM_BOUNDS[bound_index]:
+            bound_index += 1
+        counts[bound_index] += 1
+    labels = [f"<={b}" for b in HISTOGRAM_BOUNDS] + [f">{HISTOGRAM_BOUNDS[-1]}"]
+    return dict(zip(labels, counts))
@@ -0,0 +1,205 @@
+# migrations.py
+"""Версии схемы timetable.db.
+
+Номер версии хранится в PRAGMA user_version. Каждая миграция выполняется
+в своей транзакции вместе с записью нового номера, поэтому база всегда
+оказывается либо в старой, либо в новой версии. Базы, созданные до
+появления версий (user_version = 0), проходят все миграции: первые две
+написаны так, чтобы не ломаться на уже существующих таблице и столбце.
+
+Новая миграция — функция (conn) в конце MIGRATIONS; старые не меняются.
+executescript в миграциях не используется: он фиксирует транзакцию.
+"""
+import sqlite3
+
+
+def create_timetable(conn):
+    conn.execute('''CREATE TABLE IF NOT EXISTS timetable (
+                        id INTEGER PRIMARY KEY,
+                        time TEXT NOT NULL,
+                        task TEXT,
+                        color TEXT,
+                        timetable_name TEXT,
+                        UNIQUE(time, timetable_name))''')
+
+
+def add_duration(conn):
+    """Длительность слота в минутах, NULL — до следующего слота"""
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(timetable)")]
+    if "duration" not in columns:
+        conn.execute("ALTER TABLE timetable ADD COLUMN duration INTEGER")
+
+
+def index_by_timetable(conn):
+    """Чтение одного расписания (WHERE timetable_name = ? ORDER BY time) без
+    полного просмотра: индекс UNIQUE(time, timetable_name) начинается со времени"""
+    conn.execute("CREATE INDEX IF NOT EXISTS timetable_by_name ON timetable (timetable_name, time)")
+
+
+def version_timetables(conn):
+    """Счетчик изменений каждого расписания: по нему скомпилированный файл
+    (schedule.bin) проверяет, что собран из текущего содержимого"""
+    conn.execute('''CREATE TABLE IF NOT EXISTS timetable_version (
+                        timetable_name TEXT PRIMARY KEY,
+                        version INTEGER NOT NULL)''')
+    bump = '''INSERT INTO timetable_version (timetable_name, version) VALUES ({}.timetable_name, 1)
+              ON CONFLICT (timetable_name) DO UPDATE SET version = version + 1;'''
+    for event, rows in (("INSERT", ("new",)), ("DELETE", ("old",)), ("UPDATE", ("old", "new"))):
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS timetable_version_{event.lower()} "
+                     f"AFTER {event} ON timetable BEGIN {' '.join(bump.format(row) for row in rows)} END")
+
+
+def create_search_index(conn):
+    """Полнотекстовый индекс FTS5 (search_index.py): строки расписаний
+    попадают в него триггерами, строки файлов — через search_files.
+    Без FTS5 в сборке SQLite создается только search_files; отсутствие
+    таблицы search_index и означает, что индекса нет — его создаст
+    SearchIndex (тем же вызовом), когда SQLite будет с FTS5"""
+    conn.execute('''CREATE TABLE IF NOT EXISTS search_files (
+                        path TEXT PRIMARY KEY,
+                        mtime_ns INTEGER NOT NULL,
+                        size INTEGER NOT NULL) WITHOUT ROWID''')
+    if not conn.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')").fetchone()[0]:
+        return
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'search_index'").fetchone() is not None
+    conn.execute('''CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+                        source UNINDEXED, location UNINDEXED, detail UNINDEXED, text,
+                        tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')''')
+    index_row = '''INSERT INTO search_index (rowid, source, location, detail, text)
+                   VALUES (new.id, 'timetable', new.timetable_name, new.time, new.task);'''
+    conn.execute(f'''CREATE TRIGGER IF NOT EXISTS timetable_search_insert AFTER INSERT ON timetable BEGIN
+                         {index_row}
+                     END''')
+    conn.execute('''CREATE TRIGGER IF NOT EXISTS timetable_search_delete AFTER DELETE ON timetable BEGIN
+                        DELETE FROM search_index WHERE rowid = old.id;
+                    END''')
+    conn.execute(f'''CREATE TRIGGER IF NOT EXISTS timetable_search_update
+                     AFTER UPDATE OF time, task, timetable_name ON timetable BEGIN
+                         DELETE FROM search_index WHERE rowid = old.id;
+                         {index_row}
+                     END''')
+    if not exists:
+        conn.execute("INSERT INTO search_index (rowid, source, location, detail, text) "
+                     "SELECT id, 'timetable', timetable_name, time, task FROM timetable")
+
+
+def _sync_log_row(row, deleted):
+    """Тело триггера: следующие часы узла и запись строки new.*/old.* в sync_log"""
+    values = (f"{row}.timetable_name, {row}.time, " +
+              ("NULL, NULL, NULL" if deleted else f"{row}.task, {row}.color, {row}.duration"))
+    return f'''UPDATE sync_state SET clock = clock + 1;
+               INSERT INTO sync_log (timetable_name, time, task, color, duration, deleted, clock, node)
+               SELECT {values}, {int(deleted)}, clock, node FROM sync_state;'''
+
+
+def create_sync_log(conn):
+    """Журнал изменений для синхронизации (sync.py). Триггеры пишут в него,
+    только когда у базы есть строка sync_state — ее создает первый запуск
+    синхронизации; без нее (SELECT applying ...) дает NULL и триггеры молчат"""
+    conn.execute('''CREATE TABLE IF NOT EXISTS sync_state (
+                        id INTEGER PRIMARY KEY CHECK (id = 1),
+                        node TEXT NOT NULL,
+                        clock INTEGER NOT NULL,
+                        applying INTEGER NOT NULL DEFAULT 0)''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS sync_log (
+                        seq INTEGER PRIMARY KEY,
+                        timetable_name TEXT NOT NULL,
+                        time TEXT NOT NULL,
+                        task TEXT,
+                        color TEXT,
+                        duration INTEGER,
+                        deleted INTEGER NOT NULL,
+                        clock INTEGER NOT NULL,
+                        node TEXT NOT NULL,
+                        UNIQUE(node, clock))''')
+    conn.execute("CREATE INDEX IF NOT EXISTS sync_log_key ON sync_log (timetable_name, time)")
+
+    applying = "WHEN (SELECT applying FROM sync_state) = 0"
+    conn.execute(f'''CREATE TRIGGER IF NOT EXISTS timetable_sync_insert AFTER INSERT ON timetable {applying} BEGIN
+                         {_sync_log_row("new", False)}
+                     END''')
+    conn.execute(f'''CREATE TRIGGER IF NOT EXISTS timetable_sync_delete AFTER DELETE ON timetable {applying} BEGIN
+                         {_sync_log_row("old", True)}
+                     END''')
+    conn.execute(f'''CREATE TRIGGER IF NOT EXISTS timetable_sync_move
+                     AFTER UPDATE OF time, timetable_name ON timetable
+                     {applying} AND (old.time != new.time OR old.timetable_name != new.timetable_name) BEGIN
+                         {_sync_log_row("old", True)}
+                     END''')
+    conn.execute(f'''CREATE TRIGGER IF NOT EXISTS timetable_sync_update
+                     AFTER UPDATE OF time, task, color, duration, timetable_name ON timetable {applying} BEGIN
+                         {_sync_log_row("new", False)}
+                     END''')
+
+
+def track_sync_clocks(conn):
+    """Наибольшие полученные часы каждого узла для вектора версий: сжатие
+    журнала удаляет и последние записи узла, MAX(clock) по sync_log тогда
+    уменьшается и собеседник присылает старые записи заново"""
+    conn.execute('''CREATE TABLE IF NOT EXISTS sync_clocks (
+                        node TEXT PRIMARY KEY,
+                        clock INTEGER NOT NULL) WITHOUT ROWID''')
+    conn.execute("INSERT OR IGNORE INTO sync_clocks (node, clock) "
+                 "SELECT node, MAX(clock) FROM sync_log GROUP BY node")
+
+
+# (версия после миграции, функция); версии идут подряд с 1
+MIGRATIONS = [
+    (1, create_timetable),
+    (2, add_duration),
+    (3, index_by_timetable),
+    (4, version_timetables),
+    (5, create_search_index),
+    (6, create_sync_log),
+    (7, track_sync_clocks),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    """Доводит схему до SCHEMA_VERSION; возвращает номера выполненных миграций"""
+    applied = []
+    if schema_version(conn) > SCHEMA_VERSION:
+        print(f"База новее приложения (схема {schema_version(conn)}, известна {SCHEMA_VERSION}), "
+              "миграции пропущены")
+        return applied
+    for version, migration in MIGRATIONS:
+        if schema_version(conn) >= version:
+            continue
+        # IMMEDIATE: второй процесс, запущенный одновременно, ждет здесь и
+        # после повторной проверки версии не выполняет миграцию еще раз
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if schema_version(conn) >= version:
+                conn.rollback()
+                continue
+            migration(conn)
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            print(f"Ошибка миграции схемы до версии {version} ({migration.__name__}): {e}")
+            raise
+        applied.append(version)
+    return applied
+
+
+def migrate_database(db_path):
+    conn = sqlite3.connect(str(db_path))
+    try:
+        return migrate(conn)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    import sys
+    from utils import get_db_path
+
+    path = sys.argv[1] if len(sys.argv) > 1 else get_db_path()
+    done = migrate_database(path)
+    print(f"{path}: схема {SCHEMA_VERSION}" + (f", выполнены миграции {done}" if done else ", изменений нет"))
@@ -3,12 +3,29 @@ import os
 import random
 from pathlib import Path
 from PyQt5.QtWidgets import QDialog, QVBoxLayout, QLabel, QApplication, QWidget
-from PyQt5.QtCore import Qt, QTimer, QPoint
-from PyQt5.QtGui import QPixmap, QFont, QColor, QPalette
+from PyQt5.QtCore import Qt, QTimer, QPoint, pyqtSignal
+from PyQt5.QtGui import QPixmap, QFont, QCursor
+
+from theme import theme_engine, compile_theme, set_style
+
+
+def read_notification_lines(text_file):
+    """Строки файла текстов уведомлений без кавычек и точек с запятой"""
+    if not text_file or not Path(text_file).is_file():
+        return []
+    try:
+        with open(text_file, 'r', encoding='utf-8') as f:
+            return [line.strip().strip('";') for line in f.readlines() if line.strip()]
+    except Exception as e:
+        print(f"Ошибка чтения текста: {e}")
+        return []
 
 
 class NotificationWindow(QDialog):
-    def __init__(self, text_file, duration, task_name, theme="dark"):
+    # Окно закрыто (до отложенного удаления, в отличие от destroyed)
+    closed = pyqtSignal()
+
+    def __init__(self, text_file, duration, task_name, theme="dark", text=None):
         super().__init__()
         # Настройка окна
         self.setWindowFlags(
@@ -17,7 +34,7 @@ class NotificationWindow(QDialog):
             Qt.ToolTip
         )
         self.setAttribute(Qt.WA_TranslucentBackground)
-        self.setStyleSheet("background: transparent;")
+        set_style(self, theme_engine.stylesheet("notification"))
 
         # Основной контейнер
         self.container = QWidget()
@@ -34,7 +51,7 @@ class NotificationWindow(QDialog):
         layout.setContentsMargins(20, 20, 20, 20)
 
         self.add_task_name(task_name, layout)
-        self.add_notification_text(text_file, layout)
+        self.add_notification_text(text_file, layout, text)
 
         # Главный лейаут окна
         main_layout = QVBoxLayout(self)
@@ -45,98 +62,69 @@ class NotificationWindow(QDialog):
         self.adjustSize()
         self.center_on_screen()
 
-        # Автозакрытие
-        QTimer.singleShot(duration * 1000, self.close)
-
-        self.init_ui(text_file, duration, task_name, theme)
-
-    def init_ui(self, text_file, duration, task_name, theme):
-        """Инициализация интерфейса без изображений"""
-        # Убираем загрузку изображений
-        layout = QVBoxLayout(self.container)
-        layout.setAlignment(Qt.AlignCenter)
-        layout.setSpacing(15)
-        layout.setContentsMargins(30, 30, 30, 30)  # Увеличиваем отступы
-
-        # Добавляем только текст
-        self.add_task_name(task_name, layout)
-        self.add_notification_text(text_file, layout)
+        # Автозакрытие; закрытое окно удаляется вместе с дочерними виджетами
+        self.setAttribute(Qt.WA_DeleteOnClose)
+        self.close_timer = QTimer(self)
+        self.close_timer.setSingleShot(True)
+        self.close_timer.timeout.connect(self.close)
+        self.close_timer.start(duration * 1000)
+
+    def set_content(self, task_name, text, duration):
+        """Показывает новое уведомление в этом же окне и продлевает его"""
+        self.task_label.setText(task_name)
+        self.text_label.setText(text)
+        self.adjustSize()
+        self.center_on_screen()
+        self.close_timer.start(duration * 1000)
 
     def apply_theme(self, theme):
-        """Применяет цветовую тему без изображений"""
-        if theme == "dark":
-            bg_color = QColor(20, 20, 20, 220)  # Более непрозрачный
-            text_color = "#FFFFFF"
-        else:
-            bg_color = QColor(240, 240, 240, 220)
-            text_color = "#333333"
-
-        # Устанавливаем цвета через палитру
-        palette = self.container.palette()
-        palette.setColor(QPalette.Window, bg_color)
-        self.container.setPalette(palette)
-        self.container.setAutoFillBackground(True)
+        """Применяет скомпилированную цветовую тему без изображений"""
+        current = theme_engine.current
+        self.compiled = compile_theme(theme, current.opacity, current.accent)
 
-        # Убираем границу и закругления
-        self.container.setStyleSheet("""
-            border-radius: 0;
-            border: none;
-        """)
+        # Палитра уже собрана в теме, остается только назначить её
+        self.container.setPalette(self.compiled.notification_palette)
+        self.container.setAutoFillBackground(True)
+        set_style(self.container, self.compiled.stylesheets["notification_container"])
 
-        self.text_color = text_color
+        self.text_color = self.compiled.text_color
 
     def add_task_name(self, task_name, layout):
         """Добавляет название задачи с улучшенным оформлением"""
-        task_label = QLabel(task_name)
-        task_label.setStyleSheet(f"""
-                    color: {self.text_color};
-                    font-weight: bold;
-                    font-size: 16px;
-                    padding: 10px;
-                    background-color: rgba(0, 0, 0, 50);
-                    border-radius: 5px;
-                """)
-        task_label.setAlignment(Qt.AlignCenter)
-        task_label.setFont(QFont("Arial", 12, QFont.Bold))
-        task_label.setWordWrap(True)
-        layout.addWidget(task_label)
-
-    def add_notification_text(self, text_file, layout):
-        """Добавляет текст уведомления с улучшенным оформлением"""
-        content = self.get_notification_text(text_file)
-        text_label = QLabel(content)
-        text_label.setStyleSheet(f"""
-            color: {self.text_color};
-            font-size: 14px;
-            padding: 15px;
-            background-color: rgba(0, 0, 0, 30);
-            border-radius: 5px;
-            line-height: 1.5;
-        """)
-        text_label.setAlignment(Qt.AlignCenter)
-        text_label.setWordWrap(True)
-        layout.addWidget(text_label)
+        self.task_label = QLabel(task_name)
+        set_style(self.task_label, self.compiled.stylesheets["notification_task"])
+        self.task_label.setAlignment(Qt.AlignCenter)
+        self.task_label.setFont(QFont("Arial", 12, QFont.Bold))
+        self.task_label.setWordWrap(True)
+        layout.addWidget(self.task_label)
+
+    def add_notification_text(self, text_file, layout, text=None):
+        """Добавляет текст уведомления (готовый или случайный из файла)"""
+        content = text if text is not None else self.get_notification_text(text_file)
+        self.text_label = QLabel(content)
+        set_style(self.text_label, self.compiled.stylesheets["notification_text"])
+        self.text_label.setAlignment(Qt.AlignCenter)
+        self.text_label.setWordWrap(True)
+        layout.addWidget(self.text_label)
 
     def get_notification_text(self, text_file):
         """Возвращает случайную строку из файла"""
-        if not text_file or not Path(text_file).is_file():
-            return "Напоминание"
-
-        try:
-            with open(text_file, 'r', encoding='utf-8') as f:
-                lines = [line.strip().strip('";') for line in f.readlines() if line.strip()]
-                return random.choice(lines) if lines else "Напоминание"
-        except Exception as e:
-            print(f"Ошибка чтения текста: {e}")
-            return "Напоминание"
+        lines = read_notification_lines(text_file)
+        return random.choice(lines) if lines else "Напоминание"
 
     def center_on_screen(self):
-        """Центрирует окно на активном экране"""
-        screen = QApplication.primaryScreen().availableGeometry()
-        x = (screen.width() - self.width()) // 2
-        y = (screen.height() - self.height()) // 3  # Смещение к верхней трети
+        """Центрирует окно на активном экране (там, где курсор)"""
+        screen = QApplication.screenAt(QCursor.pos()) or QApplication.primaryScreen()
+        geometry = screen.availableGeometry()
+        x = geometry.x() + (geometry.width() - self.width()) // 2
+        y = geometry.y() + (geometry.height() - self.height()) // 3  # Смещение к верхней трети
         self.move(QPoint(x, y))
 
+    def closeEvent(self, event):
+        super().closeEvent(event)
+        if event.isAccepted():
+            self.closed.emit()
+
     def mousePressEvent(self, event):
         """Закрывает окно по клику"""
         if event.button() == Qt.LeftButton:
@@ -0,0 +1,197 @@
+# notification_dispatcher.py
+import heapq
+import itertools
+import time
+
+
+# Чем меньше число, тем важнее уведомление
+PRIORITIES = {"now": 0, "before": 1}
+
+# Минимальный интервал между показами одного типа, секунды
+DEFAULT_RATE_LIMITS = {"now": 5, "before": 30}
+
+
+class Alert:
+    """Уведомление в очереди диспетчера"""
+
+    __slots__ = ("notif_type", "task", "scheduled", "text", "sound_file",
+                 "timings", "merged_tasks", "seq")
+
+    def __init__(self, notif_type, task, scheduled=None, text=None, sound_file=None, timing=None):
+        self.notif_type = notif_type
+        self.task = task
+        self.scheduled = scheduled
+        self.text = text
+        self.sound_file = sound_file
+        self.timings = [timing] if timing is not None else []
+        self.merged_tasks = []
+        self.seq = 0
+
+    @property
+    def priority(self):
+        return PRIORITIES.get(self.notif_type, len(PRIORITIES))
+
+    def sort_key(self):
+        return (self.priority, self.scheduled or 0, self.seq)
+
+    def merge(self, other):
+        """Поглощает другое уведомление (текст и звук остаются у более важного)"""
+        self.timings.extend(other.timings)
+        for task in [other.task] + other.merged_tasks:
+            if task != self.task and task not in self.merged_tasks:
+                self.merged_tasks.append(task)
+        if self.sound_file is None:
+            self.sound_file = other.sound_file
+
+    def display_text(self, limit=5):
+        if not self.merged_tasks:
+            return self.text
+        also = ", ".join(self.merged_tasks[:limit])
+        if len(self.merged_tasks) > limit:
+            also += f" и еще {len(self.merged_tasks) - limit}"
+        return f"{self.text}\n\nТакже: {also}" if self.text else f"Также: {also}"
+
+
+class NotificationDispatcher:
+    """Очередь уведомлений с объединением, ограничением частоты и одним окном.
+
+    submit() только кладет уведомление в кучу; dispatch() (раз в тик и
+    сразу после submit) снимает все уведомления, чьи типы не упираются в
+    ограничение частоты, и объединяет их в одно. Если окно уже показано и
+    с показа прошло меньше coalesce_window, объединенное уведомление
+    дописывается в него, а не открывает новое. Звук запускается только
+    если сейчас ничего не играет, поэтому пачка уведомлений дает не
+    больше одного окна и одного звука.
+
+    show(alert, replace) — показывает окно или обновляет текущее;
+    play_sound(alert) — запускает звук, если плеер свободен;
+    is_playing() — играет ли звук сейчас.
+    """
+
+    def __init__(self, show, play_sound, is_playing, clock=time.monotonic,
+                 coalesce_window=3.0, rate_limits=None, max_pending=100):
+        self.show = show
+        self.play_sound = play_sound
+        self.is_playing = is_playing
+        self.clock = clock
+        self.coalesce_window = coalesce_window
+        self.rate_limits = dict(DEFAULT_RATE_LIMITS if rate_limits is None else rate_limits)
+        self.max_pending = max_pending
+
+        self.queue = []
+        self.counter = itertools.count()
+        self.last_shown = {}        # тип -> время последнего показа
+        self.active = None          # уведомление в текущем окне
+        self.active_since = None
+        self.dropped = 0
+
+    def submit(self, alert):
+        alert.seq = next(self.counter)
+        heapq.heappush(self.queue, (alert.sort_key(), alert))
+        if len(self.queue) > self.max_pending:
+            # Лишнее наименее важное уведомление не теряется совсем:
+            # его задача попадет в строку "Также" самого важного
+            self.queue.sort()
+            _, dropped = self.queue.pop()
+            self.queue[0][1].merge(dropped)
+            self.dropped += 1
+
+    def surface_closed(self):
+        """Окно закрыто (по таймеру или кликом)"""
+        self.active = None
+        self.active_since = None
+
+    def rate_limited(self, notif_type, now):
+        last = self.last_shown.get(notif_type)
+        return last is not None and now - last < self.rate_limits.get(notif_type, 0)
+
+    def dispatch(self):
+        """Показывает накопленные уведомления; возвращает показанное или None"""
+        if not self.queue:
+            return None
+        now = self.clock()
+        can_extend = (self.active is not None
+                      and now - self.active_since < self.coalesce_window)
+
+        ready = []
+        waiting = []
+        while self.queue:
+            item = heapq.heappop(self.queue)
+            alert = item[1]
+            # В уже открытое окно можно дописывать без оглядки на ограничение
+            if can_extend or not self.rate_limited(alert.notif_type, now):
+                ready.append(alert)
+            else:
+                waiting.append(item)
+        for item in waiting:
+            heapq.heappush(self.queue, item)
+        if not ready:
+            return None
+
+        head = ready[0]
+        for alert in ready[1:]:
+            head.merge(alert)
+
+        if can_extend and self.active.priority <= head.priority:
+            # Текущее окно важнее или равно: дописываем в него без нового звука
+            self.active.merge(head)
+            self.show(self.active, True)
+            self.last_shown[self.active.notif_type] = now
+            return self.active
+
+        self.show(head, self.active is not None)
+        self.active = head
+        self.active_since = now
+        self.last_shown[head.notif_type] = now
+
+        if head.sound_file and not self.is_playing():
+            self.play_sound(head)
+        return head
+
+
+def benchmark(alerts=500, bursts=20):
+    """Нагрузочная проверка: сотни уведомлений одновременно"""
+    import random
+
+    counters = {"windows": 0, "updates": 0, "sounds": 0}
+    playing = {"value": False}
+    fake_time = {"value": 0.0}
+
+    def show(alert, replace):
+        counters["updates" if replace else "windows"] += 1
+
+    def play_sound(alert):
+        counters["sounds"] += 1
+        playing["value"] = True
+
+    dispatcher = NotificationDispatcher(show, play_sound, lambda: playing["value"],
+                                        clock=lambda: fake_time["value"])
+
+    start = time.perf_counter()
+    for burst in range(bursts):
+        # Пачка приходит тремя волнами в соседних тиках по 2 секунды,
+        # звук заканчивается через 6 секунд
+        for tick in range(30):
+            if tick < 3:
+                for i in range(alerts // 3):
+                    notif_type = random.choice(("before", "now"))
+                    dispatcher.submit(Alert(notif_type, f"Задача {tick}.{i}", fake_time["value"],
+                                            "Текст", "sound.wav"))
+            dispatcher.dispatch()
+            fake_time["value"] += 2
+            if tick == 2:
+                playing["value"] = False
+        dispatcher.surface_closed()
+    elapsed = time.perf_counter() - start
+
+    total = alerts // 3 * 3 * bursts
+    print(f"Уведомлений: {total} ({bursts} пачек по {alerts})")
+    print(f"Новых окон: {counters['windows']}, обновлений окна: {counters['updates']}, "
+          f"звуков: {counters['sounds']}")
+    print(f"Объединено при переполнении очереди: {dispatcher.dropped}")
+    print(f"Время: {elapsed * 1000:.1f} мс ({elapsed / total * 1e6:.1f} мкс на уведомление)")
+    return counters
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -9,6 +9,10 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QPainter, QColor
 
+from shared import event_bus
+from theme import theme_engine
+from event_bus import SettingsChanged
+
 
 class NotificationEditor(QDialog):
     def __init__(self, main_app):
@@ -25,6 +29,9 @@ class NotificationEditor(QDialog):
         self.before_items = self.load_items(self.before_file)
         self.now_items = self.load_items(self.now_file)
 
+        # Выбранные, но еще не сохраненные звуки
+        self.pending_settings = {}
+
         self.init_ui()
         self.apply_theme()
 
@@ -251,9 +258,9 @@ class NotificationEditor(QDialog):
 
         if file_name:
             if sound_type == "before":
-                self.main_app.settings["sound_before_file"] = file_name
+                self.pending_settings["sound_before_file"] = file_name
             else:
-                self.main_app.settings["sound_now_file"] = file_name
+                self.pending_settings["sound_now_file"] = file_name
 
     def save_settings(self):
         """Сохраняет все настройки"""
@@ -263,12 +270,14 @@ class NotificationEditor(QDialog):
 
         # Сохраняем настройки
         try:
-            self.main_app.settings.update({
+            changes = {
                 "notification_enabled": self.notif_check.isChecked(),
                 "notification_before_mins": self.before_mins_edit.value(),
                 "notification_duration_secs": self.duration_edit.value()
-            })
-            self.main_app.save_settings()
+            }
+            changes.update(self.pending_settings)
+            self.pending_settings = {}
+            event_bus.publish(SettingsChanged(changes))
             QMessageBox.information(self, "Сохранено", "Настройки успешно сохранены")
         except Exception as e:
             QMessageBox.warning(self, "Ошибка", f"Ошибка сохранения: {str(e)}")
@@ -307,103 +316,11 @@ class NotificationEditor(QDialog):
         msg.setWindowTitle("Справка")
         msg.setTextFormat(Qt.RichText)
 
-        # Применяем стиль в зависимости от темы
-        if self.main_app.settings["theme"] == "dark":
-            msg.setStyleSheet("""
-                QMessageBox {
-                    background-color: #333;
-                }
-                QLabel {
-                    color: white;
-                }
-                QPushButton {
-                    background-color: #444;
-                    color: #EEE;
-                    border: 1px solid #555;
-                    padding: 5px;
-                    border-radius: 4px;
-                }
-                QPushButton:hover {
-                    background-color: #555;
-                }
-            """)
-        else:
-            msg.setStyleSheet("""
-                QLabel {
-                    color: black;
-                }
-            """)
+        # Применяем стиль текущей темы
+        msg.setStyleSheet(theme_engine.stylesheet("help_message"))
 
         msg.setText(help_text)
         msg.exec_()
 
     def apply_theme(self):
-        theme = self.main_app.settings["theme"]
-        if theme == "dark":
-            style = """
-                QDialog {
-                    background-color: #333;
-                    color: #EEE;
-                }
-                QFrame {
-                    background-color: #2d2d2d;
-                    border: 1px solid #444;
-                    border-radius: 5px;
-                }
-                QLabel, QRadioButton, QListWidget, QSpinBox, QCheckBox {
-                    color: #EEE;
-                }
-                QListWidget {
-                    background-color: #222;
-                    color: #EEE;
-                    border: 1px solid #444;
-                }
-                QLineEdit, QSpinBox {
-                    background-color: #333;
-                    color: #EEE;
-                    border: 1px solid #555;
-                }
-                QPushButton {
-                    background-color: #444;
-                    color: #EEE;
-                    border: 1px solid #555;
-                    padding: 5px;
-                    border-radius: 4px;
-                }
-                QPushButton:hover {
-                    background-color: #555;
-                }
-            """
-        else:
-            style = """
-                QDialog {
-                    background-color: #f0f0f0;
-                    color: #333;
-                }
-                QFrame {
-                    background-color: #FFF;
-                    border: 1px solid #CCC;
-                    border-radius: 5px;
-                }
-                QListWidget {
-                    background-color: #FFF;
-                    color: #333;
-                    border: 1px solid #CCC;
-                }
-                QLineEdit, QSpinBox {
-                    background-color: #FFF;
-                    color: #333;
-                    border: 1px solid #CCC;
-                }
-                QPushButton {
-                    background-color: #e0e0e0;
-                    color: #333;
-                    border: 1px solid #CCC;
-                    padding: 5px;
-                    border-radius: 4px;
-                }
-                QPushButton:hover {
-                    background-color: #d0d0d0;
-                }
-            """
-        self.setStyleSheet(style)
\ No newline at end of file
+        theme_engine.apply(self, "notification_editor")
@@ -0,0 +1,138 @@
+# notification_plan.py
+import json
+import random
+from datetime import datetime, timedelta
+
+
+# Настройки, от которых зависит план уведомлений
+PLAN_SETTINGS = (
+    "notification_enabled",
+    "notification_before_mins",
+    "sound_before_file",
+    "sound_now_file",
+)
+
+# Сколько после начала слота еще показывать уведомление "now" (как прежнее
+# совпадение по минуте)
+NOW_GRACE = timedelta(minutes=1)
+
+
+class PlannedNotification:
+    """Одно запланированное уведомление"""
+
+    __slots__ = ("fire_at", "notif_type", "task", "slot", "text", "sound_file")
+
+    def __init__(self, fire_at, notif_type, task, slot, text, sound_file):
+        self.fire_at = fire_at      # когда показать (datetime)
+        self.notif_type = notif_type
+        self.task = task
+        self.slot = slot            # начало слота (datetime)
+        self.text = text
+        self.sound_file = sound_file
+
+    @property
+    def key(self):
+        return (self.notif_type, self.slot)
+
+    def to_dict(self):
+        return {
+            "fire_at": self.fire_at.isoformat(timespec="seconds"),
+            "type": self.notif_type,
+            "task": self.task,
+            "slot": self.slot.isoformat(timespec="minutes"),
+            "text": self.text,
+            "sound_file": self.sound_file,
+        }
+
+
+class NotificationPlan:
+    """План уведомлений на сутки вперед, отсортированный по времени показа.
+
+    Строится один раз на версию расписания и настроек; в тике остается
+    только снять с головы очереди уведомления, время которых наступило.
+    Множество fired переносится в новый план при перестроении, поэтому
+    правка расписания не показывает уже показанные уведомления повторно.
+    """
+
+    def __init__(self, version, built_at, entries, fired=None):
+        self.version = version
+        self.built_at = built_at
+        self.day = built_at.date()
+        self.entries = entries
+        self.position = 0
+        self.fired = fired if fired is not None else set()
+
+    @classmethod
+    def build(cls, version, timetable, settings, now, texts, fired=None):
+        """Строит план на 24 часа начиная с now.
+
+        timetable — {"HH:MM": (задача, цвет)}, texts — {"before": [...], "now": [...]}.
+        """
+        entries = []
+        if settings["notification_enabled"] and timetable:
+            before = timedelta(minutes=settings["notification_before_mins"])
+            sounds = {"before": settings["sound_before_file"], "now": settings["sound_now_file"]}
+            day_start = datetime.combine(now.date(), datetime.min.time())
+
+            for time_str, (task, _) in timetable.items():
+                hours, minutes = time_str.split(":")
+                slot = day_start + timedelta(hours=int(hours), minutes=int(minutes))
+                # Слот, который уже прошел сегодня, планируется на завтра
+                if slot + NOW_GRACE <= now:
+                    slot += timedelta(days=1)
+
+                # "now" — в начале слота; "before" — за N минут, но пока слот
+                # не начался (как прежнее окно 0 <= diff <= N)
+                entries.append(PlannedNotification(slot, "now", task, slot, None, sounds["now"]))
+                if slot > now:
+                    entries.append(PlannedNotification(max(slot - before, now), "before", task, slot,
+                                                       None, sounds["before"]))
+
+            entries.sort(key=lambda e: (e.fire_at, e.notif_type != "before"))
+            for entry in entries:
+                lines = texts.get(entry.notif_type)
+                entry.text = random.choice(lines) if lines else "Напоминание"
+
+        plan = cls(version, now, entries, fired)
+        plan.prune(now)
+        return plan
+
+    def prune(self, now):
+        """Забывает показанные уведомления старше суток"""
+        horizon = now - timedelta(days=1)
+        self.fired = {key for key in self.fired if key[1] > horizon}
+
+    def is_current(self, version, now):
+        return self.version == version and self.day == now.date()
+
+    def peek(self):
+        if self.position < len(self.entries):
+            return self.entries[self.position]
+        return None
+
+    def pop_due(self, now):
+        """Снимает с головы очереди все уведомления с fire_at <= now"""
+        due = []
+        while self.position < len(self.entries) and self.entries[self.position].fire_at <= now:
+            entry = self.entries[self.position]
+            self.position += 1
+            if entry.key not in self.fired:
+                self.fired.add(entry.key)
+                due.append(entry)
+        return due
+
+    def pending(self):
+        return self.entries[self.position:]
+
+    def to_dict(self):
+        return {
+            "built_at": self.built_at.isoformat(timespec="seconds"),
+            "version": self.version,
+            "pending": [entry.to_dict() for entry in self.pending()],
+            "fired": sorted(f"{notif_type} {slot.isoformat(timespec='minutes')}"
+                            for notif_type, slot in self.fired),
+        }
+
+    def dump_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
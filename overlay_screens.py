@@ -0,0 +1,129 @@
+# overlay_screens.py
+from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout
+from PyQt5.QtCore import Qt, QPoint
+
+from overlay_widget import OverlayCanvas
+from theme import theme_engine
+
+
+def corner_position(screen, size, top=50):
+    """Правый верхний угол доступной области экрана"""
+    geometry = screen.availableGeometry()
+    return QPoint(geometry.x() + geometry.width() - size.width() - 20, geometry.y() + top)
+
+
+class MirrorOverlay(QWidget):
+    """Копия оверлея на дополнительном мониторе.
+
+    Своего таймера, чтения БД и звуков у копии нет: она только рисует
+    значения, которые ей передает основной оверлей.
+    """
+
+    def __init__(self, screen, on_button):
+        super().__init__()
+        self.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint | Qt.Tool)
+        self.setAttribute(Qt.WA_TranslucentBackground)
+        self.setAttribute(Qt.WA_DeleteOnClose)
+        self.screen_name = screen.name()
+
+        self.canvas = OverlayCanvas(self)
+        self.canvas.buttonClicked.connect(on_button)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.canvas)
+        theme_engine.attach(self.canvas)
+
+        self.adjustSize()
+        self.move_to_screen(screen)
+
+    def move_to_screen(self, screen):
+        self.move(corner_position(screen, self.size()))
+
+    def copy_from(self, canvas):
+        resized = self.canvas.set_values(canvas.task_text, canvas.task_color,
+                                         canvas.start_time, canvas.end_time, canvas.next_task)
+        if resized:
+            # Держим правый край на месте, как у основного оверлея
+            right = self.x() + self.width()
+            self.adjustSize()
+            self.move(right - self.width(), self.y())
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton and self.canvas.is_drag_area(self.canvas.mapFrom(self, event.pos())):
+            self.old_pos = event.globalPos()
+
+    def mouseMoveEvent(self, event):
+        if event.buttons() == Qt.LeftButton and hasattr(self, 'old_pos'):
+            delta = QPoint(event.globalPos() - self.old_pos)
+            self.move(self.x() + delta.x(), self.y() + delta.y())
+            self.old_pos = event.globalPos()
+
+
+class OverlayScreens:
+    """Копии оверлея на выбранных мониторах с подключением мониторов на лету.
+
+    Настройка overlay_screens: "primary" — только основной оверлей,
+    "all" — копия на каждом мониторе, список имен — копии на этих
+    мониторах. Основной оверлей всегда остается на основном экране, копии
+    создаются для остальных выбранных экранов и обновляются из того же
+    тика, что и основной оверлей.
+    """
+
+    def __init__(self, overlay):
+        self.overlay = overlay
+        self.mirrors = {}
+
+        app = QApplication.instance()
+        app.screenAdded.connect(self.on_screens_changed)
+        app.screenRemoved.connect(self.on_screen_removed)
+        app.primaryScreenChanged.connect(self.on_screens_changed)
+
+    def wanted_screens(self, removed=None):
+        """Экраны, на которых нужна копия оверлея (без основного)"""
+        setting = self.overlay.settings.get("overlay_screens", "primary")
+        primary = QApplication.primaryScreen()
+        screens = [s for s in QApplication.screens() if s is not primary and s is not removed]
+        if setting == "all":
+            return screens
+        if isinstance(setting, list):
+            return [s for s in screens if s.name() in setting]
+        return []
+
+    def sync(self, removed=None):
+        """Создает недостающие копии и закрывает лишние"""
+        wanted = {screen.name(): screen for screen in self.wanted_screens(removed)}
+
+        for name in list(self.mirrors):
+            if name not in wanted:
+                self.mirrors.pop(name).close()
+
+        for name, screen in wanted.items():
+            if name not in self.mirrors:
+                mirror = MirrorOverlay(screen, self.overlay.on_overlay_button)
+                mirror.copy_from(self.overlay.canvas)
+                if self.overlay.isVisible():
+                    mirror.show()
+                self.mirrors[name] = mirror
+
+    def on_screen_removed(self, screen):
+        # Во время сигнала экран еще есть в QApplication.screens()
+        self.on_screens_changed(removed=screen)
+
+    def on_screens_changed(self, *args, removed=None):
+        self.sync(removed)
+        # Основной оверлей возвращаем в угол, только если его экран пропал
+        if QApplication.screenAt(self.overlay.geometry().center()) is None:
+            self.overlay.move_to_corner()
+
+    def update(self, canvas):
+        for mirror in self.mirrors.values():
+            mirror.copy_from(canvas)
+
+    def show(self):
+        for mirror in self.mirrors.values():
+            mirror.show()
+
+    def close(self):
+        for mirror in self.mirrors.values():
+            mirror.close()
+        self.mirrors.clear()
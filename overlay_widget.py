@@ -0,0 +1,298 @@
+# overlay_widget.py
+from collections import OrderedDict
+
+from PyQt5.QtWidgets import QApplication, QWidget, QSizePolicy
+from PyQt5.QtCore import Qt, QRect, QRectF, QSize, QPointF, pyqtSignal
+from PyQt5.QtGui import QPainter, QFont, QFontMetrics, QStaticText, QTextOption, QTransform, QColor
+
+
+MARGIN = 10
+SPACING = 5
+DRAG_HEIGHT = 5
+BUTTON_SIZE = 30
+BUTTON_SPACING = 6
+MIN_WIDTH = 200
+MIN_HEIGHT = 130
+
+# Кнопки верхней панели: (имя, значок) слева направо
+BUTTONS = (("timer", "⏱"), ("task", "📋"), ("settings", "⚙"))
+
+
+class StaticTextCache:
+    """Кэш подготовленных QStaticText (раскладка глифов считается один раз)"""
+
+    def __init__(self, limit=64):
+        self.limit = limit
+        self.items = OrderedDict()
+
+    def get(self, text, font, width=None, align=Qt.AlignLeft):
+        key = (text, font.key(), width, int(align))
+        static = self.items.get(key)
+        if static is not None:
+            self.items.move_to_end(key)
+            return static
+
+        static = QStaticText(text)
+        static.setTextFormat(Qt.PlainText)
+        static.setPerformanceHint(QStaticText.AggressiveCaching)
+        if width is not None:
+            static.setTextWidth(width)
+            option = QTextOption(align)
+            option.setWrapMode(QTextOption.WordWrap)
+            static.setTextOption(option)
+        static.prepare(QTransform(), font)
+
+        self.items[key] = static
+        if len(self.items) > self.limit:
+            self.items.popitem(last=False)
+        return static
+
+
+class OverlayCanvas(QWidget):
+    """Оверлей, который рисует себя сам в paintEvent.
+
+    Заменяет стопку QLabel/QPushButton с таблицами стилей: текст задачи,
+    времени и следующей задачи хранится в кэше QStaticText, а при смене
+    значения перерисовывается только прямоугольник этого поля. Размер
+    окна пересчитывается, только если изменился sizeHint.
+    """
+
+    buttonClicked = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setMouseTracking(True)
+        self.setAttribute(Qt.WA_OpaquePaintEvent, False)
+        self.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
+
+        self.task_font = QFont("Consolas", 18)
+        self.small_font = QFont("Consolas", 10)
+        self.button_font = QFont()
+        self.button_font.setPixelSize(14)
+        self.task_metrics = QFontMetrics(self.task_font)
+        self.small_metrics = QFontMetrics(self.small_font)
+
+        self.cache = StaticTextCache()
+        self.colors = None
+
+        # Отображаемые значения
+        self.task_text = "← Инициализация →"
+        self.task_color = QColor("#00FF00")
+        self.start_time = ""
+        self.end_time = ""
+        self.next_task = ""
+
+        self.hovered_button = None
+        self.pressed_button = None
+
+        self.field_rects = {}
+        self.button_rects = {}
+        self.hint = QSize(MIN_WIDTH, MIN_HEIGHT)
+        self.relayout()
+
+    # --- Данные ---
+
+    def set_theme(self, compiled):
+        self.colors = compiled.overlay_colors
+        self.update()
+
+    def set_values(self, task_text, task_color, start_time, end_time, next_task):
+        """Обновляет поля; возвращает True, если изменился размер"""
+        task_color = QColor(task_color)
+        changed = []
+        if task_text != self.task_text:
+            self.task_text = task_text
+            changed.append("task")
+        if task_color != self.task_color:
+            self.task_color = task_color
+            changed.append("task")
+        if start_time != self.start_time:
+            self.start_time = start_time
+            changed.append("start")
+        if end_time != self.end_time:
+            self.end_time = end_time
+            changed.append("end")
+        if next_task != self.next_task:
+            self.next_task = next_task
+            changed.append("next")
+
+        if not changed:
+            return False
+
+        old_rects = {name: QRect(self.field_rects[name]) for name in changed}
+        if self.relayout():
+            self.update()
+            return True
+
+        # Перерисовываем только изменившиеся поля (старый и новый прямоугольник)
+        for name in changed:
+            self.update(old_rects[name].united(self.field_rects[name]))
+        return False
+
+    # --- Раскладка ---
+
+    def task_static(self):
+        return self.cache.get(self.task_display, self.task_font)
+
+    def next_static(self, width):
+        return self.cache.get(self.next_task, self.small_font, width, Qt.AlignRight)
+
+    def relayout(self):
+        """Пересчитывает прямоугольники полей; True, если изменился размер"""
+        buttons_width = len(BUTTONS) * BUTTON_SIZE + (len(BUTTONS) - 1) * BUTTON_SPACING
+        max_width = self.max_content_width()
+
+        # Слишком длинное название сокращается, а не раздвигает окно за экран
+        self.task_display = self.task_metrics.elidedText(self.task_text, Qt.ElideMiddle, max_width)
+        task_width = self.task_metrics.horizontalAdvance(self.task_display)
+        times_width = (self.small_metrics.horizontalAdvance(self.start_time)
+                       + self.small_metrics.horizontalAdvance(self.end_time) + 2 * SPACING)
+        content_width = min(max_width, max(MIN_WIDTH - 2 * MARGIN, buttons_width, task_width, times_width))
+
+        y = MARGIN
+        self.field_rects["drag"] = QRect(MARGIN, y, content_width, DRAG_HEIGHT)
+        y += DRAG_HEIGHT + SPACING
+
+        x = MARGIN + content_width - buttons_width
+        for name, _ in BUTTONS:
+            self.button_rects[name] = QRect(x, y, BUTTON_SIZE, BUTTON_SIZE)
+            x += BUTTON_SIZE + BUTTON_SPACING
+        y += BUTTON_SIZE + SPACING
+
+        task_height = self.task_metrics.height()
+        self.field_rects["task"] = QRect(MARGIN, y, content_width, task_height)
+        y += task_height + SPACING
+
+        line_height = self.small_metrics.height()
+        self.field_rects["start"] = QRect(MARGIN, y, content_width // 2, line_height)
+        self.field_rects["end"] = QRect(MARGIN + content_width // 2, y,
+                                        content_width - content_width // 2, line_height)
+        y += line_height + SPACING
+
+        next_height = line_height
+        if self.next_task:
+            next_height = max(line_height, int(self.next_static(content_width).size().height() + 0.5))
+        self.field_rects["next"] = QRect(MARGIN, y, content_width, next_height)
+        y += next_height + MARGIN
+
+        hint = QSize(content_width + 2 * MARGIN, max(MIN_HEIGHT, y))
+        if hint != self.hint:
+            self.hint = hint
+            self.updateGeometry()
+            return True
+        return False
+
+    def max_content_width(self):
+        """Не шире двух третей экрана, как и adjustSize()"""
+        screen = QApplication.desktop().availableGeometry(self)
+        return max(MIN_WIDTH, screen.width() * 2 // 3) - 2 * MARGIN
+
+    def sizeHint(self):
+        return self.hint
+
+    def minimumSizeHint(self):
+        return self.hint
+
+    def is_drag_area(self, pos):
+        """Перетаскивать окно можно за верхнюю полосу и ряд кнопок"""
+        if self.button_at(pos):
+            return False
+        return pos.y() < self.field_rects["task"].top()
+
+    def button_at(self, pos):
+        for name, rect in self.button_rects.items():
+            if rect.contains(pos):
+                return name
+        return None
+
+    # --- Отрисовка ---
+
+    def paintEvent(self, event):
+        if self.colors is None:
+            return
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        dirty = event.rect()
+
+        # Подложка (рисуется в пределах области обновления)
+        painter.setCompositionMode(QPainter.CompositionMode_Source)
+        painter.fillRect(dirty, Qt.transparent)
+        painter.setCompositionMode(QPainter.CompositionMode_SourceOver)
+        painter.setPen(self.colors["border"])
+        painter.setBrush(self.colors["background"])
+        painter.drawRoundedRect(QRectF(self.rect()).adjusted(0.5, 0.5, -0.5, -0.5), 10, 10)
+
+        for name, icon in BUTTONS:
+            rect = self.button_rects[name]
+            if rect.intersects(dirty):
+                self.paint_button(painter, name, icon, rect)
+
+        rect = self.field_rects["task"]
+        if rect.intersects(dirty):
+            static = self.task_static()
+            painter.setPen(self.task_color)
+            painter.setFont(self.task_font)
+            x = rect.left() + (rect.width() - static.size().width()) / 2
+            painter.drawStaticText(QPointF(x, rect.top()), static)
+
+        painter.setPen(self.colors["secondary"])
+        painter.setFont(self.small_font)
+        rect = self.field_rects["start"]
+        if self.start_time and rect.intersects(dirty):
+            painter.drawStaticText(QPointF(rect.topLeft()), self.cache.get(self.start_time, self.small_font))
+        rect = self.field_rects["end"]
+        if self.end_time and rect.intersects(dirty):
+            static = self.cache.get(self.end_time, self.small_font)
+            painter.drawStaticText(QPointF(rect.right() + 1 - static.size().width(), rect.top()), static)
+        rect = self.field_rects["next"]
+        if self.next_task and rect.intersects(dirty):
+            painter.drawStaticText(QPointF(rect.topLeft()), self.next_static(rect.width()))
+
+    def paint_button(self, painter, name, icon, rect):
+        hovered = name == self.hovered_button
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(self.colors["button_hover" if hovered else "button"])
+        painter.drawEllipse(QRectF(rect))
+
+        static = self.cache.get(icon, self.button_font)
+        size = static.size()
+        painter.setPen(self.colors["button_text_hover" if hovered else "button_text"])
+        painter.setFont(self.button_font)
+        painter.drawStaticText(QPointF(rect.left() + (rect.width() - size.width()) / 2,
+                                       rect.top() + (rect.height() - size.height()) / 2), static)
+
+    # --- Мышь ---
+
+    def set_hovered(self, name):
+        if name == self.hovered_button:
+            return
+        for old in (self.hovered_button, name):
+            if old:
+                self.update(self.button_rects[old])
+        self.hovered_button = name
+        self.setCursor(Qt.PointingHandCursor if name else Qt.ArrowCursor)
+
+    def mouseMoveEvent(self, event):
+        self.set_hovered(self.button_at(event.pos()))
+        event.ignore()
+
+    def leaveEvent(self, event):
+        self.set_hovered(None)
+        super().leaveEvent(event)
+
+    def mousePressEvent(self, event):
+        name = self.button_at(event.pos()) if event.button() == Qt.LeftButton else None
+        if name:
+            self.pressed_button = name
+            event.accept()
+        else:
+            event.ignore()
+
+    def mouseReleaseEvent(self, event):
+        name = self.pressed_button
+        self.pressed_button = None
+        if name and self.button_at(event.pos()) == name:
+            self.buttonClicked.emit(name)
+            event.accept()
+        else:
+            event.ignore()
@@ -0,0 +1,201 @@
+# schedule_snapshot.py
+import itertools
+import sqlite3
+import threading
+from collections.abc import Mapping
+
+from compact_timetable import CompactTimetable
+
+
+class ScheduleSnapshot(Mapping):
+    """Неизменяемая версия расписания: {"HH:MM": (задача, цвет)} по времени.
+
+    Снимок не меняется после создания, поэтому его можно читать из любого
+    потока без блокировок. Правка дает новый снимок (with_edit), старый
+    остается целым у тех, кто его еще держит. version растет с каждой
+    публикацией и годится как ключ для кэшей. Слоты хранятся в
+    CompactTimetable.
+
+    content_version — счетчик изменений расписания в БД (timetable_version),
+    из которого прочитан снимок; у снимков после правки в памяти — None.
+    """
+
+    __slots__ = ("timetable_name", "version", "content_version", "_table")
+
+    def __init__(self, timetable_name, slots=(), version=0, durations=None, content_version=None):
+        self.timetable_name = timetable_name
+        self.version = version
+        self.content_version = content_version
+        if isinstance(slots, CompactTimetable):
+            self._table = slots
+        else:
+            self._table = CompactTimetable(slots, durations=durations)
+
+    def __getitem__(self, time_str):
+        return self._table[time_str]
+
+    def __iter__(self):
+        return iter(self._table)
+
+    def __len__(self):
+        return len(self._table)
+
+    def slot(self, position):
+        return self._table.slot(position)
+
+    def slot_at(self, minute):
+        return self._table.slot_at(minute)
+
+    def duration(self, position):
+        return self._table.duration(position)
+
+    def intervals(self):
+        """(минута начала, длительность) всех слотов по порядку"""
+        return list(zip(self._table.minutes, self._table.durations))
+
+    def __repr__(self):
+        return f"ScheduleSnapshot({self.timetable_name!r}, v{self.version}, {len(self)} слотов)"
+
+    def to_snapshot(self):
+        """Как CompiledSchedule.to_snapshot: текущим может быть любой из них"""
+        return self
+
+    def with_edit(self, edit):
+        """Новый снимок с примененной правкой (SlotEdit); версия назначается при публикации"""
+        table = self._table.copy()
+        if edit.old_time is not None:
+            table.remove(edit.old_time)
+        if edit.new_time is not None:
+            table.insert(edit.new_time, *edit.new_data, edit.new_duration)
+        return ScheduleSnapshot(self.timetable_name, table)
+
+
+def read_content_version(conn, timetable_name):
+    """Счетчик изменений расписания в БД; 0 — расписание еще не менялось,
+    None — база еще не прошла миграцию со счетчиком"""
+    try:
+        row = conn.execute("SELECT version FROM timetable_version WHERE timetable_name = ?",
+                           (timetable_name,)).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return row[0] if row else 0
+
+
+def read_snapshot(db_path, timetable_name):
+    """Читает расписание отдельным соединением (в WAL не ждет пишущих)"""
+    conn = sqlite3.connect(str(db_path))
+    try:
+        # Строки и счетчик изменений — из одного снимка БД
+        conn.execute("BEGIN")
+        rows = conn.execute(
+            "SELECT time, task, color, duration FROM timetable WHERE timetable_name = ? ORDER BY time",
+            (timetable_name,)).fetchall()
+        content_version = read_content_version(conn, timetable_name)
+        conn.rollback()
+    finally:
+        conn.close()
+    return ScheduleSnapshot(timetable_name, [(time_str, (task, color)) for time_str, task, color, _ in rows],
+                            durations={time_str: duration for time_str, _, _, duration in rows if duration},
+                            content_version=content_version)
+
+
+class ScheduleStore:
+    """Текущий снимок расписания, публикуемый заменой ссылки.
+
+    Читатели берут store.current и работают с ним без блокировок:
+    присваивание ссылки атомарно, а снимок неизменяем. Пишущие собирают
+    следующий снимок сами (в том числе в фоновом потоке) и публикуют его
+    через publish(); блокировка нужна только для выдачи номера версии и
+    проверки, что за время сборки не опубликовали что-то новее.
+    """
+
+    def __init__(self, timetable_name=None):
+        self.versions = itertools.count(1)
+        self.lock = threading.Lock()
+        self.current = ScheduleSnapshot(timetable_name, version=0)
+
+    def publish(self, snapshot, expected=None):
+        """Делает снимок текущим; если expected задан и текущая версия
+        уже другая, ничего не меняет и возвращает None"""
+        with self.lock:
+            if expected is not None and self.current.version != expected:
+                return None
+            snapshot.version = next(self.versions)
+            self.current = snapshot
+        return snapshot
+
+    def apply_edit(self, edit):
+        """Правка одной строки поверх текущего снимка (copy-on-write)"""
+        while True:
+            base = self.current
+            if edit.timetable_name != base.timetable_name:
+                return base
+            published = self.publish(base.with_edit(edit), expected=base.version)
+            if published is not None:
+                return published
+
+    def rename(self, timetable_name):
+        """Текущий снимок под новым именем расписания (переименование в
+        редакторе): слоты общие, правки с новым именем снова применяются"""
+        while True:
+            base = self.current
+            if base.timetable_name == timetable_name:
+                return base
+            # После запуска текущий снимок обычно CompiledSchedule из schedule.bin
+            renamed = ScheduleSnapshot(timetable_name, base.to_snapshot()._table)
+            published = self.publish(renamed, expected=base.version)
+            if published is not None:
+                return published
+
+    def reload(self, db_path, timetable_name):
+        """Перечитывает расписание из БД и публикует снимок"""
+        base_version = self.current.version
+        snapshot = read_snapshot(db_path, timetable_name)
+        # Правка, опубликованная во время чтения, могла не попасть в
+        # прочитанные строки — тогда читаем заново
+        while self.publish(snapshot, expected=base_version) is None:
+            base_version = self.current.version
+            snapshot = read_snapshot(db_path, timetable_name)
+        return snapshot
+
+    def reload_async(self, db_path, timetable_name, on_done=None):
+        """reload() в фоновом потоке; on_done(снимок) вызывается из него же"""
+        def run():
+            try:
+                snapshot = self.reload(db_path, timetable_name)
+            except Exception as e:
+                print(f"Ошибка загрузки расписания: {e}")
+                return
+            if on_done:
+                on_done(snapshot)
+
+        thread = threading.Thread(target=run, name="schedule-reload", daemon=True)
+        thread.start()
+        return thread
+
+
+def selftest():
+    """Правки после переименования активного расписания доходят до снимка —
+    и от обычного снимка, и от CompiledSchedule, с которым оверлей стартует"""
+    from compiled_schedule import CompiledSchedule, compile_schedule
+    from edit_commands import SlotEdit
+
+    first = ScheduleSnapshot("Основное", [("06:00", ("Подъем", "#3498db"))], durations={"06:00": 30},
+                             content_version=1)
+    for label, start in (("снимок", first), ("schedule.bin", CompiledSchedule(compile_schedule(first)))):
+        store = ScheduleStore("Основное")
+        store.publish(start)
+        renamed = store.rename("Утро")
+        assert renamed.timetable_name == "Утро" and dict(renamed) == dict(first), label
+        assert renamed.duration(0) == 30, label
+
+        store.apply_edit(SlotEdit.add("Утро", "08:00", "Завтрак", "#2ecc71"))
+        assert "08:00" in store.current, f"{label}: правка после переименования потеряна"
+        # Правка со старым именем к переименованному снимку не применяется
+        store.apply_edit(SlotEdit.add("Основное", "09:00", "Почта", "#FFFFFF"))
+        assert "09:00" not in store.current, label
+        print(f"{label} -> {store.current!r}: переименование и правки — ок")
+
+
+if __name__ == "__main__":
+    selftest()
@@ -0,0 +1,111 @@
+# search_dialog.py
+import os
+import time
+
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QLineEdit, QTreeWidget, QTreeWidgetItem, QLabel
+from PyQt5.QtCore import QTimer, QFileSystemWatcher, QObject, Qt
+
+
+class IndexWatcher(QObject):
+    """Следит за папкой задач и файлами текстов уведомлений и после
+    паузы в изменениях переиндексирует изменившиеся файлы"""
+
+    def __init__(self, index, parent=None):
+        super().__init__(parent)
+        self.index = index
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.schedule_sync)
+        self.watcher.fileChanged.connect(self.schedule_sync)
+        self.sync_timer = QTimer(self)
+        self.sync_timer.setSingleShot(True)
+        self.sync_timer.setInterval(500)
+        self.sync_timer.timeout.connect(self.sync)
+        self.update_paths()
+
+    def update_paths(self):
+        # Редакторы сохраняют файлы заменой, и наблюдение за файлом
+        # теряется — поэтому список путей обновляется после каждой синхронизации
+        paths = [self.index.task_folder] + list(self.index.watched_files())
+        paths = [path for path in paths if os.path.exists(path)]
+        watched = set(self.watcher.files()) | set(self.watcher.directories())
+        missing = [path for path in paths if path not in watched]
+        if missing:
+            self.watcher.addPaths(missing)
+
+    def schedule_sync(self, _path=None):
+        self.sync_timer.start()
+
+    def sync(self):
+        try:
+            self.index.sync_files()
+        except Exception as e:
+            print(f"Ошибка обновления поискового индекса: {e}")
+        self.update_paths()
+
+
+class SearchDialog(QDialog):
+    """Поиск по всем расписаниям, файлам задач и текстам уведомлений"""
+
+    def __init__(self, index, open_hit, parent=None):
+        super().__init__(parent)
+        self.index = index
+        self.open_hit = open_hit
+        self.setWindowTitle("Поиск")
+        self.resize(560, 420)
+
+        layout = QVBoxLayout(self)
+        self.query_edit = QLineEdit()
+        self.query_edit.setPlaceholderText("Задача, действие или текст уведомления")
+        self.query_edit.textChanged.connect(self.schedule_search)
+        self.query_edit.returnPressed.connect(self.search)
+        layout.addWidget(self.query_edit)
+
+        self.results = QTreeWidget()
+        self.results.setHeaderLabels(["Где", "Найдено"])
+        self.results.setRootIsDecorated(False)
+        self.results.setColumnWidth(0, 220)
+        self.results.itemActivated.connect(self.activate_item)
+        layout.addWidget(self.results)
+
+        self.status = QLabel()
+        layout.addWidget(self.status)
+
+        # Поиск после паузы в наборе, а не на каждую букву
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(150)
+        self.search_timer.timeout.connect(self.search)
+
+    def schedule_search(self):
+        self.search_timer.start()
+
+    def search(self):
+        self.search_timer.stop()
+        started = time.perf_counter()
+        try:
+            hits = self.index.search(self.query_edit.text())
+        except Exception as e:
+            print(f"Ошибка поиска: {e}")
+            hits = []
+        elapsed = (time.perf_counter() - started) * 1000
+
+        self.results.clear()
+        for hit in hits:
+            item = QTreeWidgetItem([hit.where(), hit.snippet])
+            item.setToolTip(1, hit.text)
+            item.setData(0, Qt.UserRole, hit)
+            self.results.addTopLevelItem(item)
+        if self.query_edit.text().strip():
+            self.status.setText(f"Найдено: {len(hits)} за {elapsed:.1f} мс")
+        else:
+            self.status.clear()
+
+    def activate_item(self, item, _column=0):
+        hit = item.data(0, Qt.UserRole)
+        if hit is not None:
+            self.open_hit(hit)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.query_edit.setFocus()
+        self.query_edit.selectAll()
@@ -0,0 +1,209 @@
+# search_index.py
+import os
+import re
+import sqlite3
+import threading
+
+from migrations import create_search_index
+from task_catalog import parse_task_file
+
+
+SOURCE_TITLES = {"timetable": "Расписание", "task": "Задачи", "notification": "Уведомления"}
+
+
+class SearchHit:
+    """Одна найденная строка"""
+
+    __slots__ = ("source", "location", "detail", "text", "snippet", "rank")
+
+    def __init__(self, source, location, detail, text, snippet, rank):
+        self.source = source        # "timetable", "task" или "notification"
+        self.location = location    # имя расписания, категории или файла текстов
+        self.detail = detail        # время слота или путь к файлу
+        self.text = text
+        self.snippet = snippet
+        self.rank = rank
+
+    def where(self):
+        title = SOURCE_TITLES.get(self.source, self.source)
+        if self.source == "timetable":
+            return f"{title} «{self.location}», {self.detail}"
+        return f"{title}: {self.location}"
+
+
+def build_query(text):
+    """Запрос FTS5 из введенного текста: все слова как префиксы"""
+    words = re.findall(r"\w+", text)
+    return " ".join('"' + word.replace('"', '""') + '"*' for word in words)
+
+
+class SearchIndex:
+    """Полнотекстовый индекс FTS5 по задачам расписаний, файлам задач и
+    текстам уведомлений.
+
+    Индекс лежит в timetable.db рядом с таблицей timetable: строки
+    расписаний попадают в него триггерами (rowid = timetable.id), так что
+    любая запись в таблицу, из любого окна, сразу видна в поиске. Строки
+    файлов индексируются sync_files() по изменившимся (mtime, размер) и
+    получают отрицательные rowid. Таблицы и триггеры создает миграция
+    create_search_index (migrations.py); если SQLite при миграции был без
+    FTS5, индекс создается здесь при первом запуске с FTS5.
+    """
+
+    def __init__(self, db_path, task_folder, text_files=()):
+        self.task_folder = str(task_folder)
+        self.text_files = [str(path) for path in text_files]
+        self.conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self.lock = threading.Lock()
+        try:
+            self.create_tables()
+        except sqlite3.Error:
+            self.conn.close()
+            raise
+        self.check_timetable_rows()
+        self.sync_files()
+
+    def has_index(self):
+        return self.conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'search_index'").fetchone() is not None
+
+    def create_tables(self):
+        """Создает индекс, которого нет; без FTS5 — sqlite3.OperationalError"""
+        with self.lock:
+            if self.has_index():
+                return
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                create_search_index(self.conn)
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+            if not self.has_index():
+                raise sqlite3.OperationalError("SQLite собран без FTS5, поиск недоступен")
+
+    def check_timetable_rows(self):
+        with self.lock:
+            # INSERT OR REPLACE не вызывает триггер удаления, поэтому при
+            # расхождении числа строк часть индекса по расписаниям строится заново
+            indexed = self.conn.execute(
+                "SELECT COUNT(*) FROM search_index WHERE source = 'timetable'").fetchone()[0]
+            total = self.conn.execute("SELECT COUNT(*) FROM timetable").fetchone()[0]
+            if indexed != total:
+                self.conn.execute("DELETE FROM search_index WHERE source = 'timetable'")
+                self.conn.execute(
+                    "INSERT INTO search_index (rowid, source, location, detail, text) "
+                    "SELECT id, 'timetable', timetable_name, time, task FROM timetable")
+            self.conn.commit()
+
+    # --- Файлы ---
+
+    def watched_files(self):
+        """Файлы, которые должны быть в индексе: {путь: (источник, имя)}"""
+        files = {}
+        if os.path.isdir(self.task_folder):
+            with os.scandir(self.task_folder) as entries:
+                for entry in entries:
+                    if entry.is_file() and entry.name.endswith(".txt"):
+                        files[entry.path] = ("task", entry.name[:-4])
+        for path in self.text_files:
+            if os.path.isfile(path):
+                files[path] = ("notification", os.path.splitext(os.path.basename(path))[0])
+        return files
+
+    @staticmethod
+    def file_lines(path, source):
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        if source == "task":
+            return [action for action, _ in parse_task_file(text)[3]]
+        # Как read_notification_lines в notification.py
+        return [line.strip().strip('";') for line in text.splitlines() if line.strip()]
+
+    def sync_files(self):
+        """Переиндексирует новые, измененные и удаленные файлы; возвращает число измененных"""
+        files = self.watched_files()
+        changed = 0
+        with self.lock:
+            cached = {path: (mtime_ns, size) for path, mtime_ns, size in
+                      self.conn.execute("SELECT path, mtime_ns, size FROM search_files")}
+            for path in cached.keys() - files.keys():
+                self.forget_file(path)
+                changed += 1
+            for path, (source, name) in files.items():
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                signature = (stat.st_mtime_ns, stat.st_size)
+                if cached.get(path) == signature:
+                    continue
+                try:
+                    lines = self.file_lines(path, source)
+                except Exception as e:
+                    print(f"Ошибка индексации {path}: {e}")
+                    continue
+                self.forget_file(path)
+                next_rowid = min(0, self.conn.execute("SELECT MIN(rowid) FROM search_index").fetchone()[0] or 0) - 1
+                self.conn.executemany(
+                    "INSERT INTO search_index (rowid, source, location, detail, text) VALUES (?, ?, ?, ?, ?)",
+                    [(next_rowid - number, source, name, path, line) for number, line in enumerate(lines)])
+                self.conn.execute("INSERT INTO search_files (path, mtime_ns, size) VALUES (?, ?, ?)",
+                                  (path, *signature))
+                changed += 1
+            self.conn.commit()
+        return changed
+
+    def forget_file(self, path):
+        self.conn.execute("DELETE FROM search_index WHERE rowid < 0 AND detail = ?", (path,))
+        self.conn.execute("DELETE FROM search_files WHERE path = ?", (path,))
+
+    # --- Поиск ---
+
+    def search(self, text, limit=50):
+        """Найденные строки всех источников, лучшие первыми"""
+        query = build_query(text)
+        if not query:
+            return []
+        with self.lock:
+            rows = self.conn.execute(
+                '''SELECT source, location, detail, text,
+                          snippet(search_index, 3, '[', ']', '…', 12), bm25(search_index)
+                   FROM search_index WHERE search_index MATCH ?
+                   ORDER BY bm25(search_index) LIMIT ?''', (query, limit)).fetchall()
+        return [SearchHit(*row) for row in rows]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+def selftest():
+    """База, мигрированная SQLite без FTS5, доходит до последней версии без
+    индекса; индекс создается и заполняется при первом запуске с FTS5"""
+    import tempfile
+    from migrations import SCHEMA_VERSION, migrate, schema_version
+
+    with tempfile.TemporaryDirectory() as folder:
+        db_path = os.path.join(folder, "timetable.db")
+        conn = sqlite3.connect(db_path)
+        # Пользовательская функция заменяет встроенную: SQLite "без FTS5"
+        conn.create_function("sqlite_compileoption_used", 1, lambda option: 0)
+        migrate(conn)
+        conn.execute("INSERT INTO timetable (time, task, color, timetable_name) "
+                     "VALUES ('06:00', 'Подъем', '#3498db', 'Основное')")
+        conn.commit()
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master")}
+        assert schema_version(conn) == SCHEMA_VERSION
+        assert "search_files" in tables and "search_index" not in tables, tables
+        conn.close()
+
+        index = SearchIndex(db_path, os.path.join(folder, "Task"))
+        try:
+            assert [hit.text for hit in index.search("подъ")] == ["Подъем"]
+        finally:
+            index.close()
+    print("Поисковый индекс после миграции без FTS5 создан при запуске — ок")
+
+
+if __name__ == "__main__":
+    selftest()
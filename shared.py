@@ -1,4 +1,9 @@
 # shared.py
 import threading
 
-db_lock = threading.Lock()
\ No newline at end of file
+from event_bus import EventBus
+
+db_lock = threading.Lock()
+
+# Общая шина событий между редакторами и оверлеем
+event_bus = EventBus()
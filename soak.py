@@ -0,0 +1,131 @@
+# soak.py
+"""Нагрузочный прогон оверлея: дни тиков и уведомлений на виртуальных часах.
+
+Запуск: python soak.py --days 7 --slot-minutes 30
+
+Данные создаются во временной папке, реальные настройки и расписания не
+затрагиваются. Окна создаются на offscreen-платформе Qt, если не указан
+--visible.
+"""
+import argparse
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+
+class VirtualClock:
+    """Часы, которые идут только при вызове advance()"""
+
+    def __init__(self, start):
+        self.current = start
+        self.elapsed = 0.0
+
+    def now(self):
+        return self.current
+
+    def monotonic(self):
+        return self.elapsed
+
+    def advance(self, seconds):
+        self.current += timedelta(seconds=seconds)
+        self.elapsed += seconds
+
+
+def seed_timetable(db_path, slot_minutes):
+    """Создает расписание со слотом каждые slot_minutes минут"""
+    import sqlite3
+
+    from migrations import migrate
+
+    conn = sqlite3.connect(str(db_path))
+    migrate(conn)
+    rows = [
+        (f"{m // 60:02d}:{m % 60:02d}", f"Задача {i}", "#3498db", "Основное")
+        for i, m in enumerate(range(0, 1440, slot_minutes))
+    ]
+    conn.executemany(
+        "INSERT OR REPLACE INTO timetable (time, task, color, timetable_name) VALUES (?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+
+
+def run(args):
+    home = tempfile.mkdtemp(prefix="timeanchor-soak-")
+    # Path.home() берется из HOME (USERPROFILE в Windows)
+    os.environ["HOME"] = home
+    os.environ["USERPROFILE"] = home
+    if not args.visible:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication(sys.argv)
+    app.setQuitOnLastWindowClosed(False)
+
+    from utils import get_db_path
+    from diagnostics import LeakAuditor
+    from time_anchor import TimeOverlay
+
+    seed_timetable(get_db_path(), args.slot_minutes)
+
+    clock = VirtualClock(datetime.now().replace(hour=0, minute=0, second=0, microsecond=0))
+    overlay = TimeOverlay()
+    overlay.clock = clock.now
+    overlay.monotonic = clock.monotonic
+    overlay.clock_watch.interval = args.tick_seconds
+    overlay.timer.stop()
+    overlay.settings["notification_duration_secs"] = 0
+    if args.sound:
+        overlay.settings["sound_before_file"] = args.sound
+        overlay.settings["sound_now_file"] = args.sound
+    overlay.show()
+
+    auditor = LeakAuditor(window=args.window)
+    ticks_per_day = 86400 // args.tick_seconds
+    samples_per_day = max(1, args.samples_per_day)
+    sample_every = max(1, ticks_per_day // samples_per_day)
+
+    total_ticks = ticks_per_day * args.days
+    for tick in range(total_ticks):
+        clock.advance(args.tick_seconds)
+        overlay.check_timetable_loop()
+        app.processEvents()
+        if tick % sample_every == 0:
+            app.sendPostedEvents(None, 0)  # выполнить отложенные deleteLater
+            sample = auditor.sample(clock.now().isoformat(timespec="minutes"))
+            print(f"{sample['label']}  rss={sample['rss'] / 1e6:7.1f} MB  "
+                  f"heap={sample['python_heap'] / 1e6:7.2f} MB  "
+                  f"qobjects={sum(sample['qobjects'].values())}")
+
+    report = auditor.report()
+    print(f"\nУведомлений показано: {len(overlay.latency.records)}")
+    if report["growing"]:
+        print("Монотонный рост:")
+        for item in report["growing"]:
+            print(f"  {item['series']}: {item['from']} -> {item['to']}")
+    else:
+        print("Монотонного роста не обнаружено")
+
+    if args.report:
+        auditor.dump_json(args.report)
+        print(f"Отчет: {args.report}")
+
+    overlay.close()
+    return 1 if report["growing"] else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный прогон TimeAnchor на виртуальных часах")
+    parser.add_argument("--days", type=int, default=3)
+    parser.add_argument("--tick-seconds", type=int, default=60, help="шаг виртуальных часов за тик")
+    parser.add_argument("--slot-minutes", type=int, default=30, help="интервал между слотами расписания")
+    parser.add_argument("--samples-per-day", type=int, default=8)
+    parser.add_argument("--window", type=int, default=10, help="число снимков для поиска роста")
+    parser.add_argument("--sound", help="звуковой файл для уведомлений")
+    parser.add_argument("--report", help="путь для JSON-отчета")
+    parser.add_argument("--visible", action="store_true", help="показывать окна на экране")
+    sys.exit(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+# status_server.py
+"""Локальный API текущей задачи для внешних виджетов (tmux, polybar, панели).
+
+    GET /status        JSON текущего слота; ETag меняется только при смене слота
+    GET /status?wait=N с If-None-Match: ждет смены слота до N секунд
+                       (long-poll), по таймауту — 304
+    GET /status.txt    одна строка "задача · осталось N мин" для строки состояния
+
+Сервер слушает только 127.0.0.1 и отвечает из состояния, которое оверлей
+публикует раз в тик (publish); запросы не обращаются к базе.
+"""
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+from compact_timetable import FREE_TIME, MINUTES_PER_DAY, time_to_minutes
+
+MAX_WAIT = 300
+
+
+def build_status(timetable_name, now, current, timetable=None):
+    """Словарь состояния из результата current_slot.
+
+    ends_at — момент следующей смены слота (конец явной длительности или
+    начало следующего слота — что раньше), секунды эпохи; обратный отсчет
+    клиенты считают сами, поэтому тело ответа не меняется внутри слота.
+    """
+    if current is None:
+        return {"timetable": timetable_name, "task": None, "color": None, "start": None,
+                "free": False, "next_time": None, "next_task": None, "ends_at": None}
+    (task, color), start_time, next_time, next_data = current
+    free = (task, color) == FREE_TIME
+
+    minute = now.hour * 60 + now.minute
+    end_minutes = [time_to_minutes(next_time)] if next_time else []
+    if not free and timetable is not None:
+        position = timetable.slot_at(minute)
+        duration = timetable.duration(position) if position is not None else None
+        if duration:
+            end_minutes.append((time_to_minutes(start_time) + duration) % MINUTES_PER_DAY)
+
+    ends_at = None
+    if end_minutes:
+        delta = min((end - minute) % MINUTES_PER_DAY or MINUTES_PER_DAY for end in end_minutes)
+        ends_at = (now.replace(second=0, microsecond=0) + timedelta(minutes=delta)).timestamp()
+
+    return {"timetable": timetable_name, "task": task, "color": color, "start": start_time,
+            "free": free, "next_time": next_time, "next_task": next_data[0] if next_data else None,
+            "ends_at": ends_at}
+
+
+class StatusState:
+    """Последнее опубликованное состояние: готовое тело ответа и его ETag.
+
+    publish() с тем же содержимым ничего не меняет и никого не будит;
+    на тике оверлея — publish_slot(), который внутри слота не строит и не
+    сериализует тело вовсе.
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.status = None
+        self.body = b"null"
+        self.etag = self.make_etag(self.body)
+        self.closed = False
+        # Ключ слота и момент, для которых построено последнее состояние
+        self.slot_key = None
+        self.built_at = None
+
+    @staticmethod
+    def make_etag(body):
+        return '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+
+    def publish(self, status):
+        body = json.dumps(status, ensure_ascii=False, sort_keys=True).encode("utf-8")
+        with self.condition:
+            if body == self.body:
+                return False
+            self.status = status
+            self.body = body
+            self.etag = self.make_etag(body)
+            self.condition.notify_all()
+        return True
+
+    def publish_slot(self, key, now, build):
+        """publish(build()), если сменился key (версия снимка, расписание,
+        слот), наступил ends_at или часы ушли назад; иначе состояние то же"""
+        timestamp = now.timestamp()
+        with self.condition:
+            ends_at = self.status.get("ends_at") if self.status else None
+            if (key == self.slot_key and self.built_at is not None and self.built_at <= timestamp and
+                    (ends_at is None or timestamp < ends_at)):
+                return False
+        changed = self.publish(build())
+        with self.condition:
+            self.slot_key = key
+            self.built_at = timestamp
+        return changed
+
+    def snapshot(self):
+        with self.condition:
+            return self.status, self.body, self.etag
+
+    def wait_change(self, etag, timeout):
+        """Ждет, пока ETag не станет отличным от etag; возвращает snapshot()"""
+        deadline = time.monotonic() + timeout
+        with self.condition:
+            while self.etag == etag and not self.closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.condition.wait(remaining)
+            return self.status, self.body, self.etag
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+def status_line(status, now=None):
+    if not status or not status.get("task"):
+        return "—"
+    if not status.get("ends_at"):
+        return status["task"]
+    left = max(0, int(status["ends_at"] - (now if now is not None else time.time())))
+    hours, minutes = divmod((left + 59) // 60, 60)
+    return f"{status['task']} · {f'{hours} ч {minutes} мин' if hours else f'{minutes} мин'}"
+
+
+class StatusHandler(BaseHTTPRequestHandler):
+    server_version = "TimeAnchor"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        state = self.server.state
+        if url.path == "/status.txt":
+            status, _, _ = state.snapshot()
+            self.send_body(200, (status_line(status) + "\n").encode("utf-8"), "text/plain; charset=utf-8")
+            return
+        if url.path != "/status":
+            self.send_body(404, b"not found\n", "text/plain")
+            return
+
+        status, body, etag = state.snapshot()
+        client_etag = self.headers.get("If-None-Match")
+        if client_etag == etag:
+            try:
+                wait = float(parse_qs(url.query).get("wait", ["0"])[0])
+            except ValueError:
+                wait = 0
+            if wait > 0:
+                status, body, etag = state.wait_change(client_etag, min(wait, MAX_WAIT))
+        if client_etag == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_body(200, body, "application/json; charset=utf-8", etag)
+
+    def send_body(self, code, body, content_type, etag=None):
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-cache")
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StatusServer:
+    """HTTP-сервер состояния в фоновом потоке"""
+
+    def __init__(self, state, port=0, host="127.0.0.1"):
+        self.state = state
+        self.httpd = ThreadingHTTPServer((host, port), StatusHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.state = state
+        self.thread = None
+
+    @property
+    def port(self):
+        return self.httpd.server_address[1]
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="status-server", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        # Сначала будим ждущие long-poll запросы, иначе они держат потоки до таймаута
+        self.state.close()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def check_ends_at():
+    """ends_at — раньшее из конца длительности и начала следующего слота"""
+    from compact_timetable import CompactTimetable, current_slot
+
+    day = datetime(2026, 1, 1)
+    cases = [
+        # (слоты с длительностями, сейчас, ожидаемая смена слота)
+        ({"09:00": 120, "10:00": None}, "09:30", "10:00"),
+        ({"09:00": 30, "10:00": None}, "09:10", "09:30"),
+        ({"09:00": None, "10:00": None}, "09:10", "10:00"),
+        ({"23:00": 120, "06:00": None}, "23:30", "01:00"),
+        ({"09:00": 30}, "09:10", "09:30"),
+        ({"09:00": None}, "09:10", None),
+    ]
+    for durations, now_str, expected in cases:
+        timetable = CompactTimetable([(time_str, (f"Задача {time_str}", "#3498db")) for time_str in durations],
+                                     durations=durations)
+        now = day + timedelta(minutes=time_to_minutes(now_str))
+        status = build_status("Основное", now, current_slot(timetable, time_to_minutes(now_str)), timetable)
+        if expected is None:
+            # Единственный слот без длительности не кончается
+            assert status["ends_at"] is None and status_line(status) == status["task"], status
+            continue
+        ends = datetime.fromtimestamp(status["ends_at"])
+        assert ends.strftime("%H:%M") == expected and ends > now, (durations, now_str, ends)
+        hours, minutes = divmod(int(ends.timestamp() - now.timestamp()) // 60, 60)
+        left = f"{hours} ч {minutes} мин" if hours else f"{minutes} мин"
+        assert status_line(status, now.timestamp()) == f"{status['task']} · {left}"
+    print(f"ends_at: {len(cases)} случаев — ок")
+
+
+def check_publish_slot():
+    """На тиках внутри слота тело не строится заново; смена ключа, ends_at
+    и переход часов назад — строится"""
+    day = datetime(2026, 1, 1, 9, 10)
+    current = (("Почта", "#3498db"), "09:00", "09:30", ("Созвон", "#e74c3c"))
+    builds = []
+
+    def tick(now, key=(1, "Основное", current)):
+        def build():
+            builds.append(now)
+            return build_status("Основное", now, current)
+        return state.publish_slot(key, now, build)
+
+    state = StatusState()
+    assert tick(day)
+    for minutes in range(1, 20):
+        assert not tick(day + timedelta(minutes=minutes))
+    assert len(builds) == 1, builds
+    # Новая версия снимка с тем же слотом: строится, но ETag прежний
+    assert not tick(day + timedelta(minutes=5), key=(2, "Основное", current)) and len(builds) == 2
+    # Тот же ключ сутки спустя (ends_at прошел) и после перевода часов назад
+    tick(day + timedelta(days=1), key=(2, "Основное", current))
+    tick(day, key=(2, "Основное", current))
+    assert len(builds) == 4, builds
+    print("publish_slot: тело строится только при смене слота — ок")
+
+
+def selftest():
+    """Проверка с локальным клиентом: ETag, 304 и пробуждение long-poll"""
+    import urllib.error
+    import urllib.request
+
+    def get(url, etag=None):
+        request = urllib.request.Request(url, headers={"If-None-Match": etag} if etag else {})
+        try:
+            with urllib.request.urlopen(request, timeout=10) as response:
+                return response.status, response.headers["ETag"], response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.headers["ETag"], b""
+
+    check_ends_at()
+    check_publish_slot()
+
+    # Слоты вокруг текущей минуты: /status.txt считает остаток от time.time()
+    now = datetime.now().replace(second=0, microsecond=0)
+    started, changes = (now - timedelta(minutes=10)).strftime("%H:%M"), (now + timedelta(minutes=20)).strftime("%H:%M")
+    state = StatusState()
+    state.publish(build_status("Основное", now, (("Почта", "#3498db"), started, changes, ("Созвон", "#e74c3c"))))
+    server = StatusServer(state).start()
+    base = f"http://127.0.0.1:{server.port}"
+    try:
+        code, etag, body = get(base + "/status")
+        assert code == 200 and json.loads(body)["task"] == "Почта", (code, body)
+        assert get(base + "/status", etag)[0] == 304
+
+        # Тот же слот на следующем тике — ETag не меняется
+        assert not state.publish(json.loads(body))
+
+        result = {}
+
+        def poll():
+            started = time.perf_counter()
+            result["response"] = get(base + "/status?wait=10", etag)
+            result["elapsed"] = time.perf_counter() - started
+
+        client = threading.Thread(target=poll)
+        client.start()
+        time.sleep(0.2)
+        changed_at = time.perf_counter()
+        state.publish(build_status("Основное", now + timedelta(minutes=20),
+                                   (("Созвон", "#e74c3c"), changes, started, ("Почта", "#3498db"))))
+        client.join()
+        code, new_etag, body = result["response"]
+        assert code == 200 and new_etag != etag and json.loads(body)["task"] == "Созвон"
+        print(f"long-poll: ответ через {(time.perf_counter() - changed_at) * 1000:.1f} мс после смены "
+              f"слота (ожидание {result['elapsed']:.2f} с)")
+
+        started = time.perf_counter()
+        assert get(base + "/status?wait=0.3", new_etag)[0] == 304
+        print(f"long-poll без смены: 304 через {time.perf_counter() - started:.2f} с")
+        # Созвон идет до следующей «Почты»: 23 ч 50 мин от текущей минуты
+        assert json.loads(body)["ends_at"] == (now + timedelta(hours=23, minutes=50)).timestamp()
+        line = get(base + "/status.txt")[2].decode("utf-8").strip()
+        assert line.startswith("Созвон · 23 ч"), line
+        print(line)
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    selftest()
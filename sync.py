@@ -0,0 +1,369 @@
+# sync.py
+"""Синхронизация расписаний между компьютерами через журнал изменений.
+
+Каждое изменение строки timetable (из редактора, командной строки или
+любого другого соединения) триггером дописывается в sync_log с версией
+(часы Лэмпорта, узел). Таблицы и триггеры создает миграция
+create_sync_log (migrations.py); писать в журнал триггеры начинают после
+первого SyncStore для этой базы (строка sync_state). Строка расписания — регистр "последний пишущий
+побеждает" по ключу (расписание, время): при слиянии применяется запись
+с большей версией, удаление — такая же запись с пометкой deleted.
+
+Узлы обмениваются только разницей: вектор версий {узел: последние часы}
+говорит, какие записи журнала у собеседника уже есть. Вектор хранится в
+sync_clocks и sync_state, а не считается по журналу: после успешной
+синхронизации журнал сжимается (compact), и последние записи узла могут
+из него пропасть. Транспорт подключаемый: LocalTransport (в том же
+процессе), HttpTransport + SyncServer (по сети).
+
+Сервер не проверяет, кто подключается, поэтому слушает 127.0.0.1, а другой
+компьютер подключается через SSH-туннель:
+
+    python timeanchor_cli.py sync-serve --port 8766                  на одном компьютере
+    ssh -N -L 8766:127.0.0.1:8766 host                               на другом, затем
+    python timeanchor_cli.py sync http://127.0.0.1:8766
+"""
+import json
+import sqlite3
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Поля записи журнала в порядке передачи
+FIELDS = ("timetable_name", "time", "task", "color", "duration", "deleted", "clock", "node")
+
+
+class SyncStore:
+    """Журнал изменений и слияние для одной базы timetable.db"""
+
+    def __init__(self, db_path):
+        self.conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self.lock = threading.Lock()
+        self.register()
+
+    def register(self):
+        """Включает журнал для базы: первый раз создает узел (строку
+        sync_state), после чего триггеры начинают писать в sync_log"""
+        with self.lock:
+            exists = self.conn.execute("SELECT 1 FROM sync_state").fetchone() is not None
+            if not exists:
+                # Узел новый: существующие строки попадают в журнал как его изменения
+                self.conn.execute("INSERT INTO sync_state (id, node, clock) VALUES (1, ?, 0)", (uuid.uuid4().hex,))
+                rows = self.conn.execute(
+                    "SELECT timetable_name, time, task, color, duration FROM timetable ORDER BY id").fetchall()
+                node = self.node
+                self.conn.executemany(
+                    "INSERT INTO sync_log (timetable_name, time, task, color, duration, deleted, clock, node) "
+                    "VALUES (?, ?, ?, ?, ?, 0, ?, ?)",
+                    [(*row, clock, node) for clock, row in enumerate(rows, 1)])
+                self.conn.execute("UPDATE sync_state SET clock = ?", (len(rows),))
+            self.conn.commit()
+
+    @property
+    def node(self):
+        return self.conn.execute("SELECT node FROM sync_state").fetchone()[0]
+
+    def version_vector(self):
+        """{узел: наибольшие часы его записей, полученных этим узлом}; свои —
+        часы из sync_state"""
+        with self.lock:
+            vector = dict(self.conn.execute("SELECT node, clock FROM sync_clocks"))
+            node, clock = self.conn.execute("SELECT node, clock FROM sync_state").fetchone()
+            vector[node] = clock
+            return vector
+
+    def changes_since(self, seen):
+        """Записи журнала, которых нет у собеседника с вектором версий seen"""
+        with self.lock:
+            changes = []
+            for node, in self.conn.execute("SELECT DISTINCT node FROM sync_log").fetchall():
+                changes.extend(self.conn.execute(
+                    f"SELECT {', '.join(FIELDS)} FROM sync_log WHERE node = ? AND clock > ? ORDER BY clock",
+                    (node, seen.get(node, 0))))
+            return [list(change) for change in changes]
+
+    def winner(self, timetable_name, time_str):
+        return self.conn.execute(
+            "SELECT clock, node FROM sync_log WHERE timetable_name = ? AND time = ? "
+            "ORDER BY clock DESC, node DESC LIMIT 1", (timetable_name, time_str)).fetchone()
+
+    def apply(self, changes):
+        """Сливает чужие записи; возвращает число измененных строк расписания"""
+        applied = 0
+        with self.lock:
+            with self.conn:
+                self.conn.execute("UPDATE sync_state SET applying = 1")
+                max_clock = 0
+                for name, time_str, task, color, duration, deleted, clock, node in changes:
+                    max_clock = max(max_clock, clock)
+                    winner = self.winner(name, time_str)
+                    cursor = self.conn.execute(
+                        "INSERT OR IGNORE INTO sync_log (timetable_name, time, task, color, duration, "
+                        "deleted, clock, node) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (name, time_str, task, color, duration, deleted, clock, node))
+                    if cursor.rowcount == 0 or (winner is not None and tuple(winner) >= (clock, node)):
+                        continue  # запись уже была или проиграла более новой
+                    if deleted:
+                        self.conn.execute("DELETE FROM timetable WHERE time = ? AND timetable_name = ?",
+                                          (time_str, name))
+                    else:
+                        self.conn.execute(
+                            "INSERT INTO timetable (time, task, color, duration, timetable_name) "
+                            "VALUES (?, ?, ?, ?, ?) ON CONFLICT(time, timetable_name) DO UPDATE SET "
+                            "task = excluded.task, color = excluded.color, duration = excluded.duration",
+                            (time_str, task, color, duration, name))
+                    applied += 1
+                # Записи узла приходят все после seen[узел], поэтому максимум
+                # полученных часов — новая граница для вектора версий
+                received = {}
+                for change in changes:
+                    received[change[7]] = max(received.get(change[7], 0), change[6])
+                self.conn.executemany(
+                    "INSERT INTO sync_clocks (node, clock) VALUES (?, ?) "
+                    "ON CONFLICT(node) DO UPDATE SET clock = MAX(clock, excluded.clock)", received.items())
+                # Свои следующие изменения должны быть новее всего увиденного
+                self.conn.execute("UPDATE sync_state SET applying = 0, clock = MAX(clock, ?)", (max_clock,))
+        return applied
+
+    def compact(self):
+        """Удаляет из журнала записи, проигравшие более новым по тому же ключу.
+        Вектор версий от этого не меняется: он хранится отдельно (sync_clocks)"""
+        with self.lock:
+            with self.conn:
+                cursor = self.conn.execute('''
+                    DELETE FROM sync_log WHERE seq NOT IN (
+                        SELECT seq FROM (
+                            SELECT seq, ROW_NUMBER() OVER (
+                                PARTITION BY timetable_name, time ORDER BY clock DESC, node DESC) AS place
+                            FROM sync_log) WHERE place = 1)''')
+            return cursor.rowcount
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class LocalTransport:
+    """Собеседник в том же процессе (и образец интерфейса транспорта)"""
+
+    def __init__(self, store):
+        self.store = store
+
+    def pull(self, seen):
+        """(записи, которых нет при векторе seen; вектор версий собеседника)"""
+        return self.store.changes_since(seen), self.store.version_vector()
+
+    def push(self, changes):
+        return self.store.apply(changes)
+
+
+class HttpTransport:
+    """Собеседник за SyncServer; тела запросов и ответов — JSON"""
+
+    def __init__(self, base_url, timeout=30):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.sent_bytes = 0
+        self.received_bytes = 0
+
+    def post(self, path, payload):
+        import urllib.request
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        request = urllib.request.Request(self.base_url + path, data=body,
+                                         headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            data = response.read()
+        self.sent_bytes += len(body)
+        self.received_bytes += len(data)
+        return json.loads(data)
+
+    def pull(self, seen):
+        result = self.post("/pull", {"seen": seen})
+        return result["changes"], result["seen"]
+
+    def push(self, changes):
+        return self.post("/push", {"changes": changes})["applied"]
+
+
+def sync(store, transport):
+    """Двусторонняя синхронизация за два обмена; возвращает (получено, отправлено).
+    После успешного обмена журнал сжимается: проигравшие записи больше не нужны"""
+    changes, remote_seen = transport.pull(store.version_vector())
+    received = store.apply(changes)
+    sent = store.changes_since(remote_seen)
+    if sent:
+        transport.push(sent)
+    store.compact()
+    return received, len(sent)
+
+
+def check_seen(seen):
+    """Вектор версий из запроса: {узел: часы}"""
+    if not isinstance(seen, dict) or not all(
+            isinstance(node, str) and isinstance(clock, int) for node, clock in seen.items()):
+        raise ValueError("seen: ожидается объект {узел: часы}")
+    return seen
+
+
+def check_changes(changes):
+    """Записи журнала из запроса: списки полей FIELDS"""
+    if not isinstance(changes, list) or not all(
+            isinstance(change, list) and len(change) == len(FIELDS) for change in changes):
+        raise ValueError(f"changes: ожидается список записей из {len(FIELDS)} полей")
+    return changes
+
+
+class SyncHandler(BaseHTTPRequestHandler):
+    server_version = "TimeAnchorSync"
+
+    def do_POST(self):
+        store = self.server.store
+        try:
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            if not isinstance(payload, dict):
+                raise ValueError("ожидается JSON-объект")
+            if self.path == "/pull":
+                result = {"changes": store.changes_since(check_seen(payload["seen"])),
+                          "seen": store.version_vector()}
+            elif self.path == "/push":
+                result = {"applied": store.apply(check_changes(payload["changes"]))}
+                store.compact()
+            else:
+                self.send_error(404)
+                return
+        except (ValueError, KeyError, TypeError, sqlite3.Error) as e:
+            # Текст ошибки — в теле: строка состояния только latin-1
+            self.send_error(400, explain=str(e))
+            return
+        body = json.dumps(result, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class SyncServer:
+    """HTTP-собеседник для HttpTransport в фоновом потоке"""
+
+    def __init__(self, store, port=0, host="127.0.0.1"):
+        self.httpd = ThreadingHTTPServer((host, port), SyncHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.store = store
+        self.thread = None
+
+    @property
+    def port(self):
+        return self.httpd.server_address[1]
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="sync-server", daemon=True)
+        self.thread.start()
+        return self
+
+    def serve_forever(self):
+        self.httpd.serve_forever()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def selftest(slots=1440):
+    """Два узла через локальный сервер: правки, конфликт, удаление, размер разницы"""
+    import os
+    import tempfile
+
+    from utils import create_demo_data
+
+    def table(db_path):
+        conn = sqlite3.connect(db_path)
+        try:
+            return dict(((name, t), (task, color, duration)) for name, t, task, color, duration in conn.execute(
+                "SELECT timetable_name, time, task, color, duration FROM timetable"))
+        finally:
+            conn.close()
+
+    def execute(db_path, sql, *params):
+        conn = sqlite3.connect(db_path)
+        conn.execute(sql, params)
+        conn.commit()
+        conn.close()
+
+    folder = tempfile.mkdtemp()
+    home_db, work_db = os.path.join(folder, "home.db"), os.path.join(folder, "work.db")
+    create_demo_data(home_db)
+    create_demo_data(work_db)
+    conn = sqlite3.connect(home_db)
+    conn.executemany("INSERT INTO timetable (time, task, color, timetable_name) VALUES (?, ?, ?, ?)",
+                     [(f"{m // 60:02d}:{m % 60:02d}", f"Задача {m % 37}", "#3498db", "Большое")
+                      for m in range(0, 1440, max(1, 1440 // slots))])
+    conn.commit()
+    conn.close()
+
+    home, work = SyncStore(home_db), SyncStore(work_db)
+    server = SyncServer(home).start()
+    transport = HttpTransport(f"http://127.0.0.1:{server.port}")
+    try:
+        print("первая синхронизация:", sync(work, transport), f"{transport.received_bytes} байт")
+        assert table(home_db) == table(work_db)
+
+        # Правки на обоих узлах, одна и та же строка — на обоих
+        execute(home_db, "UPDATE timetable SET task = 'Дом' WHERE time = '06:00' AND timetable_name = 'Основное'")
+        execute(work_db, "UPDATE timetable SET task = 'Работа' WHERE time = '06:00' AND timetable_name = 'Основное'")
+        execute(work_db, "INSERT INTO timetable (time, task, color, timetable_name) VALUES ('09:00', 'Почта', '#fff', 'Основное')")
+        execute(home_db, "DELETE FROM timetable WHERE time = '00:00' AND timetable_name = 'Большое'")
+        execute(home_db, "UPDATE timetable SET timetable_name = 'Перенос' WHERE time = '00:01' AND timetable_name = 'Большое'")
+
+        transport.sent_bytes = transport.received_bytes = 0
+        print("правки:", sync(work, transport),
+              f"{transport.sent_bytes + transport.received_bytes} байт, база {os.path.getsize(home_db)} байт")
+        print("повтор:", sync(work, transport))
+        assert table(home_db) == table(work_db), "узлы разошлись"
+        print("конфликт 06:00 ->", table(home_db)[("Основное", "06:00")][0])
+        assert ("Большое", "00:00") not in table(work_db) and ("Большое", "00:01") not in table(work_db)
+        assert ("Перенос", "00:01") in table(work_db)
+
+        # sync сжимает журнал на обоих узлах: остается одна запись на ключ
+        for db_path in (home_db, work_db):
+            conn = sqlite3.connect(db_path)
+            entries, keys = conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT timetable_name || ' ' || time) FROM sync_log").fetchone()
+            conn.close()
+            assert entries == keys, (db_path, entries, keys)
+        print(f"журнал после сжатия: {entries} записей")
+        assert sync(home, LocalTransport(work)) == (0, 0)
+
+        # Последняя запись узла проиграла более новой и удалена сжатием
+        # только у одного узла: вектор версий не уменьшается, и собеседник
+        # не присылает ее заново
+        execute(home_db, "UPDATE timetable SET task = 'Дом 2' WHERE time = '06:00' AND timetable_name = 'Основное'")
+        sync(work, transport)
+        execute(work_db, "UPDATE timetable SET task = 'Работа 2' WHERE time = '06:00' AND timetable_name = 'Основное'")
+        work.compact()
+        assert not LocalTransport(home).pull(work.version_vector())[0], "сжатие вернуло старые записи"
+        assert sync(work, transport) == (0, 1) and sync(work, transport) == (0, 0)
+        assert table(home_db) == table(work_db)
+
+        # Неверные запросы — 400, а не исключение в потоке сервера
+        import urllib.error
+        for path, payload in (("/pull", {"seen": []}), ("/pull", {"seen": {"узел": "1"}}), ("/pull", []),
+                              ("/push", {"changes": [[1, 2]]}), ("/push", {"changes": {}})):
+            try:
+                transport.post(path, payload)
+            except urllib.error.HTTPError as e:
+                assert e.code == 400, (path, payload, e.code)
+            else:
+                raise AssertionError(f"{path} {payload} принят")
+        print("неверные запросы: 400")
+    finally:
+        server.stop()
+        home.close()
+        work.close()
+
+
+if __name__ == "__main__":
+    selftest()
@@ -1,8 +1,6 @@
 import os
 import sys
-import random
 import json
-import webbrowser
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
     QLabel, QScrollArea, QMenu, QInputDialog, QMessageBox, QSizePolicy,
@@ -11,9 +9,12 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtCore import Qt, QStandardPaths
 from PyQt5.QtGui import QFont, QColor
 
+from action_runner import ActionRunner
+from task_catalog import TaskCatalog, TaskCategory, format_task_file, DEFAULT_COLOR
+
 
 class TimeAnchorApp(QWidget):
-    def __init__(self):
+    def __init__(self, ui_handlers=None):
         super().__init__()
         self.setWindowTitle("Task Generation")
         self.setGeometry(800, 400, 500, 350)
@@ -27,8 +28,15 @@ class TimeAnchorApp(QWidget):
         # Создание папок при первом запуске
         self.setup_folders()
 
-        # Загрузка конфигурации цветов
-        self.button_colors = self.load_button_colors()
+        # Каталог задач: разобранные файлы кэшируются в SQLite
+        self.catalog = TaskCatalog(self.task_folder, os.path.join(self.base_folder, "task_catalog.db"))
+        self.migrate_button_colors()
+
+        # Действия выполняются в пуле потоков, клик сразу возвращает управление
+        self.runner = ActionRunner(self, ui_handlers)
+        self.runner.started.connect(self.on_action_started)
+        self.runner.finished.connect(self.on_action_finished)
+        self.runner.failed.connect(self.on_action_failed)
 
         # Инициализация интерфейса
         self.init_ui()
@@ -44,32 +52,19 @@ class TimeAnchorApp(QWidget):
         test_file = os.path.join(self.task_folder, "Тест.txt")
         if not os.path.exists(test_file):
             with open(test_file, 'w', encoding='utf-8') as f:
-                f.write('"Тест прошёл успешно";\n')
+                f.write(format_task_file(TaskCategory("Тест", actions=[("Тест прошёл успешно", 1.0)])))
 
-        # Создание файла конфигурации цветов, если его нет
+    def migrate_button_colors(self):
+        """Переносит цвета из старого button_colors.json в заголовки файлов задач"""
         if not os.path.exists(self.config_file):
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump({}, f)
-
-    def load_button_colors(self):
-        """Загружает конфигурацию цветов кнопок"""
-        try:
-            if os.path.exists(self.config_file):
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-        except:
-            pass
-        return {}
-
-    def save_button_colors(self):
-        """Сохраняет конфигурацию цветов кнопок"""
+            return
         try:
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(self.button_colors, f, ensure_ascii=False, indent=2)
-            return True
+            with open(self.config_file, 'r', encoding='utf-8') as f:
+                colors = json.load(f)
+            self.catalog.migrate_colors(colors)
+            os.replace(self.config_file, self.config_file + ".migrated")
         except Exception as e:
-            self.show_error(f"Ошибка сохранения цветов: {str(e)}")
-            return False
+            print(f"Ошибка переноса цветов кнопок: {e}")
 
     def init_ui(self):
         """Инициализация пользовательского интерфейса"""
@@ -147,7 +142,7 @@ class TimeAnchorApp(QWidget):
         """)
 
     def load_buttons(self):
-        """Загружает кнопки из папки Task"""
+        """Загружает кнопки из каталога (разбираются только измененные файлы)"""
         # Очистка текущих кнопок
         while self.buttons_layout.count():
             item = self.buttons_layout.takeAt(0)
@@ -156,42 +151,29 @@ class TimeAnchorApp(QWidget):
                 widget.deleteLater()
 
         # Создание новых кнопок
-        for file_name in os.listdir(self.task_folder):
-            if file_name.endswith('.txt') and file_name != "button_colors.json":
-                name = os.path.splitext(file_name)[0]
-                self.create_button(name)
-
-    def create_button(self, name):
-        """Создает кнопку с заданным именем"""
-        btn = QPushButton(name)
-        btn.setMinimumSize(120, 40)
-        btn.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
+        for category in self.catalog.refresh().values():
+            self.create_button(category.name, category.color)
 
-        # Установка цвета кнопки
-        if name in self.button_colors:
-            color = self.button_colors[name]
-            btn.setStyleSheet(f"""
+    def button_style(self, color):
+        return f"""
                 QPushButton {{
-                    background-color: {color};
+                    background-color: {color or DEFAULT_COLOR};
                     color: white;
                     border: none;
                     padding: 8px 15px;
                     border-radius: 4px;
                     font-size: 14px;
                 }}
-            """)
-        else:
-            # Цвет по умолчанию
-            btn.setStyleSheet("""
-                QPushButton {
-                    background-color: #4a86e8;
-                    color: white;
-                    border: none;
-                    padding: 8px 15px;
-                    border-radius: 4px;
-                    font-size: 14px;
-                }
-            """)
+            """
+
+    def create_button(self, name, color=None):
+        """Создает кнопку с заданным именем"""
+        btn = QPushButton(name)
+        btn.setMinimumSize(120, 40)
+        btn.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
+
+        # Установка цвета кнопки
+        btn.setStyleSheet(self.button_style(color))
 
         # Контекстное меню
         btn.setContextMenuPolicy(Qt.CustomContextMenu)
@@ -199,9 +181,9 @@ class TimeAnchorApp(QWidget):
             lambda pos, b=btn: self.show_context_menu(pos, b)
         )
 
-        # Обработчик клика
+        # Обработчик клика (имя берется из кнопки, чтобы работало после переименования)
         btn.clicked.connect(
-            lambda checked, n=name: self.execute_action(n)
+            lambda checked, b=btn: self.execute_action(b.text())
         )
 
         self.buttons_layout.addWidget(btn)
@@ -227,7 +209,7 @@ class TimeAnchorApp(QWidget):
         help_text = """
         <b>Инструкция по работе с задачами</b>
         <p>1. <b>Добавление новой категории:</b> нажмите "+ Добавить", введите название.</p>
-        <p>2. <b>Добавление действий:</b> в папке Документы/TimeAnchor/Task создайте текстовый файл с именем категории. В каждой строке укажите одно действие в кавычках с точкой с запятой в конце. Вписание ссылки означает открытие в браузере по умолчанию</p>
+        <p>2. <b>Добавление действий:</b> в папке Документы/TimeAnchor/Task создайте текстовый файл с именем категории. Первая строка <i>#! timeanchor-tasks v1</i>, затем по одному действию в строке; <i>3 | действие</i> задает вес, <i>@color: #e67e22</i> и <i>@weight: 2</i> — цвет и вес категории, строки с # — комментарии. Старые файлы со строками "действие"; тоже читаются. Вписание ссылки означает открытие в браузере по умолчанию. Префиксы: <i>shell:</i> команда, <i>file:</i> путь к файлу, <i>timer:</i> ММ:СС (запуск таймера)</p>
         <p>3. <b>Выполнение действия:</b> нажмите на кнопку категории, чтобы выполнить случайное действие из нее.</p>
         <p>4. <b>Рандомное действие:</b> кнопка "🎲 Рандом" выполняет случайное действие из любой категории.</p>
         <p>5. <b>Контекстное меню:</b> нажмите правой кнопкой мыши на кнопке категории для переименования, удаления или смены цвета.</p>
@@ -242,7 +224,8 @@ class TimeAnchorApp(QWidget):
     def change_button_color(self, button):
         """Изменяет цвет кнопки"""
         name = button.text()
-        current_color = self.button_colors.get(name, "#4a86e8")
+        category = self.catalog.categories.get(name)
+        current_color = (category.color if category else None) or DEFAULT_COLOR
 
         # Диалог выбора цвета
         color = QColorDialog.getColor(QColor(current_color), self, "Выберите цвет кнопки")
@@ -250,23 +233,16 @@ class TimeAnchorApp(QWidget):
             hex_color = color.name()
 
             # Обновляем стиль кнопки
-            button.setStyleSheet(f"""
-                QPushButton {{
-                    background-color: {hex_color};
-                    color: white;
-                    border: none;
-                    padding: 8px 15px;
-                    border-radius: 4px;
-                    font-size: 14px;
-                }}
-            """)
+            button.setStyleSheet(self.button_style(hex_color))
 
-            # Сохраняем в конфигурацию
-            self.button_colors[name] = hex_color
-            self.save_button_colors()
+            # Цвет хранится в заголовке файла категории
+            try:
+                self.catalog.set_color(name, hex_color)
+            except Exception as e:
+                self.show_error(f"Ошибка сохранения цвета: {str(e)}")
 
     def rename_button(self, button):
-        """Переименовывает кнопку"""
+        """Переименовывает кнопку вместе с файлом категории"""
         old_name = button.text()
         new_name, ok = QInputDialog.getText(
             self,
@@ -276,21 +252,16 @@ class TimeAnchorApp(QWidget):
         )
 
         if ok and new_name and new_name != old_name:
-            # Обновляем цвет в конфигурации
-            if old_name in self.button_colors:
-                self.button_colors[new_name] = self.button_colors.pop(old_name)
-                self.save_button_colors()
+            try:
+                self.catalog.rename(old_name, new_name)
+            except Exception as e:
+                self.show_error(f"Ошибка переименования: {str(e)}")
+                return
 
             button.setText(new_name)
 
     def delete_button(self, button):
         """Удаляет кнопку из интерфейса"""
-        # Удаляем цвет из конфигурации
-        name = button.text()
-        if name in self.button_colors:
-            del self.button_colors[name]
-            self.save_button_colors()
-
         button.deleteLater()
 
     def add_new_button(self):
@@ -303,100 +274,53 @@ class TimeAnchorApp(QWidget):
 
         if ok and name:
             # Создаем связанный файл
-            file_path = os.path.join(self.task_folder, f"{name}.txt")
-            if not os.path.exists(file_path):
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write('"Пример действия";\n')
+            categories = self.catalog.create(name)
 
             # Создаем кнопку
-            self.create_button(name)
+            self.create_button(name, categories[name].color if name in categories else None)
 
     def refresh_buttons(self):
         """Обновляет список кнопок"""
         self.load_buttons()
         self.show_message("Кнопки обновлены")
 
-    def parse_action_file(self, file_name):
-        """Читает и парсит файл с действиями"""
-        file_path = os.path.join(self.task_folder, f"{file_name}.txt")
-
-        if not os.path.exists(file_path):
-            return None, f"Файл не найден: {file_name}.txt"
-
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                lines = [line.strip() for line in f.readlines() if line.strip()]
-        except Exception as e:
-            return None, f"Ошибка чтения файла: {str(e)}"
-
-        if not lines:
-            return None, f"Файл пуст: {file_name}.txt"
-
-        return lines, None
-
     def execute_action(self, button_name):
-        """Выполняет случайное действие из файла"""
-        try:
-            lines, error = self.parse_action_file(button_name)
+        """Выполняет случайное действие категории (в фоне, результат — сигналом)"""
+        self.catalog.refresh()
+        if button_name not in self.catalog.categories:
+            self.show_error(f"Файл не найден: {button_name}.txt")
+            return
 
-            if error:
-                self.show_error(error)
-                return
+        action = self.catalog.choose(button_name)
+        if action is None:
+            self.show_error(f"Файл пуст: {button_name}.txt")
+            return
 
-            # Выбираем случайное действие
-            action_line = random.choice(lines)
-
-            # Парсим действие
-            if action_line.startswith('"') and action_line.endswith('";'):
-                action = action_line[1:-2]
-            else:
-                action = action_line
-
-            # Выполняем действие
-            if action.startswith('http://') or action.startswith('https://'):
-                try:
-                    webbrowser.open(action)
-                    self.show_message(f"Открыто: {action}")
-                except Exception as e:
-                    self.show_error(f"Ошибка открытия ссылки: {str(e)}")
-            else:
-                self.show_message(action)
-        except Exception as e:
-            self.show_error(f"Ошибка: {str(e)}")
+        self.runner.run(action)
 
     def execute_random_action(self):
         """Выполняет случайное действие из всех файлов"""
-        all_actions = []
-
-        # Собираем все действия из всех файлов
-        for file_name in os.listdir(self.task_folder):
-            if file_name.endswith('.txt') and file_name != "button_colors.json":
-                lines, error = self.parse_action_file(os.path.splitext(file_name)[0])
-                if error or not lines:
-                    continue
-
-                for line in lines:
-                    if line.startswith('"') and line.endswith('";'):
-                        action = line[1:-2]
-                    else:
-                        action = line
-                    all_actions.append(action)
-
-        if not all_actions:
+        self.catalog.refresh()
+        action = self.catalog.choose_any()
+        if action is None:
             self.show_error("Нет доступных действий")
             return
 
-        # Выбираем и выполняем случайное действие
-        random_action = random.choice(all_actions)
+        self.runner.run(action, "Случайное действие")
 
-        if random_action.startswith('http://') or random_action.startswith('https://'):
-            try:
-                webbrowser.open(random_action)
-                self.show_message(f"Случайная ссылка: {random_action}")
-            except Exception as e:
-                self.show_error(f"Ошибка открытия ссылки: {str(e)}")
-        else:
-            self.show_message(f"Случайное действие: {random_action}")
+    def on_action_started(self, job_id, description):
+        self.show_message(f"Выполняется: {description}")
+
+    def on_action_finished(self, job_id, message):
+        self.show_message(message)
+
+    def on_action_failed(self, job_id, error):
+        self.show_error(error)
+
+    def closeEvent(self, event):
+        self.runner.shutdown()
+        self.catalog.close()
+        super().closeEvent(event)
 
     def show_message(self, text):
         """Отображает информационное сообщение"""
@@ -0,0 +1,266 @@
+# task_catalog.py
+import os
+import random
+import sqlite3
+
+from action_runner import strip_action_line
+
+
+FORMAT_HEADER = "#! timeanchor-tasks v1"
+DEFAULT_COLOR = "#4a86e8"
+
+
+class TaskCategory:
+    """Категория задач: файл Task/<name>.txt"""
+
+    __slots__ = ("name", "color", "weight", "actions")
+
+    def __init__(self, name, color=None, weight=1.0, actions=None):
+        self.name = name
+        self.color = color
+        self.weight = weight
+        self.actions = actions or []  # [(действие, вес)]
+
+    def choose(self):
+        if not self.actions:
+            return None
+        actions, weights = zip(*self.actions)
+        if not any(weights):
+            return None
+        return random.choices(actions, weights)[0]
+
+
+def parse_task_file(text):
+    """Разбирает файл задач; возвращает (версия, цвет, вес, [(действие, вес)]).
+
+    Формат v1:
+        #! timeanchor-tasks v1
+        @color: #e67e22
+        @weight: 2
+        # комментарий
+        3 | https://example.com
+        Просто текст
+
+    Файлы без заголовка читаются по-старому: строка "действие"; — одно действие.
+    """
+    lines = text.splitlines()
+    version = 0
+    header_prefix = FORMAT_HEADER.rsplit(" ", 1)[0]
+    if lines and lines[0].strip().lower().startswith(header_prefix):
+        tail = lines[0].strip()[len(header_prefix):].strip().lstrip("v")
+        version = int(tail) if tail.isdigit() else 1
+        lines = lines[1:]
+
+    color = None
+    weight = 1.0
+    actions = []
+    for raw in lines:
+        line = raw.strip()
+        if not line:
+            continue
+        action_weight = 1.0
+        if version:
+            if line.startswith("@"):
+                key, _, value = line[1:].partition(":")
+                key = key.strip().lower()
+                value = value.strip()
+                if key == "color" and value:
+                    color = value
+                elif key == "weight":
+                    weight = parse_weight(value, 1.0)
+                continue
+            if line.startswith("#"):
+                continue
+            head, separator, rest = line.partition("|")
+            if separator and is_number(head.strip()):
+                action_weight = parse_weight(head.strip(), 1.0)
+                line = rest.strip()
+        actions.append((strip_action_line(line), action_weight))
+    return version, color, weight, actions
+
+
+def format_task_file(category):
+    """Текст файла категории в формате v1"""
+    lines = [FORMAT_HEADER]
+    if category.color:
+        lines.append(f"@color: {category.color}")
+    if category.weight != 1.0:
+        lines.append(f"@weight: {category.weight:g}")
+    for action, weight in category.actions:
+        # Строки, похожие на служебные, сохраняются в кавычках
+        if action.startswith(("#", "@", '"')) or ("|" in action and is_number(action.partition("|")[0].strip())):
+            action = f'"{action}";'
+        lines.append(action if weight == 1.0 else f"{weight:g} | {action}")
+    return "\n".join(lines) + "\n"
+
+
+def is_number(text):
+    try:
+        float(text)
+        return True
+    except ValueError:
+        return False
+
+
+def parse_weight(text, default):
+    try:
+        return max(0.0, float(text))
+    except ValueError:
+        return default
+
+
+class TaskCatalog:
+    """Каталог категорий задач с кэшем в SQLite.
+
+    В кэше лежат разобранные действия всех файлов и (mtime, размер) каждого
+    файла. refresh() сверяет только метаданные папки, заново разбирает
+    изменившиеся файлы и читает все категории из кэша одним запросом.
+    """
+
+    def __init__(self, task_folder, cache_path):
+        self.task_folder = task_folder
+        self.conn = sqlite3.connect(str(cache_path))
+        self.categories = {}
+        self.loaded = False
+        self.create_tables()
+
+    def create_tables(self):
+        self.conn.execute('''CREATE TABLE IF NOT EXISTS task_files (
+                                name TEXT PRIMARY KEY,
+                                mtime_ns INTEGER NOT NULL,
+                                size INTEGER NOT NULL,
+                                version INTEGER NOT NULL,
+                                color TEXT,
+                                weight REAL NOT NULL DEFAULT 1)''')
+        self.conn.execute('''CREATE TABLE IF NOT EXISTS task_actions (
+                                name TEXT NOT NULL,
+                                position INTEGER NOT NULL,
+                                action TEXT NOT NULL,
+                                weight REAL NOT NULL DEFAULT 1,
+                                PRIMARY KEY (name, position)) WITHOUT ROWID''')
+        self.conn.commit()
+
+    def file_path(self, name):
+        return os.path.join(self.task_folder, f"{name}.txt")
+
+    def refresh(self):
+        """Синхронизирует кэш с папкой и возвращает категории по имени"""
+        on_disk = {}
+        with os.scandir(self.task_folder) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.endswith(".txt"):
+                    stat = entry.stat()
+                    on_disk[entry.name[:-4]] = (stat.st_mtime_ns, stat.st_size)
+
+        cached = {name: (mtime_ns, size) for name, mtime_ns, size in
+                  self.conn.execute("SELECT name, mtime_ns, size FROM task_files")}
+
+        changed = False
+        with self.conn:
+            for name in cached.keys() - on_disk.keys():
+                self.forget(name)
+                changed = True
+            for name, signature in on_disk.items():
+                if cached.get(name) != signature:
+                    self.reparse(name, signature)
+                    changed = True
+
+        # Без изменений на диске категории в памяти остаются актуальными
+        if changed or not self.loaded:
+            self.categories = self.load_cached()
+            self.loaded = True
+        return self.categories
+
+    def reparse(self, name, signature):
+        try:
+            with open(self.file_path(name), "r", encoding="utf-8") as f:
+                version, color, weight, actions = parse_task_file(f.read())
+        except Exception as e:
+            print(f"Ошибка чтения файла задач {name}: {e}")
+            return
+        self.forget(name)
+        self.conn.execute("INSERT INTO task_files (name, mtime_ns, size, version, color, weight) "
+                          "VALUES (?, ?, ?, ?, ?, ?)", (name, *signature, version, color, weight))
+        self.conn.executemany("INSERT INTO task_actions (name, position, action, weight) VALUES (?, ?, ?, ?)",
+                              [(name, i, action, w) for i, (action, w) in enumerate(actions)])
+
+    def forget(self, name):
+        self.conn.execute("DELETE FROM task_files WHERE name = ?", (name,))
+        self.conn.execute("DELETE FROM task_actions WHERE name = ?", (name,))
+
+    def load_cached(self):
+        """Все категории из кэша одним запросом"""
+        categories = {}
+        rows = self.conn.execute(
+            '''SELECT f.name, f.color, f.weight, a.action, a.weight
+               FROM task_files f LEFT JOIN task_actions a ON a.name = f.name
+               ORDER BY f.name, a.position''')
+        for name, color, weight, action, action_weight in rows:
+            category = categories.get(name)
+            if category is None:
+                category = categories[name] = TaskCategory(name, color, weight)
+            if action is not None:
+                category.actions.append((action, action_weight))
+        return categories
+
+    # --- Выбор действия ---
+
+    def choose(self, name):
+        category = self.categories.get(name)
+        return category.choose() if category else None
+
+    def choose_any(self):
+        """Случайное действие из всех категорий (вес = вес категории * вес действия)"""
+        pool = []
+        weights = []
+        for category in self.categories.values():
+            for action, weight in category.actions:
+                pool.append(action)
+                weights.append(category.weight * weight)
+        if not pool or not any(weights):
+            return None
+        return random.choices(pool, weights)[0]
+
+    # --- Изменение файлов ---
+
+    def write(self, category):
+        with open(self.file_path(category.name), "w", encoding="utf-8") as f:
+            f.write(format_task_file(category))
+
+    def create(self, name, actions=None):
+        if not os.path.exists(self.file_path(name)):
+            self.write(TaskCategory(name, actions=actions or [("Пример действия", 1.0)]))
+        return self.refresh()
+
+    def rename(self, old_name, new_name):
+        """Переименовывает категорию вместе с файлом"""
+        old_path = self.file_path(old_name)
+        new_path = self.file_path(new_name)
+        if os.path.exists(new_path):
+            raise FileExistsError(f"Категория уже существует: {new_name}")
+        if os.path.exists(old_path):
+            os.rename(old_path, new_path)
+        return self.refresh()
+
+    def set_color(self, name, color):
+        """Записывает цвет в заголовок файла (файл старого формата переводится в v1)"""
+        self.refresh()
+        category = self.categories.get(name)
+        if category is None:
+            return
+        category.color = color
+        self.write(category)
+        self.refresh()
+
+    def migrate_colors(self, colors):
+        """Переносит цвета из button_colors.json в заголовки файлов"""
+        self.refresh()
+        for name, color in colors.items():
+            category = self.categories.get(name)
+            if category is not None and not category.color:
+                category.color = color
+                self.write(category)
+        return self.refresh()
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,442 @@
+# theme.py
+import weakref
+from functools import lru_cache
+
+from PyQt5.QtGui import QColor, QPalette
+from PyQt5 import sip
+
+
+DEFAULT_ACCENT = "#3498db"
+
+
+class CompiledTheme:
+    """Готовые таблицы стилей и палитры для одной комбинации (тема, прозрачность, акцент)"""
+
+    def __init__(self, theme, opacity, accent):
+        self.theme = theme
+        self.opacity = opacity
+        self.accent = accent
+        self.key = (theme, opacity, accent)
+        dark = theme == "dark"
+
+        self.text_color = "#FFFFFF" if dark else "#333333"
+        self.stylesheets = {
+            "editor": EDITOR_DARK if dark else EDITOR_LIGHT,
+            "tab_active": f"font-weight: bold; border-bottom: 2px solid {accent};",
+            "tab": "",
+            "notification_editor": NOTIFICATION_EDITOR_DARK if dark else NOTIFICATION_EDITOR_LIGHT,
+            "help_message": HELP_MESSAGE_DARK if dark else HELP_MESSAGE_LIGHT,
+            "timer": TIMER_DARK if dark else TIMER_LIGHT,
+            "notification": "background: transparent;",
+            "notification_container": """
+            border-radius: 0;
+            border: none;
+        """,
+            "notification_task": f"""
+                    color: {self.text_color};
+                    font-weight: bold;
+                    font-size: 16px;
+                    padding: 10px;
+                    background-color: rgba(0, 0, 0, 50);
+                    border-radius: 5px;
+                """,
+            "notification_text": f"""
+            color: {self.text_color};
+            font-size: 14px;
+            padding: 15px;
+            background-color: rgba(0, 0, 0, 30);
+            border-radius: 5px;
+            line-height: 1.5;
+        """,
+        }
+
+        self._notification_palette = None
+
+        # Цвета оверлея, который рисуется вручную (overlay_widget.py)
+        alpha = int(opacity * 255)
+        if dark:
+            self.overlay_colors = {
+                "background": QColor(20, 20, 20, alpha),
+                "border": QColor("#444"),
+                "secondary": QColor("gray"),
+                "idle_task": QColor("#AAAAAA"),
+                "button": QColor("#333"),
+                "button_hover": QColor("#444"),
+                "button_text": QColor("#AAA"),
+                "button_text_hover": QColor("#FFF"),
+            }
+        else:
+            self.overlay_colors = {
+                "background": QColor(240, 240, 240, alpha),
+                "border": QColor("#444"),
+                "secondary": QColor("#333"),
+                "idle_task": QColor("#AAAAAA"),
+                "button": QColor("#EEE"),
+                "button_hover": QColor("#DDD"),
+                "button_text": QColor("#555"),
+                "button_text_hover": QColor("#000"),
+            }
+
+    @property
+    def notification_palette(self):
+        """Палитра фона окна уведомления (создается при первом обращении,
+        когда QApplication уже существует)"""
+        if self._notification_palette is None:
+            palette = QPalette()
+            if self.theme == "dark":
+                palette.setColor(QPalette.Window, QColor(20, 20, 20, 220))
+            else:
+                palette.setColor(QPalette.Window, QColor(240, 240, 240, 220))
+            self._notification_palette = palette
+        return self._notification_palette
+
+
+@lru_cache(maxsize=16)
+def compile_theme(theme, opacity, accent=DEFAULT_ACCENT):
+    """Компилирует тему один раз на комбинацию параметров"""
+    return CompiledTheme(theme, opacity, accent)
+
+
+class ThemeEngine:
+    """Применяет скомпилированную тему ко всем зарегистрированным виджетам.
+
+    Каждый виджет регистрируется с ролью (ключом таблицы стилей). При смене
+    темы все виджеты обновляются за один проход, а виджеты, у которых
+    таблица стилей не изменилась, пропускаются без повторного разбора.
+    Виджеты, которые рисуют себя сами, подключаются через attach() и
+    получают скомпилированную тему целиком в set_theme().
+    """
+
+    def __init__(self):
+        self.current = compile_theme("dark", 0.6)
+        self.widgets = weakref.WeakKeyDictionary()
+
+    def configure(self, settings):
+        """Выбирает тему по настройкам и применяет её, если она изменилась"""
+        compiled = compile_theme(
+            settings.get("theme", "dark"),
+            round(float(settings.get("opacity", 0.6)), 2),
+            settings.get("accent", DEFAULT_ACCENT))
+        if compiled is not self.current:
+            self.current = compiled
+            self.apply_all()
+        return compiled
+
+    def apply(self, widget, role):
+        """Регистрирует виджет и применяет к нему таблицу стилей роли"""
+        self.widgets[widget] = role
+        set_style(widget, self.current.stylesheets[role])
+
+    def attach(self, widget):
+        """Регистрирует виджет с собственной отрисовкой"""
+        self.widgets[widget] = None
+        widget.set_theme(self.current)
+
+    def apply_all(self):
+        """Один проход по всем зарегистрированным виджетам"""
+        for widget, role in list(self.widgets.items()):
+            if sip.isdeleted(widget):
+                self.widgets.pop(widget, None)
+                continue
+            if role is None:
+                widget.set_theme(self.current)
+            else:
+                set_style(widget, self.current.stylesheets[role])
+
+    def stylesheet(self, role):
+        return self.current.stylesheets[role]
+
+
+def set_style(widget, stylesheet):
+    """setStyleSheet без повторного разбора одинаковой таблицы стилей"""
+    if getattr(widget, "_applied_stylesheet", None) is stylesheet:
+        return
+    if widget.styleSheet() != stylesheet:
+        widget.setStyleSheet(stylesheet)
+    widget._applied_stylesheet = stylesheet
+
+
+EDITOR_DARK = """
+                QMainWindow {
+                background-color: rgba(45, 45, 45, 220);
+                border: none;
+                }
+                QWidget {
+                    background-color: #2d2d2d;
+                    color: #EEE;
+                }
+                QTableView {
+                    background-color: #333;
+                    color: #EEE;
+                    alternate-background-color: #3a3a3a;
+                }
+                QHeaderView::section {
+                    background-color: #444;
+                    color: #EEE;
+                    padding: 4px;
+                    border: 1px solid #555;
+                }
+                QGroupBox {
+                    border: 1px solid #555;
+                    border-radius: 5px;
+                    margin-top: 1ex;
+                    font-weight: bold;
+                }
+                QGroupBox::title {
+                    subcontrol-origin: margin;
+                    subcontrol-position: top center;
+                    padding: 0 5px;
+                    background-color: transparent;
+                    color: #EEE;
+                }
+                QLineEdit, QComboBox {
+                    background-color: #333;
+                    color: #EEE;
+                    border: 1px solid #555;
+                    padding: 3px;
+                    border-radius: 3px;
+                }
+                QPushButton {
+                    background-color: #444;
+                    color: #EEE;
+                    border: 1px solid #555;
+                    padding: 5px;
+                    border-radius: 4px;
+                }
+                QPushButton:hover {
+                    background-color: #555;
+                }
+                QPushButton:pressed {
+                    background-color: #666;
+                }
+            """
+
+EDITOR_LIGHT = """
+                QMainWindow {
+                background-color: rgba(240, 240, 240, 220);
+                border: none;
+                }
+                QWidget {
+                    background-color: #f0f0f0;
+                    color: #333;
+                }
+                QTableView {
+                    background-color: #FFF;
+                    color: #333;
+                    alternate-background-color: #f8f8f8;
+                }
+                QHeaderView::section {
+                    background-color: #e0e0e0;
+                    color: #333;
+                    padding: 4px;
+                    border: 1px solid #CCC;
+                }
+                QGroupBox {
+                    border: 1px solid #CCC;
+                    border-radius: 5px;
+                    margin-top: 1ex;
+                    font-weight: bold;
+                }
+                QGroupBox::title {
+                    subcontrol-origin: margin;
+                    subcontrol-position: top center;
+                    padding: 0 5px;
+                    background-color: transparent;
+                    color: #333;
+                }
+                QLineEdit, QComboBox {
+                    background-color: #FFF;
+                    color: #333;
+                    border: 1px solid #CCC;
+                    padding: 3px;
+                    border-radius: 3px;
+                }
+                QPushButton {
+                    background-color: #e0e0e0;
+                    color: #333;
+                    border: 1px solid #CCC;
+                    padding: 5px;
+                    border-radius: 4px;
+                }
+                QPushButton:hover {
+                    background-color: #d0d0d0;
+                }
+                QPushButton:pressed {
+                    background-color: #c0c0c0;
+                }
+            """
+
+NOTIFICATION_EDITOR_DARK = """
+                QDialog {
+                    background-color: #333;
+                    color: #EEE;
+                }
+                QFrame {
+                    background-color: #2d2d2d;
+                    border: 1px solid #444;
+                    border-radius: 5px;
+                }
+                QLabel, QRadioButton, QListWidget, QSpinBox, QCheckBox {
+                    color: #EEE;
+                }
+                QListWidget {
+                    background-color: #222;
+                    color: #EEE;
+                    border: 1px solid #444;
+                }
+                QLineEdit, QSpinBox {
+                    background-color: #333;
+                    color: #EEE;
+                    border: 1px solid #555;
+                }
+                QPushButton {
+                    background-color: #444;
+                    color: #EEE;
+                    border: 1px solid #555;
+                    padding: 5px;
+                    border-radius: 4px;
+                }
+                QPushButton:hover {
+                    background-color: #555;
+                }
+            """
+
+NOTIFICATION_EDITOR_LIGHT = """
+                QDialog {
+                    background-color: #f0f0f0;
+                    color: #333;
+                }
+                QFrame {
+                    background-color: #FFF;
+                    border: 1px solid #CCC;
+                    border-radius: 5px;
+                }
+                QListWidget {
+                    background-color: #FFF;
+                    color: #333;
+                    border: 1px solid #CCC;
+                }
+                QLineEdit, QSpinBox {
+                    background-color: #FFF;
+                    color: #333;
+                    border: 1px solid #CCC;
+                }
+                QPushButton {
+                    background-color: #e0e0e0;
+                    color: #333;
+                    border: 1px solid #CCC;
+                    padding: 5px;
+                    border-radius: 4px;
+                }
+                QPushButton:hover {
+                    background-color: #d0d0d0;
+                }
+            """
+
+HELP_MESSAGE_DARK = """
+                QMessageBox {
+                    background-color: #333;
+                }
+                QLabel {
+                    color: white;
+                }
+                QPushButton {
+                    background-color: #444;
+                    color: #EEE;
+                    border: 1px solid #555;
+                    padding: 5px;
+                    border-radius: 4px;
+                }
+                QPushButton:hover {
+                    background-color: #555;
+                }
+            """
+
+HELP_MESSAGE_LIGHT = """
+                QLabel {
+                    color: black;
+                }
+            """
+
+TIMER_DARK = """
+                QDialog {
+                    background-color: rgba(45, 45, 45, 200);
+                    border: none;
+                }
+                QLabel, QRadioButton {
+                    color: #EEE;
+                }
+                QLineEdit {
+                    background-color: #333;
+                    color: #EEE;
+                    border: 1px solid #555;
+                    border-radius: 3px;
+                    padding: 3px;
+                }
+                QPushButton {
+                    background-color: #444;
+                    color: #EEE;
+                    border: 1px solid #555;
+                    padding: 5px;
+                    border-radius: 4px;
+                }
+                QPushButton:hover {
+                    background-color: #555;
+                }
+                QPushButton:pressed {
+                    background-color: #666;
+                }
+                QPushButton:disabled {
+                    background-color: #333;
+                    color: #777;
+                }
+                QLCDNumber {
+                    background-color: #222;
+                    color: #0F0;
+                    border: 1px solid #444;
+                    border-radius: 5px;
+                }
+            """
+
+TIMER_LIGHT = """
+                QDialog {
+                background-color: rgba(240, 240, 240, 200);
+                border: none;
+                }
+                QLabel, QRadioButton {
+                    color: #333;
+                }
+                QLineEdit {
+                    background-color: #FFF;
+                    color: #333;
+                    border: 1px solid #CCC;
+                    border-radius: 3px;
+                    padding: 3px;
+                }
+                QPushButton {
+                    background-color: #e0e0e0;
+                    color: #333;
+                    border: 1px solid #CCC;
+                    padding: 5px;
+                    border-radius: 4px;
+                }
+                QPushButton:hover {
+                    background-color: #d0d0d0;
+                }
+                QPushButton:pressed {
+                    background-color: #c0c0c0;
+                }
+                QPushButton:disabled {
+                    background-color: #f8f8f8;
+                    color: #999;
+                }
+                QLCDNumber {
+                    background-color: #222;
+                    color: #0F0;
+                    border: 1px solid #444;
+                    border-radius: 5px;
+                }
+            """
+
+
+theme_engine = ThemeEngine()
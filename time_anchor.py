@@ -5,10 +5,8 @@ import time
 import sqlite3
 import json
 import random
-import threading
-from collections import OrderedDict
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta
 from PyQt5.QtWidgets import (
     QMainWindow, QLabel, QWidget, QVBoxLayout, QHBoxLayout,
     QPushButton, QDialog, QTreeWidget, QTreeWidgetItem, QLineEdit, QComboBox,
@@ -22,14 +20,31 @@ from PyQt5.QtGui import (
 )
 from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent
 from PyQt5.QtMultimediaWidgets import QVideoWidget
+from PyQt5 import sip
 
 from utils import normalize_time, get_data_folder_path, get_db_path
-from notification import NotificationWindow
+from migrations import migrate
+from notification import NotificationWindow, read_notification_lines
+from notification_plan import NotificationPlan, PLAN_SETTINGS
+from catchup import ClockWatch, resolve_missed, CATCHUP_POLICIES
+from notification_dispatcher import NotificationDispatcher, Alert
 from timetable_editor import TimetableEditor
 from timer_window import TimerWindow
-
-# Глобальная блокировка для работы с БД
-db_lock = threading.Lock()
+from activity_log import ActivityLog
+from latency import LatencyRecorder
+from tracing import tracer, traced, EventLoopSampler
+from diagnostics import LeakAuditor, AUDIT_ENV
+from theme import theme_engine
+from overlay_widget import OverlayCanvas
+from overlay_screens import OverlayScreens, corner_position
+from schedule_snapshot import ScheduleStore, read_snapshot
+from compiled_schedule import load_compiled, write_compiled
+from compact_timetable import FREE_TIME, current_slot
+from search_index import SearchIndex
+from search_dialog import SearchDialog, IndexWatcher
+from status_server import StatusState, StatusServer, build_status
+from shared import db_lock, event_bus
+from event_bus import SlotChanged, TimetableSwitched, SettingsChanged
 
 
 class TimeOverlay(QMainWindow):
@@ -43,6 +58,7 @@ class TimeOverlay(QMainWindow):
         self.data_folder_path = Path.home() / "Documents" / "TimeAnchor"
         self.data_folder_path.mkdir(parents=True, exist_ok=True)
         self.db_path = self.data_folder_path / "timetable.db"
+        self.compiled_path = self.data_folder_path / "schedule.bin"
         self.settings_path = self.data_folder_path / "settings.json"
 
         # Настройки по умолчанию
@@ -56,39 +72,125 @@ class TimeOverlay(QMainWindow):
             "sound_now_file": None,
             "timer_sound_file": None,
             "theme": "dark",
-            "opacity": 0.6  # Изменено на 60% прозрачность
+            "opacity": 0.6,  # Изменено на 60% прозрачность
+            "accent": "#3498db",
+            "overlay_screens": "primary",  # "primary", "all" или список имен экранов
+            "catchup_policy": "latest",  # "skip", "latest" или "all" (см. catchup.py)
+            "trace_enabled": False,
+            "audit_enabled": False,
+            "status_port": 0  # порт локального API текущей задачи (status_server.py), 0 — выключен
         }
 
+        # Источник текущего времени (подменяется в нагрузочном прогоне soak.py)
+        self.clock = datetime.now
+        self.monotonic = time.monotonic
+
         # Загрузка настроек
         self.load_settings()
+        theme_engine.configure(self.settings)
+
+        # Трассировка горячих путей (выключена по умолчанию)
+        if self.settings["trace_enabled"]:
+            tracer.enable()
+        if tracer.enabled:
+            if not tracer.output_path:
+                tracer.output_path = str(self.data_folder_path / "trace.json")
+            self.loop_sampler = EventLoopSampler(self)
+            self.loop_sampler.start()
+
+        # Аудит памяти и времени жизни виджетов для долгих сессий
+        self.auditor = None
+        if self.settings["audit_enabled"] or os.environ.get(AUDIT_ENV, "0") != "0":
+            self.auditor = LeakAuditor()
+            self.auditor.start(self)
+        self.audit_panel = None
         self.create_notification_resources()
 
+        # Расписание публикуется неизменяемыми снимками; план уведомлений
+        # перестраивается по версии снимка и ревизии настроек плана
+        self.schedule = ScheduleStore(self.settings["active_timetable"])
+        self.plan_revision = 0
+        # Снимок, отображенный из schedule.bin: перед перезаписью файла
+        # отображение закрывается (save_compiled)
+        self.mapped_schedule = None
+
         # Инициализация БД
         self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
         self.create_database()
         self.load_timetable()
 
+        # Полнотекстовый поиск по расписаниям, файлам задач и текстам уведомлений
+        self.search_index = None
+        self.search_dialog = None
+        try:
+            self.search_index = SearchIndex(
+                self.db_path, self.data_folder_path / "Task",
+                [self.data_folder_path / "before.txt", self.data_folder_path / "now.txt"])
+            self.index_watcher = IndexWatcher(self.search_index, self)
+        except sqlite3.Error as e:
+            print(f"Ошибка создания поискового индекса: {e}")
+
+        # Журнал активности по задачам
+        self.activity_log = ActivityLog(self.data_folder_path / "activity.db")
+
         # Медиаплееры для звуков
         self.media_player = QMediaPlayer()  # Для основного звука
         self.notification_player = QMediaPlayer()  # Для уведомлений
-        self.timer_player = QMediaPlayer()  # Для таймера
+
+        # Замер задержек уведомлений: план -> показ -> начало звука
+        self.latency = LatencyRecorder()
+        self.pending_sound_timings = []
+        self.notification_player.setNotifyInterval(50)
+        self.notification_player.positionChanged.connect(self.on_notification_sound_position)
+        self.latency_panel = None
+
+        # Очередь уведомлений: одно окно, объединение и ограничение частоты
+        self.notification = None
+        self.dispatcher = NotificationDispatcher(
+            self.present_alert,
+            self.play_alert_sound,
+            lambda: self.notification_player.state() == QMediaPlayer.PlayingState,
+            clock=lambda: self.monotonic())
+
+        # Локальный API текущей задачи для внешних виджетов
+        self.status_state = StatusState()
+        self.status_server = None
+        if self.settings["status_port"]:
+            try:
+                self.status_server = StatusServer(self.status_state, self.settings["status_port"]).start()
+            except OSError as e:
+                print(f"Ошибка запуска сервера состояния: {e}")
 
         # Основной интерфейс
         self.init_ui()
+        self.screens = OverlayScreens(self)
         self.setup_hotkeys()
 
         self.adjustSize()
         self.move_to_corner()
 
+        # Подписка на изменения из редакторов (снимается в closeEvent: шина
+        # общая для процесса и переживает окно)
+        self.subscriptions = [
+            (SlotChanged, self.on_slot_changed),
+            (TimetableSwitched, self.on_timetable_switched),
+            (SettingsChanged, self.on_settings_changed),
+        ]
+        for event_type, handler in self.subscriptions:
+            event_bus.subscribe(event_type, handler)
+
         # Таймер для проверки расписания
         self.timer = QTimer(self)
         self.timer.timeout.connect(self.check_timetable_loop)
         self.timer.start(2000)  # Каждые 2 секунды
 
-        # Переменные для уведомлений
-        self.last_notified_before = None
-        self.last_notified_now = None
-        self.current_day = datetime.now().day  # Для отслеживания смены дня
+        # План уведомлений строится заново при изменении расписания
+        self.notification_plan = None
+
+        # Обнаружение сна и перевода часов между тиками
+        self.clock_watch = ClockWatch(self.timer.interval() / 1000,
+                                      wall=lambda: self.clock().timestamp(),
+                                      mono=lambda: self.monotonic())
 
         # Позиционирование будет в showEvent
 
@@ -98,236 +200,47 @@ class TimeOverlay(QMainWindow):
         self.task_window = None
 
     def move_to_corner(self):
-        """Позиционирует окно в правом верхнем углу активного экрана"""
-        screen_geometry = QApplication.primaryScreen().availableGeometry()
-        self.move(screen_geometry.width() - self.width() - 20, 20)
+        """Позиционирует окно в правом верхнем углу основного экрана"""
+        self.move(corner_position(QApplication.primaryScreen(), self.size(), top=20))
 
     def showEvent(self, event):
-        """Позиционирование окна при показе"""
+        """Позиционирование окна при показе и копии на других мониторах"""
         super().showEvent(event)
-        screen_geometry = QApplication.desktop().availableGeometry()
-        self.move(screen_geometry.width() - self.width() - 20, 50)
+        self.move(corner_position(QApplication.primaryScreen(), self.size()))
+        self.screens.sync()
+        self.screens.show()
 
     def init_ui(self):
-        """Инициализация пользовательского интерфейса с подложкой"""
-        # Создаем главный контейнер
-        main_container = QWidget(self)
-        main_container.setObjectName("MainContainer")
-        main_container.setGeometry(0, 0, 500, 350)
-
-        # Создаем полупрозрачную подложку
-        self.background = QWidget(main_container)
-        self.background.setObjectName("Background")
-        self.background.setGeometry(0, 0, main_container.width(), main_container.height())
-
-        # Создаем интерфейс поверх подложки
-        self.create_overlay_ui(main_container)
+        """Инициализация пользовательского интерфейса: один виджет с собственной отрисовкой"""
+        self.canvas = OverlayCanvas(self)
+        self.canvas.buttonClicked.connect(self.on_overlay_button)
+        self.setCentralWidget(self.canvas)
 
         # Применяем стили
         self.apply_styles()
-        self.setCentralWidget(main_container)
-
-        # Устанавливаем обработчик изменения размера
-        main_container.installEventFilter(self)
-
-    def eventFilter(self, obj, event):
-        """Обработка изменения размера окна"""
-        if event.type() == event.Resize:
-            # Обновляем размер подложки при изменении размера окна
-            self.background.setGeometry(0, 0, obj.width(), obj.height())
-        return super().eventFilter(obj, event)
-
-    def create_overlay_ui(self, parent):
-        """Создает элементы интерфейса поверх подложки"""
-        # Главный вертикальный лейаут
-        main_layout = QVBoxLayout(parent)
-        main_layout.setContentsMargins(10, 10, 10, 10)
-        main_layout.setSpacing(5)
-
-        # Область для перетаскивания окна
-        self.drag_widget = QWidget()
-        self.drag_widget.setFixedHeight(5)
-        self.drag_widget.setStyleSheet("background-color: transparent;")
-
-        # Верхняя панель с кнопками управления
-        top_button_frame = QWidget()
-        top_button_layout = QHBoxLayout(top_button_frame)
-        top_button_layout.setAlignment(Qt.AlignRight)
-        top_button_layout.setContentsMargins(0, 0, 0, 0)
-
-        # Кнопка таймера
-        self.timer_button = QPushButton("⏱")
-        self.timer_button.setFixedSize(30, 30)
-        self.timer_button.setStyleSheet(self.get_button_style())
-        self.timer_button.clicked.connect(self.open_timer_window)
-
-        # Кнопка задач
-        self.task_button = QPushButton("📋")
-        self.task_button.setFixedSize(30, 30)
-        self.task_button.setStyleSheet(self.get_button_style())
-        self.task_button.clicked.connect(self.open_task_window)
-
-        # Кнопка настроек
-        self.settings_button = QPushButton("⚙")
-        self.settings_button.setFixedSize(30, 30)
-        self.settings_button.setStyleSheet(self.get_button_style())
-        self.settings_button.clicked.connect(self.open_timetable_editor)
-
-        # Добавляем кнопки на панель
-        top_button_layout.addStretch()
-        top_button_layout.addWidget(self.timer_button)
-        top_button_layout.addWidget(self.task_button)
-        top_button_layout.addWidget(self.settings_button)
-
-        # Основной лейбл с задачей
-        self.task_label = QLabel("← Инициализация →")
-        self.task_label.setAlignment(Qt.AlignCenter)
-        self.task_label.setFont(QFont("Consolas", 18))
-        self.task_label.setStyleSheet("color: #00FF00; background-color: transparent;")
-
-        # Время начала и окончания
-        time_frame = QWidget()
-        time_layout = QHBoxLayout(time_frame)
-        time_layout.setContentsMargins(0, 0, 0, 0)
-
-        self.time_start_label = QLabel("")
-        self.time_start_label.setFont(QFont("Consolas", 10))
-        self.time_start_label.setStyleSheet("color: gray;")
-
-        self.time_end_label = QLabel("")
-        self.time_end_label.setFont(QFont("Consolas", 10))
-        self.time_end_label.setStyleSheet("color: gray;")
-        self.time_end_label.setAlignment(Qt.AlignRight)
-
-        time_layout.addWidget(self.time_start_label)
-        time_layout.addStretch()
-        time_layout.addWidget(self.time_end_label)
-
-        # Следующая задача
-        self.next_task_label = QLabel("")
-        self.next_task_label.setFont(QFont("Consolas", 10))
-        self.next_task_label.setStyleSheet("color: gray;")
-        self.next_task_label.setAlignment(Qt.AlignRight)
-        self.next_task_label.setWordWrap(True)
-
-        # Сборка основного интерфейса
-        main_layout.addWidget(self.drag_widget)
-        main_layout.addWidget(top_button_frame)
-        main_layout.addWidget(self.task_label)
-        main_layout.addWidget(time_frame)
-        main_layout.addWidget(self.next_task_label)
 
         # Устанавливаем минимальные размеры
         self.setMinimumSize(200, 130)
 
+    def on_overlay_button(self, name):
+        if name == "timer":
+            self.open_timer_window()
+        elif name == "task":
+            self.open_task_window()
+        elif name == "settings":
+            self.open_timetable_editor()
+
+    @traced()
     def apply_styles(self):
-        """Применяет стили к элементам интерфейса"""
-        # Определяем цвета в зависимости от темы
-        if self.settings["theme"] == "dark":
-            bg_color = f"rgba(20, 20, 20, {int(self.settings['opacity'] * 255)})"
-            text_color = "#EEE"
-            button_hover = "#555"
-            button_pressed = "#666"
-        else:
-            bg_color = f"rgba(240, 240, 240, {int(self.settings['opacity'] * 255)})"
-            text_color = "#333"
-            button_hover = "#d0d0d0"
-            button_pressed = "#c0c0c0"
-
-        # Устанавливаем стили
-        self.setStyleSheet(f"""
-            #Background {{
-                background-color: {bg_color};
-                border-radius: 10px;
-                border: 1px solid #444;
-            }}
-            #MainContainer {{
-                background: transparent;
-            }}
-            QPushButton {{
-                background-color: #444;
-                color: {text_color};
-                border: none;
-                border-radius: 15px;
-                font-size: 14px;
-            }}
-            QPushButton:hover {{
-                background-color: {button_hover};
-            }}
-            QPushButton:pressed {{
-                background-color: {button_pressed};
-            }}
-            #CloseButton {{
-                background-color: #ff5555;
-                color: white;
-                border-radius: 12px;
-                font-weight: bold;
-                font-size: 16px;
-            }}
-            #CloseButton:hover {{
-                background-color: #ff7777;
-            }}
-            #CloseButton:pressed {{
-                background-color: #ff3333;
-            }}
-            QLabel {{
-                color: {text_color};
-                background-color: transparent;
-            }}
-        """)
-
-        # Дополнительные стили для светлой темы
-        if self.settings["theme"] == "light":
-            self.time_start_label.setStyleSheet("color: #333;")
-            self.time_end_label.setStyleSheet("color: #333;")
-            self.next_task_label.setStyleSheet("color: #333;")
-
-    def get_button_style(self):
-        if self.settings["theme"] == "dark":
-            return """
-                QPushButton {
-                    background-color: #333;
-                    color: #AAA;
-                    border: none;
-                    border-radius: 15px;
-                }
-                QPushButton:hover {
-                    background-color: #444;
-                    color: #FFF;
-                }
-            """
-        else:
-            return """
-                QPushButton {
-                    background-color: #EEE;
-                    color: #555;
-                    border: none;
-                    border-radius: 15px;
-                }
-                QPushButton:hover {
-                    background-color: #DDD;
-                    color: #000;
-                }
-            """
-
-    def apply_theme(self):
-        # Установка цвета текста для светлой темы
-        if self.settings["theme"] == "light":
-            self.time_start_label.setStyleSheet("color: #333;")
-            self.time_end_label.setStyleSheet("color: #333;")
-            self.next_task_label.setStyleSheet("color: #333;")
+        """Передает скомпилированную тему оверлею"""
+        with tracer.span("repolish:overlay"):
+            theme_engine.attach(self.canvas)
 
     def create_database(self):
         with db_lock:
-            cursor = self.conn.cursor()
-            cursor.execute('''CREATE TABLE IF NOT EXISTS timetable (
-                                id INTEGER PRIMARY KEY,
-                                time TEXT NOT NULL,
-                                task TEXT,
-                                color TEXT,
-                                timetable_name TEXT,
-                                UNIQUE(time, timetable_name))''')
-            self.conn.commit()
+            # WAL: чтение снимков расписания не ждет записи редактора
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            migrate(self.conn)
 
     def load_settings(self):
         try:
@@ -363,93 +276,91 @@ class TimeOverlay(QMainWindow):
             with open(now_txt, 'w', encoding='utf-8') as f:
                 f.write('"Уже началось!";\n"Действуй! :)";')
 
+    @property
+    def timetable(self):
+        """Текущий снимок расписания (читается без блокировок)"""
+        return self.schedule.current
+
+    def plan_version(self):
+        return (self.schedule.current.version, self.plan_revision)
+
+    @traced()
     def load_timetable(self):
-        self.timetable = OrderedDict()
-        with db_lock:
-            cursor = self.conn.cursor()
-            cursor.execute(
-                "SELECT time, task, color, timetable_name FROM timetable WHERE timetable_name = ? ORDER BY time",
-                (self.settings["active_timetable"],))
+        name = self.settings["active_timetable"]
+        # Свежий скомпилированный файл отображается в память без запроса к БД
+        compiled = load_compiled(self.compiled_path, self.db_path, name)
+        if compiled is not None:
+            self.mapped_schedule = compiled
+            self.schedule.publish(compiled)
+            return
+        try:
+            self.save_compiled(self.schedule.reload(self.db_path, name))
+        except Exception as e:
+            print(f"Ошибка загрузки расписания: {e}")
 
-            for time_str, task, color, timetable_name in cursor.fetchall():
-                self.timetable[time_str] = (task, color)
+    def save_compiled(self, snapshot):
+        # Файл — всегда активное расписание (timeanchor_cli берет из него
+        # имя); поздняя загрузка уже переключенного расписания не пишется
+        if snapshot.timetable_name != self.settings["active_timetable"]:
+            return
+        try:
+            if snapshot.content_version is None:
+                # Снимок после правки в памяти не знает версию содержимого
+                # БД — файл собирается из того, что в БД на самом деле
+                snapshot = read_snapshot(self.db_path, snapshot.timetable_name)
+            mapped, self.mapped_schedule = self.mapped_schedule, None
+            if mapped is not None:
+                mapped.release()
+            write_compiled(self.compiled_path, snapshot, self.db_path)
+        except Exception as e:
+            print(f"Ошибка сохранения скомпилированного расписания: {e}")
+
+    def on_slot_changed(self, event):
+        """Применяет изменение одной строки из редактора без перечитывания БД"""
+        snapshot = self.schedule.apply_edit(event.edit)
+        if snapshot.timetable_name == event.edit.timetable_name:
+            self.save_compiled(snapshot)
+
+    def on_timetable_switched(self, event):
+        self.settings["active_timetable"] = event.name
+        self.save_settings()
+        # Новое расписание читается в фоне; тик подхватит снимок после публикации
+        self.schedule.reload_async(self.db_path, event.name, self.save_compiled)
+
+    def on_settings_changed(self, event):
+        """Настройки принадлежат оверлею: применяем и сохраняем изменения"""
+        self.settings.update(event.changes)
+        self.save_settings()
+        if {"theme", "opacity", "accent"} & set(event.changes):
+            # Один проход по всем окнам с уже скомпилированной темой
+            with tracer.span("repolish:theme_switch"):
+                theme_engine.configure(self.settings)
+        if set(PLAN_SETTINGS) & set(event.changes):
+            # Редактор уведомлений присылает их и при сохранении текстов
+            self.plan_revision += 1
+        if "overlay_screens" in event.changes:
+            self.screens.sync()
+        if "active_timetable" in event.changes:
+            # Смена расписания приходит как TimetableSwitched, здесь — только
+            # переименование активного: слоты те же, меняется имя снимка
+            self.save_compiled(self.schedule.rename(event.changes["active_timetable"]))
 
     def setup_hotkeys(self):
         # В PyQt5 глобальные горячие клавиши сложнее реализовать
         # Для простоты оставим обработку внутри приложения
         pass
 
-    def time_str_to_minutes(self, time_str):
-        t = datetime.strptime(time_str, "%H:%M").time()
-        return t.hour * 60 + t.minute
-
+    @traced()
     def get_current_task(self):
+        """Текущая задача и следующая (см. compact_timetable.current_slot)"""
         try:
-            """Полностью переработанный метод для поддержки задач после полуночи"""
-            now = datetime.now()
-            current_time = now.time()
-            current_min = current_time.hour * 60 + current_time.minute
+            now = self.clock()
+            current = current_slot(self.timetable, now.hour * 60 + now.minute)
 
             # Если расписание пустое
-            if not self.timetable:
+            if current is None:
                 return ("Фокус на сводных целях", "#FFFFFF"), None, None, None
-
-            # Получим список временных меток и преобразуем в минуты
-            times = list(self.timetable.keys())
-            sorted_times = sorted(times, key=self.time_str_to_minutes)
-
-            # Проверим, есть ли задачи после полуночи
-            has_midnight_task = any(self.time_str_to_minutes(t) < 360 for t in sorted_times)
-
-            # Если есть задачи после полуночи и текущее время после полуночи
-            if has_midnight_task and current_time.hour < 6:
-                # Добавим 24 часа к задачам после полуночи
-                adjusted_times = [
-                    (t, self.time_str_to_minutes(t) + (1440 if self.time_str_to_minutes(t) < 360 else 0))
-                    for t in sorted_times
-                ]
-            else:
-                adjusted_times = [(t, self.time_str_to_minutes(t)) for t in sorted_times]
-
-            # Сортируем по скорректированному времени
-            adjusted_times.sort(key=lambda x: x[1])
-            sorted_times = [t[0] for t in adjusted_times]
-
-            # Определим текущую задачу
-            for i in range(len(sorted_times)):
-                start_time = sorted_times[i]
-                start_min = self.time_str_to_minutes(start_time)
-
-                # Корректировка для задач после полуночи
-                if has_midnight_task and start_min < 360 and current_time.hour < 6:
-                    start_min += 1440
-
-                if i == len(sorted_times) - 1:
-                    # Последняя задача в расписании
-                    task_data = self.timetable[start_time]
-                    return task_data, start_time, None, None
-
-                next_time = sorted_times[i + 1]
-                next_min = self.time_str_to_minutes(next_time)
-
-                # Корректировка для задач после полуночи
-                if has_midnight_task and next_min < 360 and current_time.hour < 6:
-                    next_min += 1440
-
-                if start_min <= current_min < next_min:
-                    task_data = self.timetable[start_time]
-                    next_task_data = self.timetable[next_time]
-                    return task_data, start_time, next_time, next_task_data
-
-            # Если не нашли подходящей задачи (текущее время раньше первой задачи)
-            first_time = sorted_times[0]
-            task_data = self.timetable[first_time]
-
-
-            for time_str, (task, color) in self.timetable.items():
-                print(f"  {time_str}: {task}")
-
-            return (task, color), start_time, next_time
+            return current
 
         except Exception as e:
             print(f"Ошибка в get_current_task: {e}")
@@ -497,24 +408,22 @@ class TimeOverlay(QMainWindow):
             self.render_timetable_tabs()
             self.render_active_timetable_radio()
 
+    @traced()
     def update_overlay(self, task, color, start_time=None, end_time=None, next_task_data=None, play_sound=False):
         if task:
-            self.task_label.setText(f"← {task} →")
-            self.task_label.setStyleSheet(f"color: {color}; background-color: transparent;")
-        else:
-            self.task_label.setText("← До начала дня →")
-            self.task_label.setStyleSheet("color: #AAAAAA; background-color: transparent;")
-
-        self.time_start_label.setText(start_time if start_time else "")
-        self.time_end_label.setText(end_time if end_time else "")
-
-        if next_task_data:
-            next_task, _ = next_task_data
-            self.next_task_label.setText(next_task)
+            task_text = f"← {task} →"
         else:
-            self.next_task_label.setText("")
-
-        self.adjustSize()
+            task_text = "← До начала дня →"
+            color = self.canvas.colors["idle_task"] if self.canvas.colors else "#AAAAAA"
+        next_task = next_task_data[0] if next_task_data else ""
+
+        # Перерисовываются только изменившиеся поля; размер окна меняется редко
+        with tracer.span("repaint:overlay"):
+            resized = self.canvas.set_values(task_text, color, start_time or "", end_time or "", next_task)
+        if resized:
+            with tracer.span("adjustSize"):
+                self.adjustSize()
+        self.screens.update(self.canvas)
 
         if play_sound and self.settings["sound_file"]:
             try:
@@ -528,94 +437,218 @@ class TimeOverlay(QMainWindow):
             except Exception as e:
                 print(f"Ошибка воспроизведения звука: {e}")
 
+    @traced()
     def check_timetable_loop(self):
         try:
-            now = datetime.now()
-            # Сброс уведомлений при смене дня
-            if now.day != self.current_day:
-                self.last_notified_before = None
-                self.last_notified_now = None
-                self.current_day = now.day
-
-            current_time = now.time()
-            now_minutes = current_time.hour * 60 + current_time.minute
+            now = self.clock()
+            jump = self.clock_watch.check()
 
             # Получаем текущую задачу
-            (task, color), start_time, next_time, next_task_data = self.get_current_task()
-
-            # Проверка для уведомлений
-            if self.settings["notification_enabled"]:
-                # Для before-уведомления (за N минут)
-                if next_time:
-                    next_time_obj = datetime.strptime(next_time, "%H:%M").time()
-                    next_minutes = next_time_obj.hour * 60 + next_time_obj.minute
-
-                    # Коррекция для событий после полуночи
-                    if current_time.hour >= 18 and next_time_obj.hour < 6:
-                        next_minutes += 1440  # Добавляем сутки в минутах
-
-                    time_diff = next_minutes - now_minutes
-
-                    # Проверка на интервал времени до события
-                    if 0 <= time_diff <= self.settings["notification_before_mins"]:
-                        if next_time != self.last_notified_before:
-                            task_name = next_task_data[0] if next_task_data else "Следующее событие"
-                            self.show_notification("before", task_name)
-                            self.last_notified_before = next_time
-
-                # Для now-уведомления (точное время начала)
-                if start_time:
-                    task_time = datetime.strptime(start_time, "%H:%M").time()
-                    if (task_time.hour == current_time.hour and
-                            task_time.minute == current_time.minute and
-                            start_time != self.last_notified_now):
-                        self.show_notification("now", task)
-                        self.last_notified_now = start_time
+            task_data, start_time, next_time, next_task_data = self.get_current_task()
+            task, color = task_data
+
+            # Уведомления берутся из заранее построенного плана
+            due = []
+            if jump is not None:
+                due = self.handle_clock_jump(jump, now)
+            due += self.current_notification_plan(now).pop_due(now)
+
+            policy = self.settings["catchup_policy"]
+            if policy not in CATCHUP_POLICIES:
+                policy = "latest"
+            for entry in resolve_missed(due, now, policy):
+                self.queue_notification(entry.notif_type, entry.task, entry.fire_at.timestamp(),
+                                        entry.text, entry.sound_file)
+            # Раз в тик: показ новых и отложенных ограничением частоты
+            self.dispatcher.dispatch()
 
             # Обновляем интерфейс
-            play_sound = self.time_start_label.text() != (start_time if start_time else "")
+            play_sound = self.canvas.start_time != (start_time if start_time else "")
             self.update_overlay(task, color, start_time, next_time, next_task_data, play_sound)
+            if self.status_server:
+                name = self.settings["active_timetable"]
+                current = (task_data, start_time, next_time, next_task_data)
+                timetable = self.timetable
+                self.status_state.publish_slot((timetable.version, name, current), now,
+                                               lambda: build_status(name, now, current, timetable))
+
+            # Журнал активности пишет только при смене слота; свободное время закрывает интервал
+            self.activity_log.record_transition(self.settings["active_timetable"], start_time,
+                                                None if task_data is FREE_TIME else task, now.timestamp())
 
         except Exception as e:
             print(f"Ошибка в check_timetable_loop: {e}")
 
-    def show_notification(self, notif_type, task_name):
+    def handle_clock_jump(self, jump, now):
+        """Сон или перевод часов: закрывает интервал и собирает пропущенное"""
+        if jump.kind != "backward":
+            # Время сна не засчитывается задаче, которая была на экране
+            self.activity_log.close_session(jump.since)
+
+        # Пропущенные уведомления снимаются со старого плана, пока он
+        # еще содержит их, а новый план строится уже от текущего времени
+        missed = []
+        if self.notification_plan is not None:
+            missed = self.notification_plan.pop_due(now)
+        self.plan_revision += 1
+        return missed
+
+    def current_notification_plan(self, now):
+        """План уведомлений; перестраивается при новой версии расписания или смене дня"""
+        plan = self.notification_plan
+        version = self.plan_version()
+        if plan is None or not plan.is_current(version, now):
+            texts = {
+                "before": read_notification_lines(self.data_folder_path / "before.txt"),
+                "now": read_notification_lines(self.data_folder_path / "now.txt"),
+            }
+            plan = NotificationPlan.build(version, self.timetable, self.settings,
+                                          now, texts, plan.fired if plan else None)
+            self.notification_plan = plan
+        return plan
+
+    def notification_plan_path(self):
+        return self.data_folder_path / "notification_plan.json"
+
+    def export_notification_plan(self):
+        try:
+            self.current_notification_plan(self.clock()).dump_json(self.notification_plan_path())
+        except Exception as e:
+            print(f"Ошибка сохранения плана уведомлений: {e}")
+
+    def queue_notification(self, notif_type, task_name, scheduled=None, text=None, sound_file=None):
+        """Ставит уведомление в очередь диспетчера (показ — в dispatch())"""
+        timing = self.latency.start(notif_type, task_name, scheduled)
+
         if notif_type == "before":
             text_file = self.data_folder_path / "before.txt"
-            sound_file = self.settings["sound_before_file"]
+            sound_file = sound_file or self.settings["sound_before_file"]
         else:
             text_file = self.data_folder_path / "now.txt"
-            sound_file = self.settings["sound_now_file"]
+            sound_file = sound_file or self.settings["sound_now_file"]
+        if text is None:
+            lines = read_notification_lines(text_file)
+            text = random.choice(lines) if lines else "Напоминание"
 
+        self.dispatcher.submit(Alert(notif_type, task_name, scheduled, text, sound_file, timing))
+
+    @traced()
+    def show_notification(self, notif_type, task_name, scheduled=None, text=None, sound_file=None):
+        self.queue_notification(notif_type, task_name, scheduled, text, sound_file)
+        self.dispatcher.dispatch()
+
+    def present_alert(self, alert, replace):
+        """Единственное окно уведомлений: новое или обновление текущего"""
         duration = self.settings["notification_duration_secs"]
+        text = alert.display_text()
 
-        # КРИТИЧЕСКОЕ ИСПРАВЛЕНИЕ: сохраняем ссылку на уведомление
-        self.notification = NotificationWindow(
-            text_file,
-            duration,
-            task_name,
-            self.settings["theme"]
-        )
-        self.notification.show()
-
-        # Воспроизведение звука
-        if sound_file:
-            try:
-                # Остановить предыдущий звук
-                if self.notification_player.state() == QMediaPlayer.PlayingState:
-                    self.notification_player.stop()
+        if (replace and self.notification is not None and not sip.isdeleted(self.notification)
+                and self.notification.isVisible()):
+            self.notification.set_content(alert.task, text, duration)
+        else:
+            self.notification = NotificationWindow(None, duration, alert.task, self.settings["theme"], text)
+            self.notification.closed.connect(self.dispatcher.surface_closed)
+            self.notification.show()
 
-                media_content = QMediaContent(QUrl.fromLocalFile(sound_file))
-                self.notification_player.setMedia(media_content)
-                self.notification_player.play()
-            except Exception as e:
-                print(f"Ошибка воспроизведения звука: {e}")
+        # Окно отрисуется, когда управление вернется в цикл событий
+        timings = list(alert.timings)
+        QTimer.singleShot(0, lambda: [self.latency.mark(timing, "shown") for timing in timings])
+
+    def play_alert_sound(self, alert):
+        """Звук запускается только диспетчером и только когда плеер свободен"""
+        self.pending_sound_timings = list(alert.timings)
+        try:
+            media_content = QMediaContent(QUrl.fromLocalFile(alert.sound_file))
+            self.notification_player.setMedia(media_content)
+            self.notification_player.play()
+        except Exception as e:
+            print(f"Ошибка воспроизведения звука: {e}")
+
+    def on_notification_sound_position(self, position):
+        """Первое продвижение позиции означает, что звук реально начался"""
+        if position > 0 and self.pending_sound_timings:
+            for timing in self.pending_sound_timings:
+                self.latency.mark(timing, "sound_started")
+            self.pending_sound_timings = []
+
+    def contextMenuEvent(self, event):
+        """Меню отладки по правому клику на оверлее"""
+        menu = QMenu(self)
+        search_action = menu.addAction("Поиск...") if self.search_index else None
+        menu.addSeparator()
+        latency_action = menu.addAction("Задержки уведомлений...")
+        dump_action = menu.addAction("Сохранить задержки в JSON")
+        plan_action = menu.addAction("Экспорт плана уведомлений")
+        audit_action = menu.addAction("Аудит памяти...") if self.auditor else None
+        menu.addSeparator()
+        screens_action = menu.addAction("На всех мониторах")
+        screens_action.setCheckable(True)
+        screens_action.setChecked(self.settings["overlay_screens"] != "primary")
+
+        action = menu.exec_(event.globalPos())
+        if action is None:
+            return
+        if action == search_action:
+            self.open_search_dialog()
+        elif action == latency_action:
+            self.open_latency_panel()
+        elif action == dump_action:
+            self.dump_latency()
+        elif action == plan_action:
+            self.export_notification_plan()
+        elif action == audit_action:
+            self.open_audit_panel()
+        elif action == screens_action:
+            value = "all" if screens_action.isChecked() else "primary"
+            event_bus.publish(SettingsChanged({"overlay_screens": value}))
+
+    def open_search_dialog(self):
+        if self.search_dialog is None:
+            self.search_dialog = SearchDialog(self.search_index, self.open_search_hit)
+        self.search_dialog.show()
+        self.search_dialog.activateWindow()
+
+    def open_search_hit(self, hit):
+        """Открывает найденное: слот в редакторе, окно задач или редактор уведомлений"""
+        if hit.source == "task":
+            self.open_task_window()
+            return
+        self.open_timetable_editor()
+        if hit.source == "timetable":
+            self.editor.show_slot(hit.location, hit.detail)
+        else:
+            self.editor.open_notification_editor()
+
+    def open_audit_panel(self):
+        from debug_panel import AuditPanel
+        if self.audit_panel is None:
+            self.audit_panel = AuditPanel(self.auditor, self.data_folder_path / "memory_audit.json")
+        self.audit_panel.refresh()
+        self.audit_panel.show()
+        self.audit_panel.activateWindow()
+
+    def open_latency_panel(self):
+        from debug_panel import LatencyPanel
+        if self.latency_panel is None:
+            self.latency_panel = LatencyPanel(self.latency, self.latency_dump_path())
+        self.latency_panel.refresh()
+        self.latency_panel.show()
+        self.latency_panel.activateWindow()
+
+    def latency_dump_path(self):
+        return self.data_folder_path / "notification_latency.json"
+
+    def dump_latency(self):
+        try:
+            self.latency.dump_json(self.latency_dump_path())
+        except Exception as e:
+            print(f"Ошибка сохранения задержек: {e}")
 
     def open_task_window(self):
         """Открывает окно задач с корректным позиционированием"""
         from task import TimeAnchorApp as TaskApp
         if self.task_window is None or not self.task_window.isVisible():
-            self.task_window = TaskApp()
+            self.task_window = TaskApp(ui_handlers={"timer": self.start_timer_preset})
 
         # Позиционируем рядом с главным окном
         main_pos = self.mapToGlobal(QPoint(0, 0))
@@ -628,13 +661,19 @@ class TimeOverlay(QMainWindow):
     def open_timetable_editor(self):
         # Если окно уже создано, просто показываем его
         if self.editor is None:
-            self.editor = TimetableEditor(self)
+            self.editor = TimetableEditor(self, self.settings["active_timetable"])
             self.editor.show()
             self.hide()
         else:
             self.editor.show()
             self.editor.activateWindow()
 
+    def start_timer_preset(self, seconds):
+        """Действие "timer:" из окна задач"""
+        self.open_timer_window()
+        self.timer_win.start_preset(seconds)
+        return f"Таймер запущен: {seconds // 60:02d}:{seconds % 60:02d}"
+
     def open_timer_window(self):
         # Если окно уже создано, просто показываем его
         if self.timer_win is None:
@@ -646,16 +685,35 @@ class TimeOverlay(QMainWindow):
 
     def closeEvent(self, event):
         """Закрывает все дочерние окна при закрытии"""
-        if self.editor and self.editor.isVisible():
-            self.editor.close()
+        for event_type, handler in self.subscriptions:
+            event_bus.unsubscribe(event_type, handler)
+        if self.editor:
+            self.editor.unsubscribe_events()
+            if self.editor.isVisible():
+                self.editor.close()
         if self.timer_win and self.timer_win.isVisible():
             self.timer_win.close()
         if self.task_window and self.task_window.isVisible():
             self.task_window.close()
+        if self.search_dialog:
+            self.search_dialog.close()
+        if self.search_index:
+            self.search_index.close()
+        if self.status_server:
+            self.status_server.stop()
+        self.screens.close()
+        self.activity_log.close_session()
+        if self.latency.records:
+            self.dump_latency()
+        if tracer.enabled:
+            tracer.write()
+        if self.auditor:
+            self.auditor.stop()
+            self.auditor.dump_json(self.data_folder_path / "memory_audit.json")
         event.accept()
 
     def mousePressEvent(self, event):
-        if event.button() == Qt.LeftButton and self.drag_widget.geometry().contains(event.pos()):
+        if event.button() == Qt.LeftButton and self.canvas.is_drag_area(self.canvas.mapFrom(self, event.pos())):
             self.old_pos = event.globalPos()
 
     def mouseMoveEvent(self, event):
@@ -0,0 +1,427 @@
+# timeanchor_cli.py
+"""Командная строка TimeAnchor без Qt: для строки состояния, промпта и скриптов.
+
+Запуск:
+    python timeanchor_cli.py now                      текущая задача
+    python timeanchor_cli.py now --format "{task} до {next_time}"
+    python timeanchor_cli.py now --all                все расписания
+    python timeanchor_cli.py next                     следующая задача
+    python timeanchor_cli.py list [-t ИМЯ] [--timetables]
+    python timeanchor_cli.py add 9:30 "Почта" --color "#3498db" --duration 15
+    python timeanchor_cli.py remove 9:30
+    python timeanchor_cli.py export -o backup.json
+    python timeanchor_cli.py import backup.json [--replace]
+    python timeanchor_cli.py sync http://127.0.0.1:8766  синхронизация через SSH-туннель (см. sync.py)
+    python timeanchor_cli.py sync-serve [--port 8766]
+
+Работает с той же базой (Документы/TimeAnchor/timetable.db). Текущая
+задача активного расписания читается из скомпилированного schedule.bin,
+если он собран из текущего содержимого базы (сверяется счетчик изменений
+расписания), — без разбора строк расписания. Запущенный оверлей
+изменения из командной строки увидит после перезагрузки расписания
+(смена расписания или перезапуск).
+
+now и next строка состояния вызывает каждые несколько секунд, поэтому
+они разбираются без argparse (parse_fast), а sqlite3, json и utils
+импортируются только там, где нужны: пока schedule.bin свежий, команда
+не загружает ничего, кроме чтения файла.
+"""
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+from compact_timetable import current_slot, time_to_minutes
+from compiled_schedule import CompiledSchedule, load_compiled
+
+DEFAULT_FORMAT = "{time} {task}"
+EXPORT_FORMAT = "timeanchor-timetables v1"
+
+# Те же пути, что utils.get_data_folder_path() и get_db_path(), но без
+# pathlib и без создания папки: команды чтения ничего не создают
+DATA_FOLDER = os.path.join(os.path.expanduser("~"), "Documents", "TimeAnchor")
+DB_PATH = os.path.join(DATA_FOLDER, "timetable.db")
+COMPILED_PATH = os.path.join(DATA_FOLDER, "schedule.bin")
+SETTINGS_PATH = os.path.join(DATA_FOLDER, "settings.json")
+
+
+class CliError(Exception):
+    """Ошибка команды: сообщение выводится без трассировки, код выхода 1"""
+
+
+def database_error():
+    # Вычисляется только при исключении: команды без ошибок не импортируют sqlite3
+    import sqlite3
+    return sqlite3.Error
+
+
+def active_timetable():
+    """Активное расписание из settings.json оверлея"""
+    # Оверлей пишет schedule.bin только для активного расписания и после
+    # сохранения настроек; если они с тех пор не менялись, имя берется из
+    # файла без разбора JSON
+    try:
+        settings_mtime = os.stat(SETTINGS_PATH).st_mtime_ns
+    except OSError:
+        return "Основное"
+    try:
+        if settings_mtime < os.stat(COMPILED_PATH).st_mtime_ns:
+            return CompiledSchedule.open(COMPILED_PATH).timetable_name
+    except (OSError, ValueError):
+        pass
+    import json
+    try:
+        with open(SETTINGS_PATH, "r") as f:
+            return json.load(f).get("active_timetable", "Основное")
+    except (OSError, ValueError):
+        return "Основное"
+
+
+def read_connection():
+    import sqlite3
+    if not os.path.exists(DB_PATH):
+        raise CliError(f"База расписаний не найдена: {DB_PATH}")
+    return sqlite3.connect(DB_PATH)
+
+
+def write_connection_path():
+    """Путь к базе для изменений; схема создается так же, как при запуске приложения"""
+    from utils import get_db_path, create_demo_data
+    db_path = get_db_path()
+    create_demo_data(db_path)
+    return db_path
+
+
+def write_connection():
+    import sqlite3
+    db_path = write_connection_path()
+    conn = sqlite3.connect(str(db_path))
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+def load_timetable(name):
+    """Расписание для чтения: скомпилированный файл, если он свежий, иначе база"""
+    if not os.path.exists(DB_PATH):
+        raise CliError(f"База расписаний не найдена: {DB_PATH}")
+    compiled = load_compiled(COMPILED_PATH, DB_PATH, name)
+    if compiled is not None:
+        return compiled
+    from schedule_snapshot import read_snapshot
+    return read_snapshot(DB_PATH, name)
+
+
+def timetable_names(conn):
+    return [row[0] for row in conn.execute(
+        "SELECT DISTINCT timetable_name FROM timetable ORDER BY timetable_name")]
+
+
+def parse_time(value):
+    from utils import normalize_time
+    time_str = normalize_time(value)
+    if time_str is None:
+        raise CliError(f"Неверное время: {value}")
+    return time_str
+
+
+def current_minute(args):
+    if args.at:
+        return time_to_minutes(parse_time(args.at))
+    now = time.localtime()
+    return now.tm_hour * 60 + now.tm_min
+
+
+def render(template, fields):
+    try:
+        return template.format(**fields)
+    except (KeyError, IndexError, ValueError) as e:
+        raise CliError(f"Неверный шаблон {template!r}: {e}")
+
+
+def describe(name, timetable, minute):
+    """Поля для --format"""
+    current = current_slot(timetable, minute)
+    if current is None:
+        return None
+    task_data, start_time, next_time, next_data = current
+    return slot_fields(name, (start_time, task_data), (next_time, next_data) if next_time else None)
+
+
+def slot_fields(name, slot, next_slot):
+    """Поля для --format по (время, (задача, цвет)) текущего и следующего слота"""
+    start_time, (task, color) = slot
+    next_time, (next_task, next_color) = next_slot or (None, (None, None))
+    return {"timetable": name, "time": start_time, "task": task, "color": color,
+            "next_time": next_time or "", "next_task": next_task or "", "next_color": next_color or ""}
+
+
+# --- Команды ---
+
+def cmd_now(args):
+    minute = current_minute(args)
+    if args.all:
+        # Все расписания разом — через матрицу batch_eval (импорт NumPy
+        # стоит дороже остальной команды, поэтому только здесь)
+        from batch_eval import BatchSchedule, load_all
+        batch = BatchSchedule(load_all(DB_PATH))
+        fields = [slot_fields(name, slot, next_slot) for name, slot, next_slot in batch.at(minute)
+                  if slot is not None]
+    else:
+        name = args.timetable or active_timetable()
+        fields = [describe(name, load_timetable(name), minute)]
+    fields = [item for item in fields if item is not None]
+    if not fields:
+        raise CliError("Расписание пустое")
+    for item in fields:
+        line = render(args.format, item)
+        print(f"{item['timetable']}: {line}" if args.all else line)
+
+
+def cmd_next(args):
+    name = args.timetable or active_timetable()
+    item = describe(name, load_timetable(name), current_minute(args))
+    if item is None or not item["next_time"]:
+        raise CliError("Следующей задачи нет")
+    print(render(args.format, dict(item, time=item["next_time"], task=item["next_task"],
+                                   color=item["next_color"])))
+
+
+def cmd_list(args):
+    conn = read_connection()
+    try:
+        if args.timetables:
+            active = active_timetable()
+            for name in timetable_names(conn):
+                print(f"{'*' if name == active else ' '} {name}")
+            return
+        name = args.timetable or active_timetable()
+        rows = conn.execute(
+            "SELECT time, task, color, duration FROM timetable WHERE timetable_name = ? ORDER BY time",
+            (name,)).fetchall()
+    finally:
+        conn.close()
+    if not rows:
+        raise CliError(f"Расписание «{name}» пустое или не существует")
+    for time_str, task, color, duration in rows:
+        print(f"{time_str}  {f'{duration} мин' if duration else '':>8}  {color or '':7}  {task}")
+
+
+def cmd_add(args):
+    from edit_commands import SlotEdit
+    time_str = parse_time(args.time)
+    name = args.timetable or active_timetable()
+    conn = write_connection()
+    try:
+        row = conn.execute("SELECT task, color, duration FROM timetable WHERE time = ? AND timetable_name = ?",
+                           (time_str, name)).fetchone()
+        if row is None:
+            edit = SlotEdit.add(name, time_str, args.task, args.color, args.duration)
+        elif args.replace:
+            edit = SlotEdit.update(name, time_str, row[:2], time_str, (args.task, args.color),
+                                   row[2], args.duration)
+        else:
+            raise CliError(f"Время {time_str} уже есть в расписании «{name}» (--replace для замены)")
+        conn.execute(*edit.sql())
+        conn.commit()
+    finally:
+        conn.close()
+    print(f"{name}: {time_str} {args.task}")
+
+
+def cmd_remove(args):
+    from edit_commands import SlotEdit
+    time_str = parse_time(args.time)
+    name = args.timetable or active_timetable()
+    conn = write_connection()
+    try:
+        cursor = conn.execute(*SlotEdit.remove(name, time_str, None).sql())
+        conn.commit()
+    finally:
+        conn.close()
+    if cursor.rowcount == 0:
+        raise CliError(f"Времени {time_str} нет в расписании «{name}»")
+
+
+def cmd_export(args):
+    import json
+    conn = read_connection()
+    try:
+        names = [args.timetable] if args.timetable else timetable_names(conn)
+        timetables = {}
+        for name in names:
+            rows = conn.execute(
+                "SELECT time, task, color, duration FROM timetable WHERE timetable_name = ? ORDER BY time",
+                (name,)).fetchall()
+            timetables[name] = [{"time": time_str, "task": task, "color": color, "duration": duration}
+                                for time_str, task, color, duration in rows]
+    finally:
+        conn.close()
+    data = json.dumps({"format": EXPORT_FORMAT, "timetables": timetables}, ensure_ascii=False, indent=2)
+    if args.output and args.output != "-":
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(data)
+    else:
+        print(data)
+
+
+def cmd_import(args):
+    import json
+    from edit_commands import check_duration
+    try:
+        if args.file == "-":
+            data = json.load(sys.stdin)
+        else:
+            with open(args.file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+    except (OSError, ValueError) as e:
+        raise CliError(f"Ошибка чтения {args.file}: {e}")
+    if not isinstance(data, dict) or data.get("format") != EXPORT_FORMAT:
+        raise CliError(f"Ожидается файл экспорта ({EXPORT_FORMAT})")
+
+    rows = []
+    for name, slots in data["timetables"].items():
+        for slot in slots:
+            time_str = parse_time(slot["time"])
+            try:
+                duration = check_duration(slot.get("duration") or None)
+            except ValueError as e:
+                raise CliError(f"{name}, {time_str}: {e}")
+            rows.append((time_str, slot.get("task"), slot.get("color"), duration, name))
+
+    conn = write_connection()
+    try:
+        with conn:
+            if args.replace:
+                conn.executemany("DELETE FROM timetable WHERE timetable_name = ?",
+                                 [(name,) for name in data["timetables"]])
+            # UPSERT, а не INSERT OR REPLACE: замена строки должна пройти
+            # через триггеры обновления (поисковый индекс)
+            conn.executemany(
+                "INSERT INTO timetable (time, task, color, duration, timetable_name) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(time, timetable_name) DO UPDATE SET "
+                "task = excluded.task, color = excluded.color, duration = excluded.duration", rows)
+    finally:
+        conn.close()
+    print(f"Импортировано слотов: {len(rows)}, расписаний: {len(data['timetables'])}")
+
+
+def cmd_sync(args):
+    from sync import SyncStore, HttpTransport, sync
+    store = SyncStore(write_connection_path())
+    try:
+        received, sent = sync(store, HttpTransport(args.url))
+    except OSError as e:
+        raise CliError(f"Нет связи с {args.url}: {e}")
+    finally:
+        store.close()
+    print(f"Получено изменений: {received}, отправлено: {sent}")
+
+
+def cmd_sync_serve(args):
+    from sync import SyncStore, SyncServer
+    store = SyncStore(write_connection_path())
+    server = SyncServer(store, args.port, args.host)
+    print(f"Синхронизация на {args.host}:{server.port}, Ctrl+C для остановки")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        store.close()
+
+
+def build_parser():
+    import argparse
+    parser = argparse.ArgumentParser(prog="timeanchor", description="Расписания TimeAnchor из командной строки")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def with_timetable(command):
+        command.add_argument("-t", "--timetable", help="расписание (по умолчанию активное)")
+        return command
+
+    now = with_timetable(commands.add_parser("now", help="текущая задача"))
+    now.add_argument("-a", "--all", action="store_true", help="все расписания")
+    now.add_argument("--at", help="время вместо текущего, HH:MM")
+    now.add_argument("--format", default=DEFAULT_FORMAT,
+                     help="шаблон: {time} {task} {color} {next_time} {next_task} {timetable}")
+    now.set_defaults(handler=cmd_now)
+
+    following = with_timetable(commands.add_parser("next", help="следующая задача"))
+    following.add_argument("--at", help="время вместо текущего, HH:MM")
+    following.add_argument("--format", default=DEFAULT_FORMAT, help="шаблон, как у now")
+    following.set_defaults(handler=cmd_next)
+
+    listing = with_timetable(commands.add_parser("list", help="слоты расписания"))
+    listing.add_argument("--timetables", action="store_true", help="только названия расписаний")
+    listing.set_defaults(handler=cmd_list)
+
+    add = with_timetable(commands.add_parser("add", help="добавить слот"))
+    add.add_argument("time")
+    add.add_argument("task")
+    add.add_argument("--color", default="#FFFFFF")
+    add.add_argument("--duration", type=int, help="длительность в минутах")
+    add.add_argument("--replace", action="store_true", help="заменить слот с тем же временем")
+    add.set_defaults(handler=cmd_add)
+
+    remove = with_timetable(commands.add_parser("remove", help="удалить слот"))
+    remove.add_argument("time")
+    remove.set_defaults(handler=cmd_remove)
+
+    export = commands.add_parser("export", help="выгрузить расписания в JSON")
+    export.add_argument("-t", "--timetable", help="одно расписание (по умолчанию все)")
+    export.add_argument("-o", "--output", help="файл (по умолчанию стандартный вывод)")
+    export.set_defaults(handler=cmd_export)
+
+    load = commands.add_parser("import", help="загрузить расписания из JSON экспорта")
+    load.add_argument("file", help="файл или - для стандартного ввода")
+    load.add_argument("--replace", action="store_true", help="сначала очистить загружаемые расписания")
+    load.set_defaults(handler=cmd_import)
+
+    remote = commands.add_parser("sync", help="обменяться изменениями с другим компьютером")
+    remote.add_argument("url", help="адрес sync-serve, например http://host:8766")
+    remote.set_defaults(handler=cmd_sync)
+
+    serve = commands.add_parser("sync-serve", help="принимать синхронизацию от других компьютеров")
+    serve.add_argument("--host", default="127.0.0.1",
+                       help="адрес для подключений; доступ не проверяется, другим компьютерам — "
+                            "через SSH-туннель (см. sync.py)")
+    serve.add_argument("--port", type=int, default=8766)
+    serve.set_defaults(handler=cmd_sync_serve)
+    return parser
+
+
+def parse_fast(argv):
+    """now/next с -t/--timetable и --format без argparse; None — разбор
+    остального (--all, --at, --help, ошибки) остается build_parser()"""
+    if not argv or argv[0] not in ("now", "next"):
+        return None
+    args = SimpleNamespace(handler=cmd_now if argv[0] == "now" else cmd_next,
+                           timetable=None, format=DEFAULT_FORMAT, all=False, at=None)
+    options = {"-t": "timetable", "--timetable": "timetable", "--format": "format"}
+    rest = iter(argv[1:])
+    for option in rest:
+        value = next(rest, None)
+        if option not in options or value is None:
+            return None
+        setattr(args, options[option], value)
+    return args
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    args = parse_fast(argv) or build_parser().parse_args(argv)
+    try:
+        args.handler(args)
+    except CliError as e:
+        print(f"Ошибка: {e}", file=sys.stderr)
+        return 1
+    except (KeyError, ValueError, database_error()) as e:
+        print(f"Ошибка: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
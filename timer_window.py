@@ -5,6 +5,10 @@ from PyQt5.QtCore import Qt
 from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent
 from PyQt5.QtCore import QUrl, QTimer
 
+from shared import event_bus
+from event_bus import SettingsChanged
+from theme import theme_engine
+
 class TimerWindow(QDialog):
     def __init__(self, main_app):
         super().__init__()
@@ -19,6 +23,9 @@ class TimerWindow(QDialog):
         self.mode = "stopwatch"  # stopwatch|timer
         self.target_time = 0
 
+        # Собственный плеер для сигнала таймера
+        self.player = QMediaPlayer()
+
         # Инициализация интерфейса
         self.init_ui()
         self.apply_theme()
@@ -97,89 +104,14 @@ class TimerWindow(QDialog):
         self.update_timer.timeout.connect(self.update_time)
 
     def apply_theme(self):
-        theme = self.main_app.settings["theme"]
-        if theme == "dark":
-            style = """
-                QDialog {
-                    background-color: rgba(45, 45, 45, 200);
-                    border: none;
-                }
-                QLabel, QRadioButton {
-                    color: #EEE;
-                }
-                QLineEdit {
-                    background-color: #333;
-                    color: #EEE;
-                    border: 1px solid #555;
-                    border-radius: 3px;
-                    padding: 3px;
-                }
-                QPushButton {
-                    background-color: #444;
-                    color: #EEE;
-                    border: 1px solid #555;
-                    padding: 5px;
-                    border-radius: 4px;
-                }
-                QPushButton:hover {
-                    background-color: #555;
-                }
-                QPushButton:pressed {
-                    background-color: #666;
-                }
-                QPushButton:disabled {
-                    background-color: #333;
-                    color: #777;
-                }
-                QLCDNumber {
-                    background-color: #222;
-                    color: #0F0;
-                    border: 1px solid #444;
-                    border-radius: 5px;
-                }
-            """
-        else:
-            style = """
-                QDialog {
-                background-color: rgba(240, 240, 240, 200);
-                border: none;
-                }
-                QLabel, QRadioButton {
-                    color: #333;
-                }
-                QLineEdit {
-                    background-color: #FFF;
-                    color: #333;
-                    border: 1px solid #CCC;
-                    border-radius: 3px;
-                    padding: 3px;
-                }
-                QPushButton {
-                    background-color: #e0e0e0;
-                    color: #333;
-                    border: 1px solid #CCC;
-                    padding: 5px;
-                    border-radius: 4px;
-                }
-                QPushButton:hover {
-                    background-color: #d0d0d0;
-                }
-                QPushButton:pressed {
-                    background-color: #c0c0c0;
-                }
-                QPushButton:disabled {
-                    background-color: #f8f8f8;
-                    color: #999;
-                }
-                QLCDNumber {
-                    background-color: #222;
-                    color: #0F0;
-                    border: 1px solid #444;
-                    border-radius: 5px;
-                }
-            """
-
-        self.setStyleSheet(style)
+        theme_engine.apply(self, "timer")
+
+    def start_preset(self, seconds):
+        """Запускает таймер на заданное время (действие из окна задач)"""
+        self.timer_rb.setChecked(True)
+        self.reset()
+        self.timer_edit.setText(f"{seconds // 60:02d}:{seconds % 60:02d}")
+        self.start_stop()
 
     def set_mode(self, mode):
         self.mode = mode
@@ -264,12 +196,12 @@ class TimerWindow(QDialog):
                 sound_file = self.main_app.settings.get("timer_sound_file", self.main_app.settings["sound_file"])
                 if sound_file:
                     try:
-                        if self.main_app.timer_player.state() == QMediaPlayer.PlayingState:
-                            self.main_app.timer_player.stop()
+                        if self.player.state() == QMediaPlayer.PlayingState:
+                            self.player.stop()
 
                         media_content = QMediaContent(QUrl.fromLocalFile(sound_file))
-                        self.main_app.timer_player.setMedia(media_content)
-                        self.main_app.timer_player.play()
+                        self.player.setMedia(media_content)
+                        self.player.play()
                     except Exception as e:
                         print(f"Ошибка воспроизведения звука: {e}")
                 return
@@ -289,8 +221,7 @@ class TimerWindow(QDialog):
         )
 
         if file_name:
-            self.main_app.settings["timer_sound_file"] = file_name
-            self.main_app.save_settings()
+            event_bus.publish(SettingsChanged({"timer_sound_file": file_name}))
 
     def closeEvent(self, event):
         # Скрыть окно вместо закрытия
@@ -5,22 +5,30 @@ from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
 from PyQt5.QtWidgets import (
-    QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTreeWidget, QTreeWidgetItem,
+    QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTableView, QAbstractItemView,
     QLineEdit, QGroupBox, QLabel, QRadioButton, QButtonGroup, QCheckBox, QMessageBox,
-    QInputDialog, QFileDialog, QMenu, QGridLayout, QColorDialog, QComboBox
+    QInputDialog, QFileDialog, QMenu, QGridLayout, QColorDialog, QComboBox, QShortcut, QSpinBox
 )
 from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QColor, QFont
+from PyQt5.QtGui import QColor, QFont, QKeySequence
 
-from shared import db_lock
+from shared import db_lock, event_bus
+from event_bus import SlotChanged, TimetableSwitched, SettingsChanged
+from edit_commands import SlotEdit, EditLog
 from notification_editor import NotificationEditor
+from timetable_model import TimetableModel
+from theme import theme_engine
 from utils import normalize_time, get_data_folder_path, get_db_path
+from migrations import migrate
 
 
 class TimetableEditor(QMainWindow):
-    def __init__(self, main_app):
+    def __init__(self, main_app, active_timetable):
         super().__init__()
         self.main_app = main_app
+        # Активное расписание принадлежит оверлею: имя приходит при создании
+        # и дальше обновляется событиями шины
+        self.active_timetable = active_timetable
         self.setWindowTitle("Редактор расписания")
         self.setGeometry(200, 200, 800, 650)
 
@@ -33,9 +41,10 @@ class TimetableEditor(QMainWindow):
         self.create_database()
 
         # Инициализация данных
-        self.current_timetable = OrderedDict()
+        self.model = TimetableModel(self)
+        self.edit_log = EditLog(self.apply_edit)
         self.timetable_names = self.get_timetable_names()
-        self.selected_timetable = self.main_app.settings["active_timetable"]
+        self.selected_timetable = active_timetable
         self.load_data()
 
         # Инициализация интерфейса
@@ -44,6 +53,15 @@ class TimetableEditor(QMainWindow):
 
         self.add_bottom_buttons()
 
+        # Окно живет вместе с оверлеем (закрытие только прячет его),
+        # подписки снимает unsubscribe_events при закрытии оверлея
+        self.subscriptions = [
+            (TimetableSwitched, self.on_timetable_switched),
+            (SettingsChanged, self.on_settings_changed),
+        ]
+        for event_type, handler in self.subscriptions:
+            event_bus.subscribe(event_type, handler)
+
     def add_bottom_buttons(self):
         """Добавляет кнопки в нижнюю часть окна"""
         bottom_widget = QWidget()
@@ -55,6 +73,21 @@ class TimetableEditor(QMainWindow):
         self.help_button.setFixedSize(25, 25)
         self.help_button.clicked.connect(self.show_help)
 
+        # Отмена и повтор изменений
+        self.undo_button = QPushButton("↶")
+        self.undo_button.setFixedSize(25, 25)
+        self.undo_button.setToolTip("Отменить (Ctrl+Z)")
+        self.undo_button.clicked.connect(self.undo_edit)
+
+        self.redo_button = QPushButton("↷")
+        self.redo_button.setFixedSize(25, 25)
+        self.redo_button.setToolTip("Повторить (Ctrl+Y)")
+        self.redo_button.clicked.connect(self.redo_edit)
+
+        QShortcut(QKeySequence.Undo, self, self.undo_edit)
+        QShortcut(QKeySequence.Redo, self, self.redo_edit)
+        self.update_undo_buttons()
+
         # Кнопка уведомлений
         self.notif_button = QPushButton("Уведомления")
         self.notif_button.clicked.connect(self.open_notification_editor)
@@ -63,6 +96,8 @@ class TimetableEditor(QMainWindow):
         self.close_button.clicked.connect(self.close_editor)
 
         bottom_layout.addWidget(self.help_button)
+        bottom_layout.addWidget(self.undo_button)
+        bottom_layout.addWidget(self.redo_button)
         bottom_layout.addWidget(self.notif_button)
         bottom_layout.addStretch()
         bottom_layout.addWidget(self.close_button, alignment=Qt.AlignCenter)
@@ -78,8 +113,10 @@ class TimetableEditor(QMainWindow):
         <ul>
             <li>Выберите время с помощью кнопок часов и минут</li>
             <li>Введите описание задачи</li>
+            <li>При необходимости укажите длительность (иначе задача длится до следующей)</li>
             <li>Нажмите "Добавить"</li>
         </ul>
+        <p>Время задачи, которая пересекается с другой, подсвечивается красным.</p>
         <p>2. Для редактирования существующей задачи:</p>
         <ul>
             <li>Выберите задачу в списке</li>
@@ -124,13 +161,18 @@ class TimetableEditor(QMainWindow):
         self.render_timetable_tabs()
 
         # Таблица с расписанием
-        self.tree = QTreeWidget()
-        self.tree.setHeaderLabels(["Время", "Задача", "Цвет", "Расписание"])
+        self.tree = QTableView()
+        self.tree.setModel(self.model)
+        self.tree.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.tree.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.tree.verticalHeader().setVisible(False)
+        self.tree.horizontalHeader().setStretchLastSection(True)
         self.tree.setColumnWidth(0, 80)
         self.tree.setColumnWidth(1, 200)
         self.tree.setColumnWidth(2, 80)
         self.tree.setColumnWidth(3, 100)
-        self.tree.itemClicked.connect(self.select_item)
+        self.tree.setColumnWidth(4, 100)
+        self.tree.clicked.connect(self.select_item)
 
         # Панель редактирования
         edit_frame = QGroupBox("Редактирование задачи")
@@ -143,6 +185,13 @@ class TimetableEditor(QMainWindow):
         self.task_edit = QLineEdit()
         self.task_edit.setPlaceholderText("Описание задачи")
 
+        # Длительность: 0 — до начала следующей задачи
+        self.duration_edit = QSpinBox()
+        self.duration_edit.setRange(0, 1440)
+        self.duration_edit.setSingleStep(5)
+        self.duration_edit.setSuffix(" мин")
+        self.duration_edit.setSpecialValueText("до следующей")
+
         # Палитра цветов
         color_container = QWidget()
         color_layout = QHBoxLayout(color_container)
@@ -184,6 +233,8 @@ class TimetableEditor(QMainWindow):
         edit_layout.addWidget(self.time_edit)  # Используем созданный виджет
         edit_layout.addWidget(QLabel("Задача:"))
         edit_layout.addWidget(self.task_edit)
+        edit_layout.addWidget(QLabel("Длительность:"))
+        edit_layout.addWidget(self.duration_edit)
         edit_layout.addWidget(QLabel("Цвет:"))
         edit_layout.addWidget(color_container)
         edit_layout.addWidget(self.add_button)
@@ -195,6 +246,7 @@ class TimetableEditor(QMainWindow):
         active_layout = QHBoxLayout(self.active_frame)
 
         self.active_buttons = QButtonGroup()
+        self.active_radios = {}
         self.render_active_timetable_radio()
 
         # Сборка основного интерфейса
@@ -205,10 +257,6 @@ class TimetableEditor(QMainWindow):
 
         self.setCentralWidget(main_widget)
 
-        # Уменьшаем количество запросов к БД
-        self.load_data()
-        self.render_timetable()
-
     def create_time_selector(self, parent):
         """Создает виджет для выбора времени"""
         time_selector = QWidget(parent)
@@ -237,18 +285,25 @@ class TimetableEditor(QMainWindow):
         # Сохраняем виджет как time_edit
         self.time_edit = time_selector
 
-    def select_item(self, item, column):
+    def selected_time(self):
+        """Возвращает время выделенной строки или None"""
+        rows = self.tree.selectionModel().selectedRows()
+        if not rows:
+            return None
+        return self.model.time_at(rows[0].row())
+
+    def select_item(self, index):
         """Обработка выбора элемента с новым виджетом времени"""
-        time_str = item.text(0)
+        time_str = self.model.time_at(index.row())
         if ':' in time_str:
             hours, minutes = time_str.split(':')
             self.hour_combo.setCurrentText(hours)
             self.minute_combo.setCurrentText(minutes)
 
-        task = item.text(1)
-        color = item.text(2)
+        task, color = self.model.slot(time_str)
 
         self.task_edit.setText(task)
+        self.duration_edit.setValue(self.model.duration(time_str) or 0)
         self.color_edit.setText(color)
         self.update_color_display()  # обновляем индикатор цвета
 
@@ -256,13 +311,10 @@ class TimetableEditor(QMainWindow):
         self.delete_button.setEnabled(True)
 
     def update_item(self):
-        selected_items = self.tree.selectedItems()
-        if not selected_items:
+        old_time = self.selected_time()
+        if old_time is None:
             return
 
-        item = selected_items[0]
-        old_time = item.text(0)
-
         # Получаем новое время из комбобоксов
         hours = self.hour_combo.currentText()
         minutes = self.minute_combo.currentText()
@@ -276,26 +328,18 @@ class TimetableEditor(QMainWindow):
             return
 
         # Проверка на конфликт времени (если время изменилось)
-        if old_time != new_time and new_time in self.current_timetable:
+        if old_time != new_time and new_time in self.model:
             QMessageBox.warning(self, "Ошибка", "Время уже существует в текущем расписании")
             return
 
-        # Если изменилось время
-        if old_time != new_time:
-            # Перемещаем запись
-            task, color = self.current_timetable[old_time]
-            self.current_timetable[new_time] = (new_task, new_color)
-            del self.current_timetable[old_time]
-        else:
-            # Обновляем существующую запись
-            self.current_timetable[old_time] = (new_task, new_color)
-
         if not QColor(new_color).isValid():
             QMessageBox.warning(self, "Ошибка", "Неверный формат цвета. Используйте #RRGGBB")
             return
 
-        self.save_data()
-        self.render_timetable()
+        # Обновляем одну строку (при смене времени она перемещается)
+        self.push_edit(SlotEdit.update(
+            self.selected_timetable, old_time, self.model.slot(old_time), new_time, (new_task, new_color),
+            self.model.duration(old_time), self.duration_edit.value() or None))
 
         # Сбрасываем выделение
         self.tree.clearSelection()
@@ -303,147 +347,32 @@ class TimetableEditor(QMainWindow):
         self.delete_button.setEnabled(False)
 
     def apply_theme(self):
-        theme = self.main_app.settings["theme"]
-        if theme == "dark":
-            style = """
-                QMainWindow {
-                background-color: rgba(45, 45, 45, 220);
-                border: none;
-                }
-                QWidget {
-                    background-color: #2d2d2d;
-                    color: #EEE;
-                }
-                QTreeWidget {
-                    background-color: #333;
-                    color: #EEE;
-                    alternate-background-color: #3a3a3a;
-                }
-                QHeaderView::section {
-                    background-color: #444;
-                    color: #EEE;
-                    padding: 4px;
-                    border: 1px solid #555;
-                }
-                QGroupBox {
-                    border: 1px solid #555;
-                    border-radius: 5px;
-                    margin-top: 1ex;
-                    font-weight: bold;
-                }
-                QGroupBox::title {
-                    subcontrol-origin: margin;
-                    subcontrol-position: top center;
-                    padding: 0 5px;
-                    background-color: transparent;
-                    color: #EEE;
-                }
-                QLineEdit, QComboBox {
-                    background-color: #333;
-                    color: #EEE;
-                    border: 1px solid #555;
-                    padding: 3px;
-                    border-radius: 3px;
-                }
-                QPushButton {
-                    background-color: #444;
-                    color: #EEE;
-                    border: 1px solid #555;
-                    padding: 5px;
-                    border-radius: 4px;
-                }
-                QPushButton:hover {
-                    background-color: #555;
-                }
-                QPushButton:pressed {
-                    background-color: #666;
-                }
-            """
-        else:
-            style = """
-                QMainWindow {
-                background-color: rgba(240, 240, 240, 220);
-                border: none;
-                }
-                QWidget {
-                    background-color: #f0f0f0;
-                    color: #333;
-                }
-                QTreeWidget {
-                    background-color: #FFF;
-                    color: #333;
-                    alternate-background-color: #f8f8f8;
-                }
-                QHeaderView::section {
-                    background-color: #e0e0e0;
-                    color: #333;
-                    padding: 4px;
-                    border: 1px solid #CCC;
-                }
-                QGroupBox {
-                    border: 1px solid #CCC;
-                    border-radius: 5px;
-                    margin-top: 1ex;
-                    font-weight: bold;
-                }
-                QGroupBox::title {
-                    subcontrol-origin: margin;
-                    subcontrol-position: top center;
-                    padding: 0 5px;
-                    background-color: transparent;
-                    color: #333;
-                }
-                QLineEdit, QComboBox {
-                    background-color: #FFF;
-                    color: #333;
-                    border: 1px solid #CCC;
-                    padding: 3px;
-                    border-radius: 3px;
-                }
-                QPushButton {
-                    background-color: #e0e0e0;
-                    color: #333;
-                    border: 1px solid #CCC;
-                    padding: 5px;
-                    border-radius: 4px;
-                }
-                QPushButton:hover {
-                    background-color: #d0d0d0;
-                }
-                QPushButton:pressed {
-                    background-color: #c0c0c0;
-                }
-            """
-
-        self.setStyleSheet(style)
+        theme_engine.apply(self, "editor")
 
     def load_data(self):
-        self.current_timetable = OrderedDict()
+        slots = OrderedDict()
+        durations = {}
         try:
             with db_lock:
                 cursor = self.conn.cursor()
                 cursor.execute(
-                    "SELECT time, task, color, timetable_name FROM timetable WHERE timetable_name = ? ORDER BY time",
+                    "SELECT time, task, color, duration FROM timetable WHERE timetable_name = ? ORDER BY time",
                     (self.selected_timetable,))
 
-                for time_str, task, color, timetable_name in cursor.fetchall():
-                    self.current_timetable[time_str] = (task, color)
+                for time_str, task, color, duration in cursor.fetchall():
+                    slots[time_str] = (task, color)
+                    if duration:
+                        durations[time_str] = duration
         except Exception as e:
             print(f"Ошибка загрузки данных: {e}")
             # Создаем пустое расписание если возникла ошибка
-            self.current_timetable = OrderedDict()
+            slots = OrderedDict()
+        self.model.set_timetable(self.selected_timetable, slots, durations)
 
     def create_database(self):
         with db_lock:
-            cursor = self.conn.cursor()
-            cursor.execute('''CREATE TABLE IF NOT EXISTS timetable (
-                                id INTEGER PRIMARY KEY,
-                                time TEXT NOT NULL,
-                                task TEXT,
-                                color TEXT,
-                                timetable_name TEXT,
-                                UNIQUE(time, timetable_name))''')
-            self.conn.commit()
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            migrate(self.conn)
 
     def get_timetable_names(self):
         with db_lock:
@@ -452,30 +381,49 @@ class TimetableEditor(QMainWindow):
             return [row[0] for row in cursor.fetchall()]
 
     def render_timetable_tabs(self):
-        # Очистка старых кнопок
-        for i in range(self.tab_frame.layout().count() - 1, 0, -1):
-            widget = self.tab_frame.layout().itemAt(i).widget()
-            if widget and widget != self.add_tab_button:
-                widget.deleteLater()
+        """Полностью строит панель вкладок (только при создании окна)"""
+        for tab_button in self.tab_buttons.values():
+            tab_button.deleteLater()
+        self.tab_buttons = {}
 
-        # Создание кнопок для каждого расписания
         for name in self.timetable_names:
-            if name == self.selected_timetable:
-                style = "font-weight: bold; border-bottom: 2px solid #3498db;"
-            else:
-                style = ""
-
-            tab_button = QPushButton(name)
-            tab_button.setStyleSheet(style)
-            tab_button.clicked.connect(lambda _, n=name: self.switch_timetable(n))
-
-            # Редактирование по двойному клику
-            tab_button.setContextMenuPolicy(Qt.CustomContextMenu)
-            tab_button.customContextMenuRequested.connect(
-                lambda pos, n=name: self.show_timetable_context_menu(pos, n))
-
-            self.tab_frame.layout().addWidget(tab_button)
-            self.tab_buttons[name] = tab_button
+            self.add_timetable_tab(name)
+
+    def tab_role(self, name):
+        return "tab_active" if name == self.selected_timetable else "tab"
+
+    def add_timetable_tab(self, name):
+        """Добавляет одну кнопку вкладки"""
+        tab_button = QPushButton(name)
+        theme_engine.apply(tab_button, self.tab_role(name))
+        # Имя берется из текста кнопки, чтобы переименование не требовало пересоздания
+        tab_button.clicked.connect(lambda _, b=tab_button: self.switch_timetable(b.text()))
+
+        # Контекстное меню вкладки
+        tab_button.setContextMenuPolicy(Qt.CustomContextMenu)
+        tab_button.customContextMenuRequested.connect(
+            lambda pos, b=tab_button: self.show_timetable_context_menu(pos, b.text()))
+
+        self.tab_frame.layout().addWidget(tab_button)
+        self.tab_buttons[name] = tab_button
+
+    def remove_timetable_tab(self, name):
+        tab_button = self.tab_buttons.pop(name, None)
+        if tab_button:
+            tab_button.deleteLater()
+
+    def rename_timetable_tab(self, old_name, new_name):
+        tab_button = self.tab_buttons.pop(old_name, None)
+        if tab_button:
+            tab_button.setText(new_name)
+            self.tab_buttons[new_name] = tab_button
+
+    def update_tab_styles(self, *names):
+        """Перекрашивает только указанные вкладки"""
+        for name in names:
+            tab_button = self.tab_buttons.get(name)
+            if tab_button:
+                theme_engine.apply(tab_button, self.tab_role(name))
 
     def show_timetable_context_menu(self, pos, name):
         menu = QMenu(self)
@@ -490,49 +438,80 @@ class TimetableEditor(QMainWindow):
             self.delete_timetable(name)
 
     def render_active_timetable_radio(self):
-        # Удаляем все дочерние элементы из active_frame
-        while self.active_frame.layout().count():
-            child = self.active_frame.layout().takeAt(0)
-            if child.widget():
-                child.widget().deleteLater()
+        """Полностью строит радиокнопки (только при создании окна)"""
+        for radio in self.active_radios.values():
+            radio.deleteLater()
+        self.active_radios = {}
 
-        # Создаем новые радиокнопки
         for name in self.timetable_names:
-            radio = QRadioButton(name)
-            radio.setChecked(name == self.main_app.settings["active_timetable"])
-            radio.toggled.connect(lambda checked, n=name: self.set_active_timetable(n) if checked else None)
-            self.active_frame.layout().addWidget(radio)
+            self.add_active_radio(name)
+
+    def add_active_radio(self, name):
+        """Добавляет одну радиокнопку активного расписания"""
+        radio = QRadioButton(name)
+        radio.setChecked(name == self.active_timetable)
+        radio.toggled.connect(lambda checked, r=radio: self.set_active_timetable(r.text()) if checked else None)
+        self.active_frame.layout().addWidget(radio)
+        self.active_radios[name] = radio
+
+    def remove_active_radio(self, name):
+        radio = self.active_radios.pop(name, None)
+        if radio:
+            self.active_frame.layout().removeWidget(radio)
+            radio.deleteLater()
+
+    def rename_active_radio(self, old_name, new_name):
+        radio = self.active_radios.pop(old_name, None)
+        if radio:
+            radio.setText(new_name)
+            self.active_radios[new_name] = radio
+
+    def apply_edit(self, edit):
+        """Сохраняет изменение одной строки и передает его модели и оверлею"""
+        statement, params = edit.sql()
+        with db_lock:
+            self.conn.execute(statement, params)
+            self.conn.commit()
 
-    def save_data(self):
-        try:
-            with db_lock:
-                cursor = self.conn.cursor()
-                cursor.execute("DELETE FROM timetable WHERE timetable_name = ?", (self.selected_timetable,))
+        if edit.timetable_name == self.selected_timetable:
+            if edit.old_time is None:
+                self.model.insert_slot(edit.new_time, *edit.new_data, edit.new_duration)
+            elif edit.new_time is None:
+                self.model.remove_slot(edit.old_time)
+            else:
+                self.model.update_slot(edit.old_time, edit.new_time, *edit.new_data, edit.new_duration)
 
-                for time_str, (task, color) in self.current_timetable.items():
-                    cursor.execute(
-                        "INSERT INTO timetable (time, task, color, timetable_name) VALUES (?, ?, ?, ?)",
-                        (time_str, task, color, self.selected_timetable)
-                    )
+        event_bus.publish(SlotChanged(edit))
 
-                self.conn.commit()
+    def push_edit(self, edit):
+        """Выполняет изменение через журнал отмены"""
+        try:
+            self.edit_log.push(edit)
+            return True
         except Exception as e:
             QMessageBox.critical(self, "Ошибка сохранения", f"Произошла ошибка при сохранении данных: {str(e)}")
             print(f"Ошибка сохранения данных: {e}")
+            return False
+        finally:
+            self.update_undo_buttons()
 
-    def render_timetable(self):
-        self.tree.clear()
+    def undo_edit(self):
+        try:
+            self.edit_log.undo()
+        except Exception as e:
+            print(f"Ошибка отмены: {e}")
+        self.update_undo_buttons()
 
-        # Сортировка времени
-        sorted_times = sorted(self.current_timetable.keys(), key=lambda x: self.time_str_to_minutes(x))
+    def redo_edit(self):
+        try:
+            self.edit_log.redo()
+        except Exception as e:
+            print(f"Ошибка повтора: {e}")
+        self.update_undo_buttons()
 
-        # Заполнение таблицы
-        for time_str in sorted_times:
-            task, color = self.current_timetable[time_str]
-            item = QTreeWidgetItem([time_str, task, color, self.selected_timetable])
-            item.setBackground(2, QColor(color))
-            item.setForeground(2, QColor("#000" if QColor(color).lightness() > 150 else "#FFF"))
-            self.tree.addTopLevelItem(item)
+    def update_undo_buttons(self):
+        self.undo_button.setEnabled(self.edit_log.can_undo())
+        self.redo_button.setEnabled(self.edit_log.can_redo())
 
     def time_str_to_minutes(self, time_str):
         t = datetime.strptime(time_str, "%H:%M").time()
@@ -556,7 +535,7 @@ class TimetableEditor(QMainWindow):
             return
 
         # Проверка на конфликт времени
-        if time_str in self.current_timetable:
+        if time_str in self.model:
             QMessageBox.warning(self, "Ошибка", "Время уже существует в текущем расписании")
             return
 
@@ -565,13 +544,15 @@ class TimetableEditor(QMainWindow):
             QMessageBox.warning(self, "Ошибка", "Неверный формат цвета. Используйте #RRGGBB")
             return
 
-        self.current_timetable[time_str] = (task, color)
-        self.save_data()
-        self.render_timetable()
+        duration = self.duration_edit.value() or None
+        if not self.push_edit(SlotEdit.add(self.selected_timetable, time_str, task, color, duration)):
+            return
+        self.tree.scrollTo(self.model.index(self.model.row_of(time_str), 0))
 
         # Сброс полей
         self.reset_time_selection()
         self.task_edit.clear()
+        self.duration_edit.setValue(0)
         self.color_edit.setText("#FFFFFF")
         self.update_color_display()
 
@@ -601,34 +582,58 @@ class TimetableEditor(QMainWindow):
             self.color_display.setStyleSheet("background-color: #FFFFFF; border: 1px solid red;")
 
     def remove_item(self):
-        selected_items = self.tree.selectedItems()
-        if not selected_items:
+        time_str = self.selected_time()
+        if time_str is None:
             return
 
-        item = selected_items[0]
-        time_str = item.text(0)
-
-        if time_str in self.current_timetable:
-            del self.current_timetable[time_str]
-            self.save_data()
-            self.render_timetable()
+        if time_str in self.model:
+            self.push_edit(SlotEdit.remove(self.selected_timetable, time_str, self.model.slot(time_str),
+                                           self.model.duration(time_str)))
 
         # Сброс полей и кнопок
-        self.save_data()
-        self.render_timetable()
         self.tree.clearSelection()
+        self.update_button.setEnabled(False)
+        self.delete_button.setEnabled(False)
+
+    def show_slot(self, timetable_name, time_str):
+        """Переключается на расписание и выделяет слот (для результатов поиска)"""
+        if timetable_name != self.selected_timetable and timetable_name in self.timetable_names:
+            self.switch_timetable(timetable_name)
+        if time_str not in self.model:
+            return
+        index = self.model.index(self.model.row_of(time_str), 0)
+        self.tree.selectRow(index.row())
+        self.tree.scrollTo(index)
+        self.select_item(index)
 
     def switch_timetable(self, name):
+        previous = self.selected_timetable
         self.selected_timetable = name
         self.load_data()
-        self.render_timetable()
-        self.render_timetable_tabs()
+        self.update_tab_styles(previous, name)
 
     def set_active_timetable(self, name):
-        self.main_app.settings["active_timetable"] = name
-        self.main_app.save_settings()
-        self.main_app.load_timetable()
-        self.render_active_timetable_radio()
+        event_bus.publish(TimetableSwitched(name))
+
+    def check_active_radio(self):
+        """Отмечает радиокнопку активного расписания, не публикуя смену заново"""
+        radio = self.active_radios.get(self.active_timetable)
+        if radio and not radio.isChecked():
+            radio.blockSignals(True)
+            radio.setChecked(True)
+            radio.blockSignals(False)
+
+    def on_timetable_switched(self, event):
+        self.active_timetable = event.name
+        self.check_active_radio()
+
+    def on_settings_changed(self, event):
+        if "active_timetable" in event.changes:
+            self.active_timetable = event.changes["active_timetable"]
+
+    def unsubscribe_events(self):
+        for event_type, handler in self.subscriptions:
+            event_bus.unsubscribe(event_type, handler)
 
     def add_timetable(self):
         name, ok = QInputDialog.getText(self, "Новое расписание", "Введите название расписания:")
@@ -647,11 +652,9 @@ class TimetableEditor(QMainWindow):
                 self.conn.commit()
 
             self.timetable_names.append(name)
-            self.selected_timetable = name
-            self.load_data()
-            self.render_timetable()
-            self.render_timetable_tabs()
-            self.render_active_timetable_radio()
+            self.add_timetable_tab(name)
+            self.add_active_radio(name)
+            self.switch_timetable(name)
 
     def edit_timetable_name(self, old_name):
         new_name, ok = QInputDialog.getText(self, "Переименование", "Введите новое название:", text=old_name)
@@ -672,13 +675,17 @@ class TimetableEditor(QMainWindow):
 
             if self.selected_timetable == old_name:
                 self.selected_timetable = new_name
+                self.model.rename_timetable(new_name)
 
-            if self.main_app.settings["active_timetable"] == old_name:
-                self.main_app.settings["active_timetable"] = new_name
-                self.main_app.save_settings()
+            if self.active_timetable == old_name:
+                event_bus.publish(SettingsChanged({"active_timetable": new_name}))
 
-            self.render_timetable_tabs()
-            self.render_active_timetable_radio()
+            # Записи журнала ссылаются на старое имя
+            self.edit_log.clear()
+            self.update_undo_buttons()
+
+            self.rename_timetable_tab(old_name, new_name)
+            self.rename_active_radio(old_name, new_name)
 
     def delete_timetable(self, name):
         if name == "Основное":
@@ -696,14 +703,17 @@ class TimetableEditor(QMainWindow):
                 self.conn.commit()
 
             # Обновление интерфейса
+            self.edit_log.clear()
+            self.update_undo_buttons()
             self.timetable_names.remove(name)
+            self.remove_timetable_tab(name)
+            self.remove_active_radio(name)
 
             if self.selected_timetable == name:
-                self.selected_timetable = "Основное"
-                self.load_data()
-
-            self.render_timetable_tabs()
-            self.render_active_timetable_radio()
+                self.switch_timetable("Основное")
+            # Удаленное активное расписание оверлей больше не покажет
+            if self.active_timetable == name:
+                self.set_active_timetable("Основное")
 
     def open_notification_editor(self):
         """Открывает редактор уведомлений"""
@@ -711,14 +721,10 @@ class TimetableEditor(QMainWindow):
         self.notif_editor.exec_()
 
     def close_editor(self):
-        self.save_data()
-        self.main_app.load_timetable()
         self.main_app.show()
         self.close()
 
     def closeEvent(self, event):
-        # Сохраняем данные и показываем главное окно
-        self.save_data()
-        self.main_app.load_timetable()
+        # Изменения уже сохранены построчно, просто показываем главное окно
         self.main_app.show()
         event.accept()
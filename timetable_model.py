@@ -0,0 +1,200 @@
+# timetable_model.py
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QVariant
+from PyQt5.QtGui import QBrush, QColor
+
+from compact_timetable import CompactTimetable, time_to_minutes, minutes_to_time
+from interval_tree import SlotIntervals
+
+
+HEADERS = ["Время", "Задача", "Цвет", "Длительность", "Расписание"]
+
+CONFLICT_BRUSH = QBrush(QColor("#e74c3c"))
+
+# Кэш кистей: один набор QBrush на цвет вместо пересоздания на каждую строку
+_brush_cache = {}
+
+
+def color_brushes(color):
+    """Возвращает (фон, текст) для ячейки цвета с кэшированием"""
+    brushes = _brush_cache.get(color)
+    if brushes is None:
+        qcolor = QColor(color)
+        foreground = QColor("#000" if qcolor.lightness() > 150 else "#FFF")
+        brushes = (QBrush(qcolor), QBrush(foreground))
+        _brush_cache[color] = brushes
+    return brushes
+
+
+class TimetableModel(QAbstractTableModel):
+    """Модель расписания для QTableView с построчными вставками и удалениями.
+
+    Строки хранятся в CompactTimetable (отсортированные массивы минут и
+    номеров строк), поэтому поиск строки выполняется бинарным поиском, а
+    изменение одной записи затрагивает только одну строку представления.
+    Пересечения слотов с явной длительностью ищутся через SlotIntervals
+    и пересчитываются только для строк, затронутых правкой.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.timetable_name = ""
+        self._table = CompactTimetable()
+        self.intervals = SlotIntervals()
+        self._conflicts = set()  # минуты начала слотов, которые с чем-то пересекаются
+
+    # --- Интерфейс QAbstractTableModel ---
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._table)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return HEADERS[section]
+        return QVariant()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return QVariant()
+
+        time_str, (task, color) = self._table.slot(index.row())
+        column = index.column()
+
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return time_str
+            if column == 1:
+                return task
+            if column == 2:
+                return color
+            if column == 3:
+                duration = self._table.duration(index.row())
+                return f"{duration} мин" if duration else ""
+            return self.timetable_name
+
+        if column == 0 and self._table.minutes[index.row()] in self._conflicts:
+            if role == Qt.BackgroundRole:
+                return CONFLICT_BRUSH
+            if role == Qt.ToolTipRole:
+                return "Пересекается с: " + self.intervals.describe(self._table.minutes[index.row()])
+
+        if column == 2 and role in (Qt.BackgroundRole, Qt.ForegroundRole):
+            background, foreground = color_brushes(color)
+            return background if role == Qt.BackgroundRole else foreground
+
+        return QVariant()
+
+    # --- Доступ к данным ---
+
+    def __contains__(self, time_str):
+        return time_str in self._table
+
+    def __len__(self):
+        return len(self._table)
+
+    def items(self):
+        """Записи расписания в порядке времени"""
+        return list(self._table.items())
+
+    def slot(self, time_str):
+        return self._table[time_str]
+
+    def duration(self, time_str):
+        return self._table.duration_of(time_str)
+
+    def has_conflict(self, time_str):
+        return time_to_minutes(time_str) in self._conflicts
+
+    def time_at(self, row):
+        return self._table.slot(row)[0]
+
+    def row_of(self, time_str):
+        """Номер строки по времени (бинарный поиск) или -1"""
+        return self._table.position(time_str)
+
+    # --- Изменение данных ---
+
+    def set_timetable(self, name, slots, durations=None):
+        """Полностью заменяет содержимое модели (смена расписания)"""
+        self.beginResetModel()
+        self.timetable_name = name
+        self._table = CompactTimetable(slots, durations=durations)
+        self.intervals = SlotIntervals(zip(self._table.minutes, self._table.durations))
+        self._conflicts = set()
+        for minute, other in self.intervals.conflicts():
+            self._conflicts.update((minute, other))
+        self.endResetModel()
+
+    def refresh_conflicts(self, minutes):
+        """Пересчитывает подсветку пересечений только для указанных слотов"""
+        for minute in set(minutes):
+            row = self._table.position(minutes_to_time(minute))
+            conflicted = row >= 0 and bool(self.intervals.conflicts_of(minute))
+            if conflicted == (minute in self._conflicts):
+                continue
+            if conflicted:
+                self._conflicts.add(minute)
+            else:
+                self._conflicts.discard(minute)
+            if row >= 0:
+                self.dataChanged.emit(self.index(row, 0), self.index(row, 0))
+
+    def rename_timetable(self, name):
+        """Меняет название расписания в последней колонке"""
+        self.timetable_name = name
+        if len(self._table):
+            column = len(HEADERS) - 1
+            self.dataChanged.emit(self.index(0, column), self.index(len(self._table) - 1, column))
+
+    def insert_slot(self, time_str, task, color, duration=None):
+        """Вставляет одну строку на её место по времени"""
+        if time_str in self._table:
+            # Время уже есть: обновляем строку на месте
+            return self.update_slot(time_str, time_str, task, color, duration)
+        row = self._table.insertion_point(time_str)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._table.insert(time_str, task, color, duration)
+        self.endInsertRows()
+
+        minute = time_to_minutes(time_str)
+        self.intervals.add(minute, duration)
+        self.refresh_conflicts([minute] + self.intervals.conflicts_of(minute))
+        return row
+
+    def remove_slot(self, time_str):
+        """Удаляет одну строку"""
+        row = self.row_of(time_str)
+        if row < 0:
+            return None
+        minute = time_to_minutes(time_str)
+        affected = self.intervals.conflicts_of(minute)
+        self.intervals.remove(minute)
+        self._conflicts.discard(minute)
+
+        self.beginRemoveRows(QModelIndex(), row, row)
+        data = self._table.remove(time_str)
+        self.endRemoveRows()
+
+        self.refresh_conflicts(affected)
+        return data
+
+    def update_slot(self, old_time, new_time, task, color, duration=None):
+        """Обновляет строку; при смене времени строка перемещается"""
+        if old_time != new_time:
+            self.remove_slot(old_time)
+            return self.insert_slot(new_time, task, color, duration)
+
+        minute = time_to_minutes(old_time)
+        affected = self.intervals.conflicts_of(minute)
+        self.intervals.remove(minute)
+        self.intervals.add(minute, duration)
+        row = self._table.insert(old_time, task, color, duration)
+        self.refresh_conflicts([minute] + affected + self.intervals.conflicts_of(minute))
+        self.dataChanged.emit(self.index(row, 0), self.index(row, len(HEADERS) - 1))
+        return row
@@ -0,0 +1,154 @@
+# tracing.py
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+
+TRACE_ENV = "TIMEANCHOR_TRACE"
+
+
+class Tracer:
+    """Сбор интервалов выполнения в формате Chrome Trace (chrome://tracing, Perfetto).
+
+    По умолчанию выключен: обернутые функции проверяют один флаг и сразу
+    вызывают оригинал. Включается переменной окружения TIMEANCHOR_TRACE
+    (значение — путь для файла трассы или "1") или настройкой trace_enabled.
+    """
+
+    def __init__(self, max_events=200000):
+        self.enabled = False
+        self.output_path = None
+        self.events = deque(maxlen=max_events)
+        self.pid = os.getpid()
+        self.origin_ns = time.perf_counter_ns()
+
+        env_value = os.environ.get(TRACE_ENV)
+        if env_value and env_value != "0":
+            self.enable(None if env_value == "1" else env_value)
+
+    def enable(self, output_path=None):
+        self.enabled = True
+        if output_path:
+            self.output_path = output_path
+
+    def disable(self):
+        self.enabled = False
+
+    def _ts(self, ns):
+        return (ns - self.origin_ns) / 1000
+
+    def add_span(self, name, start_ns, end_ns, category="app"):
+        self.events.append({
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": self._ts(start_ns),
+            "dur": (end_ns - start_ns) / 1000,
+            "pid": self.pid,
+            "tid": threading.get_ident(),
+        })
+
+    def add_counter(self, name, values):
+        self.events.append({
+            "name": name,
+            "ph": "C",
+            "ts": self._ts(time.perf_counter_ns()),
+            "pid": self.pid,
+            "args": values,
+        })
+
+    def span(self, name, category="app"):
+        """Контекстный менеджер для участка кода"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, category)
+
+    def write(self, path=None):
+        """Записывает накопленные события в JSON-файл Chrome Trace"""
+        path = path or self.output_path
+        if not path:
+            return None
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": list(self.events), "displayTimeUnit": "ms"}, f)
+        return path
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "category", "start_ns")
+
+    def __init__(self, tracer, name, category):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+
+    def __enter__(self):
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.tracer.add_span(self.name, self.start_ns, time.perf_counter_ns(), self.category)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+tracer = Tracer()
+
+
+def traced(name=None, category="app"):
+    """Декоратор: записывает интервал выполнения функции, если трассировка включена"""
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            start_ns = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                tracer.add_span(span_name, start_ns, time.perf_counter_ns(), category)
+        return wrapper
+    return decorator
+
+
+class EventLoopSampler:
+    """Измеряет задержку цикла событий Qt по опозданию периодического таймера"""
+
+    def __init__(self, parent=None, interval_ms=100):
+        from PyQt5.QtCore import QTimer
+
+        self.interval_ms = interval_ms
+        self.last_ns = None
+        self.max_lag_ms = 0.0
+        self.timer = QTimer(parent)
+        self.timer.timeout.connect(self.sample)
+
+    def start(self):
+        self.last_ns = time.perf_counter_ns()
+        self.timer.start(self.interval_ms)
+
+    def stop(self):
+        self.timer.stop()
+
+    def sample(self):
+        now_ns = time.perf_counter_ns()
+        lag_ms = max(0.0, (now_ns - self.last_ns) / 1e6 - self.interval_ms)
+        self.last_ns = now_ns
+        self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+        if tracer.enabled:
+            tracer.add_counter("event_loop_lag_ms", {"lag": round(lag_ms, 3)})
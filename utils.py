@@ -2,6 +2,8 @@
 import sqlite3
 from pathlib import Path
 
+from migrations import migrate
+
 
 def normalize_time(time_str):
     """Улучшенная нормализация времени"""
@@ -48,9 +50,8 @@ def get_db_path():
 def create_demo_data(db_path):
     """Создает демо-данные, если база пуста"""
     conn = sqlite3.connect(str(db_path))
+    migrate(conn)
     cursor = conn.cursor()
-    cursor.execute(
-        "CREATE TABLE IF NOT EXISTS timetable (id INTEGER PRIMARY KEY, time TEXT NOT NULL, task TEXT, color TEXT, timetable_name TEXT, UNIQUE(time, timetable_name))")
 
     cursor.execute("SELECT COUNT(*) FROM timetable")
     if cursor.fetchone()[0] == 0: